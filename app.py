@@ -7,6 +7,7 @@ if not os.path.isdir('data'):
     os.mkdir('data')
 import asyncio
 from functools import wraps
+from dataclasses import asdict
 from concurrent.futures import ThreadPoolExecutor
 
 # Import utilities
@@ -15,6 +16,15 @@ from utilities.token_manager import TokenManager
 from utilities.transfer_handler import TransferHandler
 from utilities.monitor_manager import MonitorManager
 from utilities.solana_client import SolanaClient
+from utilities.blockhash_service import get_blockhash_service
+from utilities.instruction_templates import template_cache
+from utilities.retry import retry_scheduler
+from utilities.reserve_cache import reserve_cache
+from utilities.pump import position_ledger, get_multiple_coin_data, estimate_sell_value
+from utilities.latency_trace import latency_tracer
+from utilities.config_service import config_service, ConfigError
+from utilities.sell_scheduler import sell_scheduler
+from utilities.token_filter import token_filter
 import logging
 
 
@@ -24,6 +34,7 @@ class NoRequestFilter(logging.Filter):
         return not (
                 '/api/status' in record.getMessage() or
                 '/api/transactions' in record.getMessage() or
+                '/api/blockhash/status' in record.getMessage() or
                 '/api/sniper/status' in record.getMessage()
         )
 
@@ -110,8 +121,8 @@ sniper_manager = SniperManager(DATA_DIR, monitor_manager, wallet_manager)
 @app.route('/api/start_sniper', methods=['POST'])
 def start_sniper():
     try:
-        config = request.json
-        save_data(config, CONFIG_FILE)
+        # 提交的键合并进当前配置，校验通过后写入文件并替换内存快照
+        config_service.update(request.json)
 
         if sniper_manager.start():
             return jsonify({
@@ -123,6 +134,8 @@ def start_sniper():
                 "status": "error",
                 "message": "Sniper is already running"
             }), 400
+    except ConfigError as e:
+        return jsonify({"status": "error", "message": f"Invalid config: {e}"}), 400
     except Exception as e:
         print(f"Error starting sniper: {e}")
         return jsonify({
@@ -167,6 +180,107 @@ def get_sniper_status():
     })
 
 
+@app.route('/api/monitor/status', methods=['GET'])
+def get_monitor_status():
+    """Get websocket monitor metrics"""
+    return jsonify({
+        "status": "success",
+        "monitor": monitor_manager.get_stats()
+    })
+
+
+@app.route('/api/latency', methods=['GET', 'DELETE'])
+def manage_latency():
+    """Per-stage snipe latency histograms, DELETE resets them"""
+    if request.method == 'DELETE':
+        latency_tracer.reset()
+    return jsonify({
+        "status": "success",
+        "latency": latency_tracer.get_stats()
+    })
+
+
+@app.route('/api/blockhash/status', methods=['GET'])
+def get_blockhash_status():
+    """Get blockhash cache staleness metrics"""
+    return jsonify({
+        "status": "success",
+        "blockhash": get_blockhash_service().get_stats()
+    })
+
+
+@app.route('/api/templates/status', methods=['GET'])
+def get_template_status():
+    """Get instruction template cache counters"""
+    return jsonify({
+        "status": "success",
+        "templates": template_cache.get_stats()
+    })
+
+
+@app.route('/api/retry/status', methods=['GET'])
+def get_retry_status():
+    """Get retry engine metrics"""
+    return jsonify({
+        "status": "success",
+        "retry": retry_scheduler.get_stats()
+    })
+
+
+@app.route('/api/reserves/status', methods=['GET'])
+def get_reserves_status():
+    """Get bonding curve reserve cache metrics"""
+    return jsonify({
+        "status": "success",
+        "reserves": reserve_cache.get_stats(),
+        "watched": list(monitor_manager.watched_curves)
+    })
+
+
+@app.route('/api/sells/pending', methods=['GET'])
+def get_pending_sells():
+    """Delayed sells waiting in the scheduler"""
+    return jsonify({
+        "status": "success",
+        "pending": [asdict(entry) for entry in sell_scheduler.get_pending()],
+        "scheduler": sell_scheduler.get_stats()
+    })
+
+
+@app.route('/api/filter/status', methods=['GET', 'DELETE'])
+def get_filter_status():
+    """Token filter rule hits and evaluation time, DELETE resets the counters"""
+    if request.method == 'DELETE':
+        token_filter.reset()
+    return jsonify({
+        "status": "success",
+        "filter": token_filter.get_stats()
+    })
+
+
+@app.route('/api/positions', methods=['GET'])
+def get_positions():
+    """Get ledger positions valued against their bonding curves in one batch"""
+    positions = position_ledger.get_positions()
+    coin_data = get_multiple_coin_data([p.mint for p in positions])
+    result = []
+    for position in positions:
+        balance = position.expected_balance
+        curve = coin_data.get(position.mint)
+        result.append({
+            'wallet': position.wallet,
+            'mint': position.mint,
+            'balance': balance,
+            'pending': len(position.pending),
+            'value_sol': estimate_sell_value(curve, balance) / 1e9 if curve else None
+        })
+    return jsonify({
+        "status": "success",
+        "positions": result,
+        "ledger": position_ledger.get_stats()
+    })
+
+
 def load_data(file_path):
     """Load JSON data from file"""
     with open(file_path, 'r') as f:
@@ -218,6 +332,15 @@ def manage_wallets():
             return jsonify({"status": "success"})
 
 
+@app.route('/api/keyring/status', methods=['GET'])
+def get_keyring_status():
+    """Decrypted keypair cache state"""
+    return jsonify({
+        "status": "success",
+        "keyring": wallet_manager.get_keyring_stats()
+    })
+
+
 @app.route('/api/collect_funds', methods=['POST'])
 @async_route
 async def collect_funds():
@@ -281,6 +404,7 @@ def manage_contracts():
         if new_contract and new_contract not in contracts:
             contracts.append(new_contract)
             save_data(contracts, CONTRACTS_FILE)
+            token_filter.set_contracts(contracts)
         return jsonify({"status": "success"})
 
     elif request.method == 'DELETE':
@@ -289,24 +413,37 @@ def manage_contracts():
             if address in contracts:
                 contracts.remove(address)
                 save_data(contracts, CONTRACTS_FILE)
+                token_filter.set_contracts(contracts)
                 return jsonify({"status": "success"})
             return jsonify({"status": "error", "message": "Contract not found"}), 404
         else:
             save_data([], CONTRACTS_FILE)
+            token_filter.set_contracts([])
             return jsonify({"status": "success"})
 
 
 @app.route('/api/config', methods=['GET', 'POST'])
 def manage_config():
     if request.method == 'GET':
-        return jsonify(load_data(CONFIG_FILE))
+        return jsonify(dict(config_service.get().raw))
 
     elif request.method == 'POST':
-        config = request.json
-        save_data(config, CONFIG_FILE)
+        try:
+            config_service.update(request.json)
+        except ConfigError as e:
+            return jsonify({"status": "error", "message": f"Invalid config: {e}"}), 400
         return jsonify({"status": "success"})
 
 
+@app.route('/api/config/status', methods=['GET'])
+def get_config_status():
+    """Config snapshot version and reload counters"""
+    return jsonify({
+        "status": "success",
+        "config": config_service.get_stats()
+    })
+
+
 @app.route('/api/transactions', methods=['GET'])
 def get_transactions():
     return jsonify(load_data(TRANSACTIONS_FILE))
@@ -0,0 +1,68 @@
+# Pump.fun 事件解码微基准，输出每秒解码事件数
+#   python test/event_decoder_bench.py
+import base64
+import os
+import struct
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solders.pubkey import Pubkey
+from utilities.event_decoder import decode_event, COMPLETE_EVENT_DISCRIMINATOR
+
+CREATE_PAYLOAD = (
+    "G3KpTd7rY3YLAAAAUm9hY2ggVG9rZW4FAAAAUk9BQ0hDAAAAaHR0cHM6Ly9pcGZzLmlvL2lwZnMvUW1SNUtYcU50ZkxwQWlqYW8zSjZueDJqcD"
+    "ltUW1uTHJhM3h3MllCRmRaYlVlUH521hPlKRNWIj9ImsPRSDEHgOc9DK4XBKN/GRDXKcOfYHI9n3/oAfrOR9ELHkoAtT8EKF36zirAHY345n5d"
+    "x4Qt6/vJ3sxlPPv+XGgLUXHQfVXJ55NsBL9lVa0A+GxTAg=="
+)
+TRADE_PAYLOAD = (
+    "vdt/007mYe5+dtYT5SkTViI/SJrD0UgxB4DnPQyuFwSjfxkQ1ynDn4BfrqgAAAAAP6LDhR9UAAABLev7yd7MZTz7/lxoC1Fx0H1VyeeTbAS/ZV"
+    "WtAPhsUwKs3F1nAAAAAIAL0qQHAAAAwW0UwsN7AwCAX66oAAAAAMHVAXYyfQIA"
+)
+COMPLETE_PAYLOAD = base64.b64encode(
+    COMPLETE_EVENT_DISCRIMINATOR + bytes(range(96)) + struct.pack('<q', 1700000000)
+).decode()
+
+
+def legacy_parse_create(base64_log: str):
+    """改写前 parse_create_event_log 的解析方式，作为对比"""
+    buffer = base64.b64decode(base64_log)
+    offset = [8]
+
+    def parse_string():
+        length = int.from_bytes(buffer[offset[0]:offset[0] + 4], 'little')
+        offset[0] += 4
+        value = buffer[offset[0]:offset[0] + length].decode('utf-8')
+        offset[0] += length
+        return value
+
+    def parse_public_key():
+        key_bytes = buffer[offset[0]:offset[0] + 32]
+        offset[0] += 32
+        return str(Pubkey(key_bytes))
+
+    return parse_string(), parse_string(), parse_string(), parse_public_key(), parse_public_key(), parse_public_key()
+
+
+def bench(name: str, fn, number: int = 200_000):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3))
+    print(f"{name:<36} {number / seconds:>12,.0f} events/s  {seconds / number * 1e6:8.3f} us/event")
+
+
+if __name__ == '__main__':
+    assert decode_event(CREATE_PAYLOAD).symbol == "ROACH"
+    assert decode_event(TRADE_PAYLOAD).is_buy
+
+    bench("create (legacy closures)", lambda: legacy_parse_create(CREATE_PAYLOAD))
+    bench("create (decode only)", lambda: decode_event(CREATE_PAYLOAD))
+    bench("create (decode + mint)", lambda: decode_event(CREATE_PAYLOAD).mint)
+
+    def create_all_keys():
+        event = decode_event(CREATE_PAYLOAD)
+        return event.mint, event.bonding_curve, event.user
+
+    bench("create (decode + all pubkeys)", create_all_keys)
+    bench("trade (decode only)", lambda: decode_event(TRADE_PAYLOAD))
+    bench("trade (decode + mint)", lambda: decode_event(TRADE_PAYLOAD).mint)
+    bench("complete (decode only)", lambda: decode_event(COMPLETE_PAYLOAD))
@@ -0,0 +1,71 @@
+# 回放录制的 websocket 流量，测量 MonitorManager 的吞吐和延迟
+#   python -m utilities.ws_replay record --out data/frames.wsr --duration 60
+#   python test/replay_bench.py --file data/frames.wsr --speed 0
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities.monitor_manager import MonitorManager
+from utilities.ws_replay import ReplayServer, PUMP_FUN_PROGRAM_ID
+
+
+async def run(path: str, speed: float, port: int, decode_workers: int):
+    server = ReplayServer(path, port=port, speed=speed)
+    await server.start()
+
+    monitor = MonitorManager(websocket_urls=[server.url])
+    monitor.set_decode_workers(decode_workers)
+    # 录制中的静默段不代表连接失效；回放流量的签名也不能拿去主网补回
+    monitor.set_heartbeat_options(enabled=False)
+    monitor.set_backfill_options(enabled=False)
+    detected = []
+
+    async def on_token(token_info, tx_signature):
+        detected.append(token_info.mint)
+
+    monitor.add_callback(on_token)
+    monitor_task = asyncio.create_task(monitor.start_monitoring(PUMP_FUN_PROGRAM_ID))
+
+    start = time.perf_counter()
+    await server.finished.wait()
+    # 等待客户端读完并处理完所有帧（处理数不再增长即视为结束）
+    processed, last_change = -1, time.perf_counter()
+    while time.perf_counter() - last_change < 0.5:
+        if monitor.decode_pool is not None:
+            current = monitor.decode_pool.get_stats()['decoded']
+        else:
+            current = monitor.log_classifier.notifications
+        if current != processed:
+            processed, last_change = current, time.perf_counter()
+        await asyncio.sleep(0.01)
+    elapsed = last_change - start
+
+    stats = monitor.get_stats()
+    monitor.is_running = False
+    monitor_task.cancel()
+    await server.stop()
+    if monitor.decode_pool is not None:
+        monitor.decode_pool.stop()
+
+    print(json.dumps({
+        'replay': server.get_stats(),
+        'tokens_detected': len(detected),
+        'pipeline_seconds': round(elapsed, 3),
+        'frames_per_second': round(server.frames_sent / elapsed, 1) if elapsed else None,
+        'monitor': stats
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', required=True)
+    parser.add_argument('--speed', type=float, default=0, help="1 = recorded pace, N = N times faster, 0 = max")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--decode-workers', type=int, default=0, help="decoder processes, 0 decodes in-process")
+    args = parser.parse_args()
+    asyncio.run(run(args.file, args.speed, args.port, args.decode_workers))
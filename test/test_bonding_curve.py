@@ -0,0 +1,65 @@
+# 批量报价与单笔整数报价逐项一致
+#   python -m pytest test/test_bonding_curve.py
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from utilities.bonding_curve import (quote_buy, quote_sell, curve_after_buy, quote_buy_many, quote_sell_many,
+                                     quote_sequential_buys)
+from utilities.global_account import DEFAULT_GLOBAL_ACCOUNT
+
+FEE_BPS = DEFAULT_GLOBAL_ACCOUNT.fee_basis_points
+# 新建曲线、开发者买入后、接近毕业三种状态
+CURVES = [
+    (30_000_000_000, 1_073_000_000_000_000, 793_100_000_000_000),
+    (32_830_000_000, 980_505_635_089_857, 700_605_635_089_857),
+    (114_000_000_000, 282_000_000_000_000, 2_100_000_000_000),
+]
+SLIPPAGES = (0, 1, 5, 15, 50)
+
+
+def sol_sweep(count=500):
+    rng = random.Random(8)
+    amounts = [0, 1, 100, 101, 102, 1_000_000_000, 85_000_000_000]
+    amounts += [rng.randrange(1, 50_000_000_000) for _ in range(count)]
+    return amounts
+
+
+@pytest.mark.parametrize("vsr, vtr, real", CURVES)
+def test_buy_sweep_matches_exact_quotes(vsr, vtr, real):
+    amounts = sol_sweep()
+    tokens, max_costs = quote_buy_many(vsr, vtr, amounts, SLIPPAGES, FEE_BPS, real)
+    assert tokens.dtype == np.int64 and max_costs.shape == (len(amounts), len(SLIPPAGES))
+    for i, amount in enumerate(amounts):
+        for j, slippage in enumerate(SLIPPAGES):
+            quote = quote_buy(vsr, vtr, amount, slippage, FEE_BPS, real)
+            assert tokens[i] == quote.token_amount
+            assert max_costs[i, j] == quote.max_sol_cost
+
+
+@pytest.mark.parametrize("vsr, vtr, real", CURVES)
+def test_sell_sweep_matches_exact_quotes(vsr, vtr, real):
+    rng = random.Random(9)
+    amounts = [0, -5, 1, 1_000] + [rng.randrange(1, real) for _ in range(500)]
+    net = quote_sell_many(vsr, vtr, amounts, FEE_BPS)
+    assert [int(value) for value in net] == [quote_sell(vsr, vtr, amount, 0, FEE_BPS).net_sol for amount in amounts]
+
+
+def test_sequential_buys_follow_the_curve():
+    vsr, vtr, _ = CURVES[0]
+    amounts = [3_000_000_000, 500_000_000, 500_000_000, 1_000_000_000]
+    tokens = quote_sequential_buys(vsr, vtr, amounts, FEE_BPS)
+
+    expected = []
+    for amount in amounts:
+        expected.append(quote_buy(vsr, vtr, amount, 0, FEE_BPS).token_amount)
+        vsr, vtr = curve_after_buy(vsr, vtr, amount, FEE_BPS)
+    assert list(tokens) == expected
+    # 后成交的同额买入拿到的代币更少
+    assert tokens[1] > tokens[2]
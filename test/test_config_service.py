@@ -0,0 +1,65 @@
+# 配置更新只改提交的键，其余键（tokenFilter、wsEndpoints 等）保持不变
+#   python -m pytest test/test_config_service.py
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities.config_service import ConfigService, ConfigError
+
+FULL_CONFIG = {
+    'mode': 'multi',
+    'maxSolPerTrade': 0.5,
+    'gasFee': 2,
+    'sellDelay': 10,
+    'sellPercentage': 50,
+    'tokenFilter': {'nameExclude': ['scam'], 'creatorDeny': ['bad']},
+    'wsEndpoints': ['wss://a.example.com', 'wss://b.example.com'],
+    'ingestPolicy': 'drop_oldest',
+    'heartbeatInterval': 3,
+    'backfillGaps': False,
+    'rpcTimeout': 5,
+}
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = os.path.join(tmp_path, "config.json")
+    with open(path, 'w') as f:
+        json.dump(FULL_CONFIG, f)
+    return ConfigService(path)
+
+
+def read(service):
+    with open(service.path) as f:
+        return json.load(f)
+
+
+def test_partial_update_keeps_other_keys(service):
+    # 网页保存时只提交交易参数
+    snapshot = service.update({'maxSolPerTrade': 1.0, 'gasFee': 3, 'sellDelay': 0, 'sellPercentage': 100})
+
+    assert read(service) == dict(FULL_CONFIG, maxSolPerTrade=1.0, gasFee=3, sellDelay=0, sellPercentage=100)
+    assert snapshot.max_sol_per_trade == 1.0
+    assert snapshot.mode == 'multi'
+    assert snapshot.token_filter.name_exclude == ('scam',)
+    assert snapshot.ws_endpoints == ('wss://a.example.com', 'wss://b.example.com')
+    assert snapshot.ingest_policy == 'drop_oldest'
+    assert snapshot.backfill_gaps is False
+    assert service.get() is snapshot
+
+
+def test_invalid_partial_update_writes_nothing(service):
+    before = service.get()
+    with pytest.raises(ConfigError):
+        service.update({'maxSolPerTrade': 1.0, 'mode': 'both'})
+    assert read(service) == FULL_CONFIG
+    assert service.get() is before
+
+
+def test_non_object_update_is_rejected(service):
+    with pytest.raises(ConfigError):
+        service.update(None)
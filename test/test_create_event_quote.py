@@ -0,0 +1,101 @@
+# 创建交易中开发者买入后的储备：免 RPC 买入按成交后的曲线报价
+#   python -m pytest test/test_create_event_quote.py
+import ast
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities.bonding_curve import quote_buy, buy_cost
+from utilities.decode_pool import decode_frame, RECORD_CREATE
+from utilities.global_account import DEFAULT_GLOBAL_ACCOUNT
+from utilities.log_filter import TRADE_EVENT_PREFIX
+from utilities.monitor_manager import MonitorManager
+from utilities.pump import coin_data_from_create_event
+
+FEE_BPS = DEFAULT_GLOBAL_ACCOUNT.fee_basis_points
+BUY_LAMPORTS = 500_000_000
+SLIPPAGE = 5
+
+
+def sample_logs():
+    """test/ws_listen.py 中的示例创建交易日志（含 2.83 SOL 的开发者买入）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ws_listen.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, 'attr', None) == 'is_pump_token_creation' \
+                and node.args and isinstance(node.args[0], ast.List):
+            return ast.literal_eval(node.args[0])
+    raise AssertionError("sample logs not found in ws_listen.py")
+
+
+def parse(logs):
+    for line in logs:
+        token_info = MonitorManager.parse_create_event_log(line.split('Program data: ')[1]) \
+            if line.startswith('Program data: ') else None
+        if token_info is not None:
+            MonitorManager.attach_dev_buy(token_info, logs)
+            return token_info
+    raise AssertionError("no create event")
+
+
+def coin_data_of(token_info):
+    return coin_data_from_create_event(token_info.mint, token_info.bonding_curve, token_info.virtual_sol_reserves,
+                                       token_info.virtual_token_reserves, token_info.real_token_reserves)
+
+
+def test_create_carries_dev_buy_reserves():
+    token_info = parse(sample_logs())
+    assert token_info.symbol == 'ROACH'
+    assert token_info.virtual_sol_reserves == 32_830_000_000
+    assert token_info.virtual_token_reserves == 980_505_635_089_857
+    assert token_info.real_token_reserves == 700_605_635_089_857
+
+
+def test_buy_after_dev_buy_stays_within_max_sol_cost():
+    coin_data = coin_data_of(parse(sample_logs()))
+    quote = quote_buy(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, BUY_LAMPORTS, SLIPPAGE,
+                      FEE_BPS, coin_data.real_token_reserves)
+
+    # 链上按开发者买入后的曲线收费
+    cost = buy_cost(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, quote.token_amount)
+    assert cost + cost * FEE_BPS // 10_000 <= quote.max_sol_cost
+
+    # 按初始储备报价的买入在同一曲线上超出滑点
+    initial = quote_buy(DEFAULT_GLOBAL_ACCOUNT.initial_virtual_sol_reserves,
+                        DEFAULT_GLOBAL_ACCOUNT.initial_virtual_token_reserves, BUY_LAMPORTS, SLIPPAGE, FEE_BPS)
+    cost = buy_cost(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, initial.token_amount)
+    assert cost + cost * FEE_BPS // 10_000 > initial.max_sol_cost
+
+
+def test_create_without_trade_uses_initial_reserves():
+    logs = [line for line in sample_logs() if not line.startswith(TRADE_EVENT_PREFIX)]
+    token_info = parse(logs)
+    assert token_info.virtual_sol_reserves is None
+    coin_data = coin_data_of(token_info)
+    assert coin_data.virtual_sol_reserves == DEFAULT_GLOBAL_ACCOUNT.initial_virtual_sol_reserves
+    assert coin_data.virtual_token_reserves == DEFAULT_GLOBAL_ACCOUNT.initial_virtual_token_reserves
+    assert coin_data.real_token_reserves == DEFAULT_GLOBAL_ACCOUNT.initial_real_token_reserves
+
+
+def test_missing_real_reserves_are_derived():
+    token_info = parse(sample_logs())
+    coin_data = coin_data_from_create_event(token_info.mint, token_info.bonding_curve,
+                                            token_info.virtual_sol_reserves, token_info.virtual_token_reserves)
+    assert coin_data.real_token_reserves == token_info.real_token_reserves
+
+
+def test_decode_pool_create_record_carries_dev_buy_reserves():
+    frame = json.dumps({
+        'jsonrpc': '2.0',
+        'method': 'logsNotification',
+        'params': {'result': {
+            'context': {'slot': 1},
+            'value': {'signature': 'sig', 'err': None, 'logs': sample_logs()}
+        }, 'subscription': 1}
+    }).encode()
+    creates = [record for record in decode_frame(frame) if record[0] == RECORD_CREATE]
+    assert len(creates) == 1
+    assert creates[0][-3:] == (32_830_000_000, 980_505_635_089_857, 700_605_635_089_857)
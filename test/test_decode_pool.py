@@ -0,0 +1,134 @@
+# 共享内存环形缓冲区和解码进程的输出反压
+#   python -m pytest test/test_decode_pool.py
+import json
+import marshal
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities import decode_pool
+from utilities.decode_pool import SharedRing, RECORD_CREATE, RECORD_TRADE, _FRAME_HEADER
+
+CREATE_PAYLOAD = (
+    "G3KpTd7rY3YLAAAAUm9hY2ggVG9rZW4FAAAAUk9BQ0hDAAAAaHR0cHM6Ly9pcGZzLmlvL2lwZnMvUW1SNUtYcU50ZkxwQWlqYW8zSjZueDJqcD"
+    "ltUW1uTHJhM3h3MllCRmRaYlVlUH521hPlKRNWIj9ImsPRSDEHgOc9DK4XBKN/GRDXKcOfYHI9n3/oAfrOR9ELHkoAtT8EKF36zirAHY345n5d"
+    "x4Qt6/vJ3sxlPPv+XGgLUXHQfVXJ55NsBL9lVa0A+GxTAg=="
+)
+TRADE_PAYLOAD = (
+    "vdt/007mYe5+dtYT5SkTViI/SJrD0UgxB4DnPQyuFwSjfxkQ1ynDn4BfrqgAAAAAP6LDhR9UAAABLev7yd7MZTz7/lxoC1Fx0H1VyeeTbAS/ZV"
+    "WtAPhsUwKs3F1nAAAAAIAL0qQHAAAAwW0UwsN7AwCAX66oAAAAAMHVAXYyfQIA"
+)
+
+
+@pytest.fixture
+def rings():
+    created = []
+
+    def make(capacity: int) -> SharedRing:
+        ring = SharedRing.create(capacity)
+        created.append(ring)
+        return ring
+    yield make
+    for ring in created:
+        ring.close()
+
+
+def test_records_survive_wrap_around(rings):
+    ring = rings(64)
+    expected = []
+    received = []
+    # 不同长度的记录让回绕时末尾剩余空间覆盖 0~3 字节和带回绕标记两种情况
+    for i in range(500):
+        record = bytes([i % 251]) * (1 + i * 7 % 23)
+        if not ring.write(record):
+            # 环满时读空后一定能写入
+            received.extend(ring.read_all())
+            assert ring.write(record)
+        expected.append(record)
+    received.extend(ring.read_all())
+    assert received == expected
+    assert len(ring) == 0
+
+
+def test_prefix_is_written_before_data(rings):
+    ring = rings(64)
+    assert ring.write(b"data", b"pre-")
+    assert list(ring.read_all()) == [b"pre-data"]
+
+
+def test_full_ring_rejects_until_read(rings):
+    ring = rings(64)
+    written = 0
+    while ring.write(b"x" * 12):
+        written += 1
+    # 每条记录占 4 字节长度 + 12 字节数据
+    assert written == 64 // 16
+    assert not ring.write(b"x")
+
+    assert len(list(ring.read_all())) == written
+    assert ring.write(b"x" * 12)
+
+
+def test_oversized_record_is_rejected(rings):
+    ring = rings(64)
+    assert not ring.write(b"x" * 61)
+    assert ring.write(b"x" * 60)
+
+
+def frame(*payloads: str) -> bytes:
+    body = json.dumps({
+        'jsonrpc': '2.0',
+        'method': 'logsNotification',
+        'params': {'result': {
+            'context': {'slot': 1},
+            'value': {'signature': 'sig', 'err': None,
+                      'logs': [f"Program data: {payload}" for payload in payloads]}
+        }, 'subscription': 1}
+    }).encode()
+    return _FRAME_HEADER.pack(time.perf_counter_ns(), 0) + body
+
+
+def test_decoder_never_drops_creates_when_output_is_full(rings):
+    in_ring = rings(1024 * 1024)
+    # 输出环只放得下少量记录，交易进程读取较慢
+    out_ring = rings(1024)
+    in_reader, in_writer = mp.Pipe(duplex=False)
+    out_reader, out_writer = mp.Pipe(duplex=False)
+    stop_event = threading.Event()
+    counters = [0] * decode_pool._COUNTERS
+
+    frames = 200
+    for _ in range(frames):
+        assert in_ring.write(frame(CREATE_PAYLOAD, TRADE_PAYLOAD, TRADE_PAYLOAD))
+
+    decoder = threading.Thread(target=decode_pool._decoder_main,
+                               args=(0, in_ring.name, out_ring.name, in_reader, out_writer, stop_event, counters))
+    decoder.start()
+    records = []
+    deadline = time.monotonic() + 10
+    try:
+        while sum(1 for r in records if r[0] == RECORD_CREATE) < frames and time.monotonic() < deadline:
+            if out_reader.poll(0.01):
+                while out_reader.poll():
+                    out_reader.recv_bytes()
+            time.sleep(0.002)
+            records.extend(marshal.loads(data) for data in out_ring.read_all())
+    finally:
+        stop_event.set()
+        decoder.join(timeout=5)
+
+    decoded, errors, dropped, create_waits = counters
+    creates = [r for r in records if r[0] == RECORD_CREATE]
+    assert len(creates) == frames
+    assert all(r[4] == "ROACH" for r in creates)
+    assert errors == 0
+    assert create_waits > 0
+    # 只有交易事件会被丢弃
+    assert decoded == frames * 3
+    assert dropped == frames * 2 - sum(1 for r in records if r[0] == RECORD_TRADE)
@@ -0,0 +1,46 @@
+# 延迟统计只记录发送过交易的 trace，日志文件按大小轮转
+#   python -m pytest test/test_latency_trace.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities.latency_trace import LatencyTracer
+
+
+def sent_trace(tracer, signature="sig"):
+    trace = tracer.start(signature, mint="mint")
+    for stage in ('parse', 'dispatch', 'filter', 'config_keypair', 'build', 'blockhash', 'sign', 'send'):
+        trace.mark(stage)
+    return trace
+
+
+def test_unsent_traces_are_only_counted(tmp_path):
+    log_file = os.path.join(tmp_path, "traces.jsonl")
+    tracer = LatencyTracer(log_file)
+    for outcome in ('filtered', 'filtered', 'skipped'):
+        trace = tracer.start("sig")
+        trace.mark('parse')
+        tracer.finish(trace, outcome)
+    tracer.finish(sent_trace(tracer), 'success')
+
+    stats = tracer.get_stats()
+    assert stats['traces'] == 1
+    assert stats['unsent'] == {'filtered': 2, 'skipped': 1}
+    assert stats['stages']['parse']['count'] == 1
+    with open(log_file) as f:
+        assert [json.loads(line)['outcome'] for line in f] == ['success']
+
+
+def test_trace_log_is_rotated(tmp_path):
+    log_file = os.path.join(tmp_path, "traces.jsonl")
+    tracer = LatencyTracer(log_file, max_log_bytes=1000)
+    for i in range(50):
+        tracer.finish(sent_trace(tracer, f"sig{i}"), 'success')
+
+    assert tracer.rotations > 0
+    assert os.path.getsize(log_file) <= 1000
+    assert os.path.getsize(log_file + ".1") <= 1000
+    with open(log_file) as f:
+        assert json.loads(f.readlines()[-1])['signature'] == "sig49"
@@ -0,0 +1,145 @@
+# 持仓账本的确认和对账顺序
+#   python -m pytest test/test_position_ledger.py
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solana.rpc.commitment import Confirmed
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction_status import TransactionConfirmationStatus
+from utilities import position_ledger as ledger_module
+from utilities.position_ledger import PositionLedger
+
+WALLET = str(Pubkey.new_unique())
+MINT = str(Pubkey.new_unique())
+# getSignatureStatuses 只解析签名格式，不校验内容
+BUY_SIG = str(Keypair().sign_message(b"buy"))
+SELL_SIG = str(Keypair().sign_message(b"sell"))
+
+
+def token_account(amount: int):
+    data = bytes(64) + amount.to_bytes(8, 'little') + bytes(93)
+    return SimpleNamespace(account=SimpleNamespace(data=data))
+
+
+class FakeClient:
+    def __init__(self):
+        self.statuses = {}
+        self.chain_balance = 0
+        self.balance_reads = []
+        self.on_balance_read = None
+
+    def get_signature_statuses(self, signatures):
+        return SimpleNamespace(value=[self.statuses.get(str(sig)) for sig in signatures])
+
+    def get_token_accounts_by_owner(self, owner, opts, commitment=None):
+        self.balance_reads.append(commitment)
+        if self.on_balance_read:
+            self.on_balance_read()
+        return SimpleNamespace(value=[token_account(self.chain_balance)] if self.chain_balance else [])
+
+
+def status(confirmation_status, err=None):
+    return SimpleNamespace(err=err, confirmation_status=confirmation_status)
+
+
+def tick(ledger: PositionLedger):
+    """后台线程每一轮的顺序"""
+    ledger.confirm_signatures()
+    ledger.reconcile_balances()
+
+
+def make_ledger(tmp_path, full_reconcile_interval=30.0):
+    client = FakeClient()
+    return PositionLedger(str(tmp_path), client, full_reconcile_interval=full_reconcile_interval), client
+
+
+def test_processed_buy_stays_pending(tmp_path):
+    ledger, client = make_ledger(tmp_path)
+    ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+    client.statuses[BUY_SIG] = status(TransactionConfirmationStatus.Processed)
+
+    tick(ledger)
+
+    position = ledger._positions[(WALLET, MINT)]
+    assert position.pending == {BUY_SIG: 1000}
+    assert position.balance == 0
+    assert ledger.get_balance(WALLET, MINT) == 1000
+    assert client.balance_reads == []
+
+
+def test_settled_buy_is_not_reconciled_in_the_same_tick(tmp_path):
+    ledger, client = make_ledger(tmp_path)
+    ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+    client.statuses[BUY_SIG] = status(TransactionConfirmationStatus.Confirmed)
+    # 最终确认前链上 finalized 余额还是 0
+    client.chain_balance = 0
+
+    tick(ledger)
+
+    assert ledger.get_balance(WALLET, MINT) == 1000
+    assert client.balance_reads == []
+
+
+def test_reconcile_reads_at_settle_commitment(tmp_path):
+    ledger, client = make_ledger(tmp_path, full_reconcile_interval=0.0)
+    ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+    client.statuses[BUY_SIG] = status(TransactionConfirmationStatus.Confirmed)
+    client.chain_balance = 900
+
+    tick(ledger)
+
+    assert client.balance_reads == [Confirmed]
+    assert ledger.get_balance(WALLET, MINT) == 900
+    assert ledger.corrections == 1
+
+
+def test_failed_transaction_is_dropped(tmp_path):
+    ledger, client = make_ledger(tmp_path)
+    ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+    client.statuses[BUY_SIG] = status(TransactionConfirmationStatus.Confirmed, err="InstructionError")
+
+    ledger.confirm_signatures()
+
+    assert ledger.get_balance(WALLET, MINT) == 0
+    assert ledger._positions[(WALLET, MINT)].pending == {}
+
+
+def test_expiry_uses_each_signature_send_time(tmp_path):
+    ledger, client = make_ledger(tmp_path)
+    ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+    position = ledger._positions[(WALLET, MINT)]
+    position.sent_at[BUY_SIG] -= ledger_module.PENDING_EXPIRY + 1
+    # 同一持仓上新发送的卖出不会延长买入的有效期
+    ledger.record_sell(WALLET, MINT, 400, SELL_SIG)
+
+    ledger.confirm_signatures()
+
+    assert position.pending == {SELL_SIG: -400}
+    assert set(position.sent_at) == {SELL_SIG}
+
+
+def test_reconcile_result_is_dropped_when_a_trade_lands_meanwhile(tmp_path):
+    ledger, client = make_ledger(tmp_path, full_reconcile_interval=0.0)
+    ledger.set_balance(WALLET, MINT, 500)
+    ledger._positions[(WALLET, MINT)].reconciled_at = time.time() - 60
+    client.chain_balance = 0
+    client.on_balance_read = lambda: ledger.record_buy(WALLET, MINT, 1000, BUY_SIG)
+
+    ledger.reconcile_balances()
+
+    assert ledger.get_balance(WALLET, MINT) == 1500
+
+
+def test_empty_position_is_removed_after_reconcile(tmp_path):
+    ledger, client = make_ledger(tmp_path, full_reconcile_interval=0.0)
+    ledger.set_balance(WALLET, MINT, 500)
+    client.chain_balance = 0
+
+    ledger.reconcile_balances()
+
+    assert ledger.get_balance(WALLET, MINT) is None
@@ -0,0 +1,88 @@
+# 多钱包批量卖出的报价：任意落地顺序下每笔卖出都满足 min_sol_output
+#   python -m pytest test/test_sell_batch.py
+import asyncio
+import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solders.keypair import Keypair
+from utilities import async_pump
+from utilities.bonding_curve import quote_sell, curve_after_sell
+from utilities.pump import coin_data_from_create_event
+from utilities.global_account import DEFAULT_GLOBAL_ACCOUNT
+
+MINT = "7GCihgDB8fe6KNjn2MYtkzZcRjQy3t9GHdC8uHYmW2hr"
+SLIPPAGE = 1
+FEE_BPS = DEFAULT_GLOBAL_ACCOUNT.fee_basis_points
+
+
+def run_sell_many(monkeypatch, balances):
+    coin_data = coin_data_from_create_event(MINT)
+    keypairs = [Keypair() for _ in balances]
+    by_wallet = {str(keypair.pubkey()): balance for keypair, balance in zip(keypairs, balances)}
+    built = []
+
+    def build_sell_transaction(keypair, quoted_curve, amount, slippage, gas_fee):
+        built.append((str(keypair.pubkey()), quoted_curve, amount, slippage))
+        return f"tx-{len(built)}"
+
+    monkeypatch.setattr(async_pump.reserve_cache, "get", lambda mint: coin_data)
+    monkeypatch.setattr(async_pump.position_ledger, "get_balance", lambda wallet, mint: by_wallet[wallet])
+    monkeypatch.setattr(async_pump.position_ledger, "record_sell", lambda *args: None)
+    monkeypatch.setattr(async_pump, "build_sell_transaction", build_sell_transaction)
+    monkeypatch.setattr(async_pump, "load_gas_fee", lambda: 1.0)
+
+    async def main():
+        client = async_pump.AsyncPumpClient("http://127.0.0.1:1")
+
+        async def send_transaction(tx):
+            return f"sig-{tx}"
+
+        async def get_token_balance(owner, mint):
+            return 0
+        client.send_transaction = send_transaction
+        client.get_token_balance = get_token_balance
+        try:
+            return await client.sell_many(MINT, keypairs, 100, SLIPPAGE)
+        finally:
+            await client.close()
+
+    return coin_data, asyncio.run(main()), built
+
+
+def test_every_landing_order_meets_min_output(monkeypatch):
+    balances = [30_000_000_000_000, 20_000_000_000_000, 10_000_000_000_000, 5_000_000_000_000]
+    coin_data, results, built = run_sell_many(monkeypatch, balances)
+
+    assert all(success for success, _ in results)
+    assert sorted(amount for _, _, amount, _ in built) == sorted(balances)
+    min_outputs = {wallet: quote_sell(curve.virtual_sol_reserves, curve.virtual_token_reserves, amount,
+                                      slippage, FEE_BPS).min_sol_output
+                   for wallet, curve, amount, slippage in built}
+
+    # 在链上按每一种顺序依次成交，检查每笔实际到手的 SOL
+    for order in itertools.permutations(built):
+        vsr, vtr = coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves
+        for wallet, _, amount, _ in order:
+            net = quote_sell(vsr, vtr, amount, 0, FEE_BPS).net_sol
+            assert net >= min_outputs[wallet]
+            vsr, vtr = curve_after_sell(vsr, vtr, amount)
+
+
+def test_shared_quote_would_fail_for_later_sells():
+    # 旧实现所有钱包共用同一曲线报价，第一笔成交后后面的卖出超出滑点
+    coin_data = coin_data_from_create_event(MINT)
+    vsr, vtr = coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves
+    amounts = [30_000_000_000_000] * 3
+    shared = quote_sell(vsr, vtr, amounts[0], SLIPPAGE, FEE_BPS).min_sol_output
+    vsr, vtr = curve_after_sell(vsr, vtr, amounts[0])
+    vsr, vtr = curve_after_sell(vsr, vtr, amounts[1])
+    assert quote_sell(vsr, vtr, amounts[2], 0, FEE_BPS).net_sol < shared
+
+
+def test_empty_wallet_is_skipped(monkeypatch):
+    _, results, built = run_sell_many(monkeypatch, [10_000_000_000_000, 0, 5_000_000_000_000])
+    assert [success for success, _ in results] == [True, False, True]
+    assert len(built) == 2
@@ -0,0 +1,114 @@
+# 延迟卖出调度：持久化恢复、过期条目、准时触发和批次合并
+#   python -m pytest test/test_sell_scheduler.py
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities.sell_scheduler import SellScheduler
+
+MINT = "7GCihgDB8fe6KNjn2MYtkzZcRjQy3t9GHdC8uHYmW2hr"
+OTHER_MINT = "So11111111111111111111111111111111111111112"
+
+
+def run_scheduler(scheduler: SellScheduler, seconds: float, dispatch=None):
+    """在新事件循环上运行调度器，返回 (触发时间, mint, 钱包, 百分比, bonding_curve) 列表"""
+    fired = []
+
+    async def handler(mint, wallets, percentage, bonding_curve):
+        fired.append((time.time(), mint, wallets, percentage, bonding_curve))
+
+    async def main():
+        scheduler.start(handler, dispatch)
+        await asyncio.sleep(seconds)
+        scheduler.stop()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    return fired
+
+
+def test_pending_sells_survive_restart(tmp_path):
+    scheduler = SellScheduler(str(tmp_path))
+    entry = scheduler.schedule(MINT, ["w1", "w2"], 50, 60, bonding_curve="curve")
+
+    with open(os.path.join(tmp_path, "pending_sells.json")) as f:
+        records = json.load(f)
+    assert [record['mint'] for record in records] == [MINT]
+
+    restored = SellScheduler(str(tmp_path))
+    restored.load()
+    assert restored.get_pending() == [entry]
+
+
+def test_overdue_sells_fire_on_start_and_are_removed_from_disk(tmp_path):
+    scheduler = SellScheduler(str(tmp_path))
+    scheduler.schedule(MINT, ["w1"], 100, -30, bonding_curve="curve")
+    scheduler.schedule(MINT, ["w2"], 100, 60)
+
+    restored = SellScheduler(str(tmp_path))
+    fired = run_scheduler(restored, 0.05)
+
+    assert [(mint, wallets, percentage, curve) for _, mint, wallets, percentage, curve in fired] == \
+        [(MINT, ["w1"], 100, "curve")]
+    with open(os.path.join(tmp_path, "pending_sells.json")) as f:
+        assert [record['wallets'] for record in json.load(f)] == [["w2"]]
+    assert restored.get_stats()['max_lateness_ms'] >= 30_000
+
+
+def test_sells_never_fire_before_their_deadline(tmp_path):
+    scheduler = SellScheduler(str(tmp_path))
+    entries = [scheduler.schedule(MINT, [f"w{i}"], 100, delay) for i, delay in enumerate((0.02, 0.05, 0.08))]
+
+    fired = run_scheduler(scheduler, 0.3)
+
+    assert len(fired) == len(entries)
+    for (fired_at, _, wallets, _, _), entry in zip(fired, entries):
+        assert wallets == entry.wallets
+        assert fired_at >= entry.due
+
+
+def test_due_sells_of_the_same_mint_are_coalesced(tmp_path):
+    scheduler = SellScheduler(str(tmp_path))
+    scheduler.schedule(MINT, ["w1"], 100, -1)
+    scheduler.schedule(MINT, ["w2", "w1"], 100, -1)
+    scheduler.schedule(MINT, ["w3"], 50, -1)
+    scheduler.schedule(OTHER_MINT, ["w4"], 100, -1)
+
+    fired = run_scheduler(scheduler, 0.05)
+
+    batches = sorted((mint, percentage, wallets) for _, mint, wallets, percentage, _ in fired)
+    assert batches == [(MINT, 50, ["w3"]), (MINT, 100, ["w1", "w2"]), (OTHER_MINT, 100, ["w4"])]
+    stats = scheduler.get_stats()
+    assert stats['fired'] == 4
+    assert stats['batches'] == 3
+    assert stats['coalesced'] == 1
+
+
+def test_batches_run_through_dispatcher(tmp_path):
+    scheduler = SellScheduler(str(tmp_path))
+    scheduler.schedule(MINT, ["w1"], 100, -1)
+    scheduler.schedule(OTHER_MINT, ["w2"], 100, -1)
+    threads = []
+
+    def dispatch(callback, *args):
+        # 第二个批次被拒绝时在调度器自己的循环上执行
+        if threads:
+            return False
+
+        def run():
+            threads.append(threading.current_thread())
+            asyncio.run(callback(*args))
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return True
+
+    fired = run_scheduler(scheduler, 0.05, dispatch)
+
+    assert sorted(mint for _, mint, _, _, _ in fired) == sorted([MINT, OTHER_MINT])
+    assert len(threads) == 1 and threads[0] is not threading.current_thread()
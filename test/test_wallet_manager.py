@@ -0,0 +1,32 @@
+# 密钥环解锁后解密失败的钱包仍然列出，并记录失败原因
+#   python -m pytest test/test_wallet_manager.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solders.keypair import Keypair
+from utilities.wallet_manager import WalletManager
+
+
+def test_undecryptable_wallet_is_still_listed(tmp_path):
+    manager = WalletManager(str(tmp_path))
+    good = manager.add_wallet(str(Keypair()))
+    bad = manager.add_wallet(str(Keypair()))
+    with open(manager.wallets_file) as f:
+        wallets = json.load(f)
+    wallets[bad] = "not-a-fernet-token"
+    with open(manager.wallets_file, 'w') as f:
+        json.dump(wallets, f)
+
+    manager.unlock()
+
+    assert sorted(manager.get_all_pubkeys()) == sorted([good, bad])
+    assert manager.get_keypair(good) is not None
+    assert manager.get_keypair(bad) is None
+    assert list(manager.get_keyring_stats()['decrypt_failures']) == [bad]
+
+    manager.remove_wallet(bad)
+    assert manager.get_all_pubkeys() == [good]
+    assert manager.decrypt_failures == {}
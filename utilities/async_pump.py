@@ -0,0 +1,301 @@
+# utilities/async_pump.py
+import asyncio
+import traceback
+import weakref
+from dataclasses import replace
+import httpx
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TokenAccountOpts, TxOpts
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from typing import Optional, Tuple, Dict, List
+from .pump import (
+    RPC_URL, CoinData, parse_bonding_curve_account, build_buy_transaction, build_sell_transaction, load_gas_fee,
+    chunk_mints, parse_multiple_coin_data, position_ledger
+)
+from .instruction_templates import derive_bonding_curve
+from .bonding_curve import curve_after_sell
+from .latency_trace import SnipeTrace
+from .config_service import SniperConfig
+from .reserve_cache import reserve_cache
+from .retry import (
+    retry_scheduler, RetryPolicy, RetryableError, RetryError, COIN_DATA_POLICY, TOKEN_BALANCE_POLICY, SEND_POLICY
+)
+
+
+class AsyncPumpClient:
+    def __init__(self, rpc_url: Optional[str] = None, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, timeout: float = 10.0):
+        """
+        Asyncio Pump.fun trading client backed by one pooled HTTP session
+        Args:
+            rpc_url: RPC endpoint
+            max_connections: Maximum concurrent HTTP connections
+            max_keepalive_connections: Idle connections kept open for reuse
+            timeout: Request timeout in seconds
+        """
+        self.rpc_url = rpc_url or RPC_URL
+        self.options = {
+            'rpc_url': self.rpc_url,
+            'max_connections': max_connections,
+            'max_keepalive_connections': max_keepalive_connections,
+            'timeout': timeout
+        }
+        self.client = AsyncClient(self.rpc_url, timeout=timeout)
+        # solana-py 的构造参数只支持 timeout，连接池限制需要换成自己的 session；
+        # 库创建的默认 session 还没有发出过请求，保留引用在 close() 时一起关闭
+        provider = self.client._provider
+        self._default_session = provider.session
+        provider.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            )
+        )
+        self.tx_opts = TxOpts(skip_preflight=True)
+
+    async def close(self):
+        """关闭连接池 session 和被替换的默认 session"""
+        await self.client.close()
+        await self._default_session.aclose()
+
+    async def sell_many(self, mint_str: str, keypairs: List[Keypair], percentage: int = 100,
+                        slippage: int = 5) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Sell mint from several wallets, reading the curve state once for all of them
+        Args:
+            mint_str: Token mint address
+            keypairs: Keypairs of the sellers
+            percentage: Percentage of tokens to sell (0-100)
+            slippage: Slippage tolerance percentage
+        Returns:
+            List of (success, signature) in keypair order
+        """
+        coin_data = reserve_cache.get(mint_str) or (await self.get_coin_data_batch([mint_str])).get(mint_str)
+        if not coin_data:
+            print("Invalid token or token has completed bonding")
+            return [(False, None)] * len(keypairs)
+
+        amounts = await asyncio.gather(*(
+            self.get_sell_amount(keypair, coin_data, percentage) for keypair in keypairs
+        ), return_exceptions=True)
+        total = sum(amount for amount in amounts if not isinstance(amount, BaseException))
+
+        async def sell_one(keypair: Keypair, amount) -> Tuple[bool, Optional[str]]:
+            if isinstance(amount, BaseException):
+                print(f"Error during sell: {amount}")
+                return False, None
+            if amount == 0:
+                print("No tokens to sell")
+                return False, None
+            # 每个钱包都按批次内其它卖出先成交后的曲线报价，无论落地顺序如何都满足 min_sol_output
+            vsr, vtr = curve_after_sell(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves,
+                                        total - amount)
+            worst_case = replace(coin_data, virtual_sol_reserves=vsr, virtual_token_reserves=vtr)
+            try:
+                return await self.send_sell(mint_str, keypair, worst_case, amount, slippage)
+            except Exception as e:
+                print(f"Error during sell: {e}")
+                return False, None
+
+        return await asyncio.gather(*(sell_one(keypair, amount) for keypair, amount in zip(keypairs, amounts)))
+
+    async def send_transaction(self, tx: VersionedTransaction) -> str:
+        """Send a signed transaction and return its signature"""
+        return str((await self.client.send_transaction(tx, opts=self.tx_opts)).value)
+
+    async def get_coin_data(self, mint_str: str, policy: RetryPolicy = COIN_DATA_POLICY) -> Optional[CoinData]:
+        """
+        Get coin data from the blockchain
+        Args:
+            mint_str: Token mint address
+            policy: Retry policy while the curve account is not visible yet
+        Returns:
+            CoinData object if successful, None otherwise
+        """
+        try:
+            mint = Pubkey.from_string(mint_str)
+            bonding_curve, associated_bonding_curve = derive_bonding_curve(mint)
+
+            async def fetch():
+                account_info = await self.client.get_account_info(bonding_curve)
+                if not account_info.value:
+                    raise RetryableError(f"bonding curve {bonding_curve} not found")
+                return account_info.value.data
+
+            data = await retry_scheduler.call_async("get_coin_data", fetch, policy=policy, endpoint=self.rpc_url)
+            return parse_bonding_curve_account(mint, bonding_curve, associated_bonding_curve, data)
+        except RetryError as e:
+            print(f"get_coin_data error: {e}")
+            return None
+        except Exception as e:
+            print(f"get_coin_data error: {e}")
+            traceback.print_exc()
+            return None
+
+    async def get_coin_data_batch(self, mint_strs: List[str]) -> Dict[str, Optional[CoinData]]:
+        """
+        Get coin data for many mints, 100 per getMultipleAccounts request, chunks in parallel
+        Args:
+            mint_strs: Token mint addresses
+        Returns:
+            Dict of mint address to CoinData, None where missing or failed
+        """
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Optional[CoinData]]:
+            try:
+                curves = [derive_bonding_curve(Pubkey.from_string(m))[0] for m in chunk]
+                accounts = (await retry_scheduler.call_async("get_multiple_coin_data", self.client.get_multiple_accounts,
+                                                             curves, policy=COIN_DATA_POLICY,
+                                                             endpoint=self.rpc_url)).value
+                return parse_multiple_coin_data(chunk, accounts)
+            except Exception as e:
+                print(f"get_coin_data_batch error: {e}")
+                return {m: None for m in chunk}
+
+        result = {}
+        for chunk_result in await asyncio.gather(*(fetch_chunk(c) for c in chunk_mints(mint_strs))):
+            result.update(chunk_result)
+        return result
+
+    async def get_token_balance(self, owner: Pubkey, mint: Pubkey) -> int:
+        """
+        Raw token balance of owner for mint
+        Raises:
+            RetryableError: If the token account does not exist yet
+        """
+        token_accounts = (await self.client.get_token_accounts_by_owner(owner, TokenAccountOpts(mint))).value
+        if not token_accounts:
+            raise RetryableError(f"no {mint} token account for {owner}")
+        return int.from_bytes(token_accounts[0].account.data[64:72], 'little')
+
+    async def buy(self, mint_str: str, keypair: Keypair, sol_amount: float = 0.01, slippage: int = 5,
+                  coin_data: Optional[CoinData] = None, trace: Optional[SnipeTrace] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Buy token from the Pump.fun platform
+        Args:
+            mint_str: Token mint address
+            keypair: Keypair of the buyer
+            sol_amount: Amount of SOL to spend
+            slippage: Slippage tolerance percentage
+            coin_data: Known curve state (e.g. from the create event), fetched over RPC if None
+            trace: Snipe trace receiving per-stage marks
+        Returns:
+            Tuple of (success: bool, transaction_signature: Optional[str])
+        """
+        try:
+            if coin_data is None:
+                coin_data = await self.get_coin_data(mint_str)
+            if not coin_data:
+                print("Invalid token or token has completed bonding")
+                return False, None
+
+            tx, quote = build_buy_transaction(keypair, coin_data, sol_amount, slippage, load_gas_fee(), trace)
+            try:
+                sig = await self.send_transaction(tx)
+            finally:
+                # 发送失败也计入发送阶段的延迟
+                if trace:
+                    trace.mark('send')
+            position_ledger.record_buy(str(keypair.pubkey()), mint_str, quote.token_amount, sig)
+            return True, sig
+        except Exception as e:
+            print(f"Error during buy: {e}")
+            return False, None
+
+    async def sell(self, mint_str: str, keypair: Keypair, percentage: int = 100, slippage: int = 5,
+                   coin_data: Optional[CoinData] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Sell token on the Pump.fun platform
+        Args:
+            mint_str: Token mint address
+            keypair: Keypair of the seller
+            percentage: Percentage of tokens to sell (0-100)
+            slippage: Slippage tolerance percentage
+            coin_data: Curve state already fetched for this exit, fetched over RPC if None
+        Returns:
+            Tuple of (success: bool, transaction_signature: Optional[str])
+        """
+        try:
+            if coin_data is None:
+                coin_data = reserve_cache.get(mint_str) or await self.get_coin_data(mint_str)
+            if not coin_data:
+                print("Invalid token or token has completed bonding")
+                return False, None
+
+            amount = await self.get_sell_amount(keypair, coin_data, percentage)
+            if amount == 0:
+                print("No tokens to sell")
+                return False, None
+            return await self.send_sell(mint_str, keypair, coin_data, amount, slippage)
+        except Exception as e:
+            print(f"Error during sell: {e}")
+            return False, None
+
+    async def get_sell_amount(self, keypair: Keypair, coin_data: CoinData, percentage: int) -> int:
+        """Raw token amount to sell, from the local ledger or the token account once it is visible"""
+        # 优先使用本地持仓账本，没有记录时等待代币账户可见
+        balance = position_ledger.get_balance(str(keypair.pubkey()), str(coin_data.mint))
+        if not balance:
+            balance = await retry_scheduler.call_async("get_token_balance", self.get_token_balance,
+                                                       keypair.pubkey(), coin_data.mint,
+                                                       policy=TOKEN_BALANCE_POLICY, endpoint=self.rpc_url)
+        return int(balance * percentage / 100)
+
+    async def send_sell(self, mint_str: str, keypair: Keypair, coin_data: CoinData, amount: int,
+                        slippage: int) -> Tuple[bool, Optional[str]]:
+        """Build, send and record a sell of amount quoted against coin_data"""
+        tx = build_sell_transaction(keypair, coin_data, amount, slippage, load_gas_fee())
+        sig = await retry_scheduler.call_async("send_sell", self.send_transaction, tx, policy=SEND_POLICY,
+                                               endpoint=self.rpc_url)
+        print(f"Sell transaction sent: {sig}")
+        position_ledger.record_sell(str(keypair.pubkey()), mint_str, amount, sig)
+        return True, sig
+
+
+# 每个事件循环一个客户端，httpx 连接不能跨事件循环使用
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPumpClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_pump_client(**kwargs) -> AsyncPumpClient:
+    """
+    Get the AsyncPumpClient shared by every coroutine on the running event loop
+    Args:
+        **kwargs: AsyncPumpClient options; without any the existing client is returned as is,
+            options different from the existing client's rebuild it
+    Returns:
+        AsyncPumpClient
+    """
+    loop = asyncio.get_running_loop()
+    pump_client = _clients.get(loop)
+    if pump_client is not None and kwargs:
+        options = dict(pump_client.options, **kwargs)
+        options['rpc_url'] = options['rpc_url'] or RPC_URL
+        if options != pump_client.options:
+            changed = [key for key in options if options[key] != pump_client.options[key]]
+            print(f"RPC client options changed ({', '.join(changed)}), rebuilding")
+            # 旧客户端上可能还有进行中的请求，等一个超时周期后再关闭
+            old_client = pump_client
+            loop.call_later(old_client.options['timeout'], lambda: loop.create_task(old_client.close()))
+            pump_client = None
+    if pump_client is None:
+        pump_client = AsyncPumpClient(**kwargs)
+        _clients[loop] = pump_client
+    return pump_client
+
+
+async def close_async_pump_client():
+    """关闭当前事件循环的客户端，事件循环关闭前调用"""
+    pump_client = _clients.pop(asyncio.get_running_loop(), None)
+    if pump_client is not None:
+        await pump_client.close()
+
+
+def get_client_options(config: SniperConfig) -> Dict:
+    """从配置快照中读取连接池参数"""
+    return {
+        'max_connections': config.rpc_max_connections,
+        'max_keepalive_connections': config.rpc_max_keepalive,
+        'timeout': config.rpc_timeout
+    }
@@ -0,0 +1,151 @@
+# utilities/blockhash_service.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict
+from solana.rpc.api import Client
+from solders.hash import Hash
+
+DEFAULT_RPC_URL = "https://staked.helius-rpc.com?api-key=bc8bd2ae-8330-4a02-9c98-2970d98545cd"
+
+
+@dataclass(frozen=True)
+class BlockhashSnapshot:
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since this blockhash was fetched"""
+        return time.monotonic() - self.fetched_at
+
+
+class BlockhashService:
+    def __init__(self, rpc_url: Optional[str] = None, refresh_interval: float = 1.0, max_age: float = 20.0):
+        """
+        Keep the latest blockhash in memory, refreshed by a background thread
+        Args:
+            rpc_url: RPC endpoint used for refreshing
+            refresh_interval: Seconds between background refreshes
+            max_age: Snapshots older than this are refetched synchronously on read
+        """
+        self.rpc_url = rpc_url or DEFAULT_RPC_URL
+        self.client = Client(self.rpc_url)
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+
+        self._snapshot: Optional[BlockhashSnapshot] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # 统计数据
+        self._refresh_count = 0
+        self._refresh_errors = 0
+        self._consecutive_errors = 0
+        self._reads = 0
+        self._fallback_fetches = 0
+        self._age_sum = 0.0
+        self._max_read_age = 0.0
+
+    def start(self):
+        """启动后台刷新线程"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="blockhash-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop_event.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.refresh_interval)
+
+    def refresh(self) -> Optional[BlockhashSnapshot]:
+        """
+        Fetch the latest blockhash from RPC and store it
+        Returns:
+            New snapshot, or None if the fetch failed
+        """
+        try:
+            value = self.client.get_latest_blockhash().value
+            snapshot = BlockhashSnapshot(
+                blockhash=value.blockhash,
+                last_valid_block_height=value.last_valid_block_height,
+                fetched_at=time.monotonic()
+            )
+            self._snapshot = snapshot
+            self._refresh_count += 1
+            self._consecutive_errors = 0
+            return snapshot
+        except Exception as e:
+            self._refresh_errors += 1
+            self._consecutive_errors += 1
+            print(f"Blockhash refresh error: {e}")
+            return None
+
+    def get_snapshot(self) -> BlockhashSnapshot:
+        """
+        Get the cached blockhash snapshot, fetching it only if missing or stale
+        Returns:
+            BlockhashSnapshot
+        """
+        if not self.is_running():
+            self.start()
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age > self.max_age:
+            self._fallback_fetches += 1
+            snapshot = self.refresh()
+            if snapshot is None:
+                raise RuntimeError("Unable to fetch latest blockhash")
+
+        age = snapshot.age
+        self._reads += 1
+        self._age_sum += age
+        if age > self._max_read_age:
+            self._max_read_age = age
+        return snapshot
+
+    def get_blockhash(self) -> Hash:
+        return self.get_snapshot().blockhash
+
+    def get_stats(self) -> Dict:
+        """Staleness and refresh metrics"""
+        snapshot = self._snapshot
+        return {
+            'running': self.is_running(),
+            'blockhash': str(snapshot.blockhash) if snapshot else None,
+            'last_valid_block_height': snapshot.last_valid_block_height if snapshot else None,
+            'current_age_ms': round(snapshot.age * 1000, 3) if snapshot else None,
+            'avg_read_age_ms': round(self._age_sum / self._reads * 1000, 3) if self._reads else None,
+            'max_read_age_ms': round(self._max_read_age * 1000, 3),
+            'reads': self._reads,
+            'fallback_fetches': self._fallback_fetches,
+            'refresh_count': self._refresh_count,
+            'refresh_errors': self._refresh_errors,
+            'consecutive_errors': self._consecutive_errors
+        }
+
+
+_service: Optional[BlockhashService] = None
+_service_lock = threading.Lock()
+
+
+def get_blockhash_service() -> BlockhashService:
+    """获取所有交易构建共享的 BlockhashService"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = BlockhashService()
+    return _service
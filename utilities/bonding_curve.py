@@ -0,0 +1,200 @@
+# utilities/bonding_curve.py
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # 批量报价需要 numpy，单笔报价不需要
+    np = None
+
+FEE_DENOMINATOR = 10_000
+
+
+@dataclass(frozen=True)
+class BuyQuote:
+    sol_amount: int
+    token_amount: int
+    sol_cost: int
+    fee: int
+    max_sol_cost: int
+
+
+@dataclass(frozen=True)
+class SellQuote:
+    token_amount: int
+    sol_output: int
+    fee: int
+    net_sol: int
+    min_sol_output: int
+
+
+def buy_cost(virtual_sol_reserves: int, virtual_token_reserves: int, token_amount: int) -> int:
+    """Lamports the program charges (before fee) for buying token_amount"""
+    if token_amount <= 0:
+        return 0
+    if token_amount >= virtual_token_reserves:
+        raise ValueError("token amount exceeds virtual token reserves")
+    return token_amount * virtual_sol_reserves // (virtual_token_reserves - token_amount) + 1
+
+
+def quote_buy(virtual_sol_reserves: int, virtual_token_reserves: int, sol_amount: int, slippage: int = 5,
+              fee_basis_points: int = 100, real_token_reserves: Optional[int] = None) -> BuyQuote:
+    """
+    Exact token amount a SOL budget buys on the Pump.fun constant-product curve
+    Args:
+        virtual_sol_reserves: Curve virtual SOL reserves (lamports)
+        virtual_token_reserves: Curve virtual token reserves (raw units)
+        sol_amount: Total lamports to spend, fee included
+        slippage: Slippage tolerance percentage applied to max_sol_cost
+        fee_basis_points: Program fee
+        real_token_reserves: Tokens actually left on the curve, caps the amount if given
+    Returns:
+        BuyQuote
+    """
+    # 扣除手续费后真正进入曲线的 SOL
+    sol_in = sol_amount * FEE_DENOMINATOR // (FEE_DENOMINATOR + fee_basis_points)
+    if sol_in <= 0:
+        return BuyQuote(sol_amount, 0, 0, 0, 0)
+
+    product = virtual_sol_reserves * virtual_token_reserves
+    new_token_reserves = product // (virtual_sol_reserves + sol_in) + 1
+    token_amount = virtual_token_reserves - new_token_reserves
+    if real_token_reserves is not None:
+        token_amount = min(token_amount, real_token_reserves)
+    token_amount = max(token_amount, 0)
+
+    sol_cost = buy_cost(virtual_sol_reserves, virtual_token_reserves, token_amount)
+    fee = sol_cost * fee_basis_points // FEE_DENOMINATOR
+    max_sol_cost = (sol_cost + fee) * (100 + slippage) // 100
+    return BuyQuote(sol_amount, token_amount, sol_cost, fee, max_sol_cost)
+
+
+def quote_sell(virtual_sol_reserves: int, virtual_token_reserves: int, token_amount: int, slippage: int = 5,
+               fee_basis_points: int = 100) -> SellQuote:
+    """
+    Exact lamports received for selling token_amount on the Pump.fun curve
+    Args:
+        virtual_sol_reserves: Curve virtual SOL reserves (lamports)
+        virtual_token_reserves: Curve virtual token reserves (raw units)
+        token_amount: Tokens to sell (raw units)
+        slippage: Slippage tolerance percentage applied to min_sol_output
+        fee_basis_points: Program fee
+    Returns:
+        SellQuote
+    """
+    if token_amount <= 0:
+        return SellQuote(token_amount, 0, 0, 0, 0)
+    sol_output = token_amount * virtual_sol_reserves // (virtual_token_reserves + token_amount)
+    fee = sol_output * fee_basis_points // FEE_DENOMINATOR
+    net_sol = sol_output - fee
+    min_sol_output = net_sol * (100 - slippage) // 100
+    return SellQuote(token_amount, sol_output, fee, net_sol, min_sol_output)
+
+
+def curve_after_buy(virtual_sol_reserves: int, virtual_token_reserves: int, sol_amount: int,
+                    fee_basis_points: int = 100):
+    """
+    Virtual reserves after a buy of sol_amount (fee included) lands on the curve
+    Returns:
+        Tuple of (virtual_sol_reserves, virtual_token_reserves)
+    """
+    sol_in = sol_amount * FEE_DENOMINATOR // (FEE_DENOMINATOR + fee_basis_points)
+    if sol_in <= 0:
+        return virtual_sol_reserves, virtual_token_reserves
+    new_token_reserves = virtual_sol_reserves * virtual_token_reserves // (virtual_sol_reserves + sol_in) + 1
+    return virtual_sol_reserves + sol_in, new_token_reserves
+
+
+def curve_after_sell(virtual_sol_reserves: int, virtual_token_reserves: int, token_amount: int):
+    """
+    Virtual reserves after a sell of token_amount lands on the curve
+    Returns:
+        Tuple of (virtual_sol_reserves, virtual_token_reserves)
+    """
+    if token_amount <= 0:
+        return virtual_sol_reserves, virtual_token_reserves
+    sol_output = token_amount * virtual_sol_reserves // (virtual_token_reserves + token_amount)
+    return virtual_sol_reserves - sol_output, virtual_token_reserves + token_amount
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for batch quoting")
+
+
+def _int_array(values: Sequence[int]):
+    # 储备乘积约 1e26，超出 int64；object 数组逐元素使用 Python 整数运算，结果与单笔报价完全一致
+    return np.array([int(value) for value in values], dtype=object)
+
+
+def quote_buy_many(virtual_sol_reserves: int, virtual_token_reserves: int, sol_amounts: Sequence[int],
+                   slippages: Sequence[int] = (5,), fee_basis_points: int = 100,
+                   real_token_reserves: Optional[int] = None):
+    """
+    Quote many buy sizes and slippage levels against one curve state at once, exactly equal to quote_buy
+    Args:
+        virtual_sol_reserves: Curve virtual SOL reserves (lamports)
+        virtual_token_reserves: Curve virtual token reserves (raw units)
+        sol_amounts: Lamport budgets, fee included
+        slippages: Slippage percentages
+        fee_basis_points: Program fee
+        real_token_reserves: Tokens actually left on the curve, caps the amounts if given
+    Returns:
+        Tuple of (token_amounts[n], max_sol_costs[n, len(slippages)]) as int64 arrays
+    """
+    _require_numpy()
+    vsr = int(virtual_sol_reserves)
+    vtr = int(virtual_token_reserves)
+    sol_in = _int_array(sol_amounts) * FEE_DENOMINATOR // (FEE_DENOMINATOR + fee_basis_points)
+    positive = sol_in > 0
+    # 与 quote_buy 相同：预算不足时各项均为 0
+    sol_in = np.where(positive, sol_in, 0)
+    tokens = vtr - (vsr * vtr // (vsr + sol_in) + 1)
+    if real_token_reserves is not None:
+        tokens = np.minimum(tokens, int(real_token_reserves))
+    tokens = np.where(positive, np.maximum(tokens, 0), 0)
+    cost = np.where(tokens > 0, tokens * vsr // (vtr - tokens) + 1, 0)
+    total = cost + cost * fee_basis_points // FEE_DENOMINATOR
+    slip = _int_array(slippages)
+    max_costs = total[:, None] * (100 + slip)[None, :] // 100
+    return tokens.astype(np.int64), max_costs.astype(np.int64)
+
+
+def quote_sell_many(virtual_sol_reserves: int, virtual_token_reserves: int, token_amounts: Sequence[int],
+                    fee_basis_points: int = 100):
+    """
+    Net lamports for many sell sizes against one curve state, exactly equal to quote_sell
+    Returns:
+        int64 array of net lamports
+    """
+    _require_numpy()
+    vsr = int(virtual_sol_reserves)
+    vtr = int(virtual_token_reserves)
+    amounts = _int_array(token_amounts)
+    amounts = np.where(amounts > 0, amounts, 0)
+    gross = amounts * vsr // (vtr + amounts)
+    return (gross - gross * fee_basis_points // FEE_DENOMINATOR).astype(np.int64)
+
+
+def quote_sequential_buys(virtual_sol_reserves: int, virtual_token_reserves: int, sol_amounts: Sequence[int],
+                          fee_basis_points: int = 100):
+    """
+    Tokens each wallet receives when the buys land one after another on the same curve
+
+    Useful for sizing multi-wallet splits: later wallets pay a higher price. Every step rounds like
+    quote_buy and curve_after_buy, so the rounding depends on the landing order and the walk stays sequential.
+    Args:
+        virtual_sol_reserves: Curve virtual SOL reserves (lamports)
+        virtual_token_reserves: Curve virtual token reserves (raw units)
+        sol_amounts: Lamport budget of each wallet in landing order, fee included
+        fee_basis_points: Program fee
+    Returns:
+        int64 array of token amounts per wallet
+    """
+    _require_numpy()
+    vsr, vtr = int(virtual_sol_reserves), int(virtual_token_reserves)
+    tokens = []
+    for sol_amount in sol_amounts:
+        tokens.append(quote_buy(vsr, vtr, int(sol_amount), 0, fee_basis_points).token_amount)
+        vsr, vtr = curve_after_buy(vsr, vtr, int(sol_amount), fee_basis_points)
+    return np.array(tokens, dtype=np.int64)
@@ -0,0 +1,118 @@
+# utilities/buy_fanout.py
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Dict
+from solders.keypair import Keypair
+from solders.transaction import VersionedTransaction
+from .async_pump import AsyncPumpClient
+from .pump import CoinData, build_buy_transaction, global_account_cache, position_ledger
+from .pump_constants import LAMPORTS_PER_SOL
+from .bonding_curve import curve_after_buy
+from .latency_trace import SnipeTrace
+
+
+@dataclass
+class WalletBuyResult:
+    wallet: str
+    keypair: Keypair
+    success: bool
+    token_amount: int = 0
+    signature: Optional[str] = None
+    sent_at: Optional[float] = None
+    returned_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class FanoutResult:
+    results: List[WalletBuyResult] = field(default_factory=list)
+    prepare_ms: float = 0.0
+    send_spread_ms: float = 0.0
+    return_spread_ms: float = 0.0
+
+    @property
+    def successful(self) -> List[WalletBuyResult]:
+        return [r for r in self.results if r.success]
+
+    def summary(self) -> Dict:
+        return {
+            'wallets': len(self.results),
+            'successful': len(self.successful),
+            'prepare_ms': round(self.prepare_ms, 3),
+            'send_spread_ms': round(self.send_spread_ms, 3),
+            'return_spread_ms': round(self.return_spread_ms, 3)
+        }
+
+
+async def fan_out_buys(pump_client: AsyncPumpClient, coin_data: CoinData, keypairs: List[Keypair],
+                       sol_amount: float, slippage: int, gas_fee: float, max_parallel: int = 50,
+                       trace: Optional[SnipeTrace] = None) -> FanoutResult:
+    """
+    Sign every wallet's buy up front, then submit them all concurrently
+    Args:
+        pump_client: Client used for sending
+        coin_data: Bonding curve state shared by all buys
+        keypairs: Buyer keypairs
+        sol_amount: Amount of SOL each wallet spends
+        slippage: Slippage tolerance percentage
+        gas_fee: Compute unit price multiplier
+        max_parallel: Maximum number of in-flight sends
+        trace: Snipe trace, the first wallet's build is traced stage by stage, 'sign_others' covers the
+               remaining wallets and 'send' ends when every send has returned
+    Returns:
+        FanoutResult with per-wallet results and send time spread
+    """
+    result = FanoutResult()
+
+    # 先签名所有交易，发送阶段只剩网络请求
+    prepare_start = time.perf_counter()
+
+    # 每个钱包都按其它钱包先成交后的曲线报价，无论落地顺序如何都不会超过预算
+    lamports = int(sol_amount * LAMPORTS_PER_SOL)
+    others = lamports * (len(keypairs) - 1)
+    vsr, vtr = curve_after_buy(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, others,
+                               global_account_cache.get().fee_basis_points)
+    worst_case = replace(coin_data, virtual_sol_reserves=vsr, virtual_token_reserves=vtr)
+
+    prepared: List[tuple] = []
+    for keypair in keypairs:
+        wallet_result = WalletBuyResult(wallet=str(keypair.pubkey()), keypair=keypair, success=False)
+        result.results.append(wallet_result)
+        try:
+            tx, quote = build_buy_transaction(keypair, worst_case, sol_amount, slippage, gas_fee,
+                                              trace if not prepared else None)
+            wallet_result.token_amount = quote.token_amount
+            prepared.append((wallet_result, tx))
+        except Exception as e:
+            wallet_result.error = str(e)
+    result.prepare_ms = (time.perf_counter() - prepare_start) * 1000
+    if trace and len(prepared) > 1:
+        trace.mark('sign_others')
+
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def send(wallet_result: WalletBuyResult, tx: VersionedTransaction):
+        async with semaphore:
+            wallet_result.sent_at = time.perf_counter()
+            try:
+                wallet_result.signature = await pump_client.send_transaction(tx)
+                wallet_result.success = True
+                position_ledger.record_buy(wallet_result.wallet, str(coin_data.mint), wallet_result.token_amount,
+                                           wallet_result.signature)
+            except Exception as e:
+                wallet_result.error = str(e)
+            finally:
+                wallet_result.returned_at = time.perf_counter()
+
+    await asyncio.gather(*(send(wallet_result, tx) for wallet_result, tx in prepared))
+    if trace:
+        trace.mark('send')
+
+    sent = [r.sent_at for r in result.results if r.sent_at is not None]
+    returned = [r.returned_at for r in result.results if r.returned_at is not None]
+    if sent:
+        result.send_spread_ms = (max(sent) - min(sent)) * 1000
+    if returned:
+        result.return_spread_ms = (max(returned) - min(returned)) * 1000
+    return result
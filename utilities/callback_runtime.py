@@ -0,0 +1,151 @@
+# utilities/callback_runtime.py
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Awaitable
+
+_STOP = object()
+
+
+class _Worker:
+    def __init__(self, index: int, concurrency: int):
+        self.index = index
+        self.concurrency = concurrency
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.thread: Optional[threading.Thread] = None
+        self.ready = threading.Event()
+        # submitted 只在分发线程递增，started 只在工作线程递增，差值即队列深度
+        self.submitted = 0
+        self.started = 0
+        self.finished = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self.submitted - self.started
+
+    @property
+    def in_flight(self) -> int:
+        return self.started - self.finished
+
+
+class CallbackRuntime:
+    def __init__(self, workers: int = 2, concurrency: int = 16, max_queue: int = 1000):
+        """
+        Long-lived event loops that run monitor callbacks
+        Args:
+            workers: Worker threads, each running one event loop
+            concurrency: Callbacks running at once on each worker
+            max_queue: Callbacks waiting across all workers before new ones are rejected
+        """
+        self.workers_count = workers
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._workers: List[_Worker] = []
+        # stop() 之后保留的工作线程计数，直到下一次 start()
+        self._stopped_workers: List[_Worker] = []
+        self._lock = threading.Lock()
+
+        self.rejected = 0
+        self.dispatch_total = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers) and all(w.thread.is_alive() for w in self._workers)
+
+    def start(self):
+        """启动工作线程，已在运行时直接返回"""
+        with self._lock:
+            if self.is_running:
+                return
+            self._workers = [_Worker(i, self.concurrency) for i in range(self.workers_count)]
+            self._stopped_workers = []
+            self.rejected = 0
+            self.dispatch_total = 0.0
+            for worker in self._workers:
+                worker.thread = threading.Thread(target=self._run_worker, args=(worker,),
+                                                 name=f"callback-worker-{worker.index}", daemon=True)
+                worker.thread.start()
+            for worker in self._workers:
+                worker.ready.wait()
+
+    def stop(self):
+        """不再接收新回调，已排队和运行中的回调执行完后线程退出"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._stopped_workers = workers
+        for worker in workers:
+            for _ in range(worker.concurrency):
+                worker.loop.call_soon_threadsafe(worker.queue.put_nowait, _STOP)
+
+    def dispatch(self, callback: Callable[..., Awaitable], *args) -> bool:
+        """
+        Queue callback(*args) on the least loaded worker loop
+        Returns:
+            False if the queue is full and the callback was dropped
+        """
+        start = time.perf_counter()
+        if not self.is_running:
+            self.start()
+        workers = self._workers
+        worker = min(workers, key=lambda w: w.depth)
+        if sum(w.depth for w in workers) >= self.max_queue:
+            self.rejected += 1
+            print(f"Callback queue full, dropped {getattr(callback, '__name__', callback)}")
+            return False
+        worker.submitted += 1
+        worker.loop.call_soon_threadsafe(worker.queue.put_nowait, (callback, args, time.perf_counter()))
+        self.dispatch_total += time.perf_counter() - start
+        return True
+
+    def _run_worker(self, worker: _Worker):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        worker.loop = loop
+        worker.queue = asyncio.Queue()
+        consumers = [loop.create_task(self._consume(worker)) for _ in range(worker.concurrency)]
+        worker.ready.set()
+        try:
+            loop.run_until_complete(asyncio.gather(*consumers))
+        finally:
+            loop.close()
+
+    async def _consume(self, worker: _Worker):
+        while True:
+            item = await worker.queue.get()
+            if item is _STOP:
+                return
+            callback, args, enqueued_at = item
+            wait = time.perf_counter() - enqueued_at
+            worker.started += 1
+            worker.wait_total += wait
+            if wait > worker.wait_max:
+                worker.wait_max = wait
+            try:
+                await callback(*args)
+            except Exception as e:
+                worker.errors += 1
+                print(f"Callback error: {e}")
+            finally:
+                worker.finished += 1
+
+    def get_stats(self) -> Dict:
+        workers = list(self._workers or self._stopped_workers)
+        dispatched = sum(w.submitted for w in workers)
+        started = sum(w.started for w in workers)
+        return {
+            'running': self.is_running,
+            'workers': len(workers),
+            'queue_depth': sum(w.depth for w in workers),
+            'in_flight': sum(w.in_flight for w in workers),
+            'dispatched': dispatched,
+            'completed': sum(w.finished for w in workers),
+            'rejected': self.rejected,
+            'errors': sum(w.errors for w in workers),
+            'avg_wait_ms': round(sum(w.wait_total for w in workers) / started * 1000, 3) if started else None,
+            'max_wait_ms': round(max((w.wait_max for w in workers), default=0) * 1000, 3),
+            'avg_dispatch_us': round(self.dispatch_total / dispatched * 1e6, 3) if dispatched else None
+        }
@@ -0,0 +1,302 @@
+# utilities/config_service.py
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from .token_filter import FilterRules
+from .ingest_queue import POLICIES as INGEST_POLICIES
+
+
+class ConfigError(ValueError):
+    """Raised when a config document fails validation"""
+
+
+@dataclass(frozen=True)
+class SniperConfig:
+    max_sol_per_trade: float = 0.0001
+    gas_fee: float = 1.0
+    sell_delay: float = 0.0
+    sell_percentage: float = 100.0
+    mode: str = 'single'
+    max_parallel_buys: int = 50
+    backfill_max_age: float = 10.0
+    # 密钥对缓存空闲多少秒后清除，None 表示不清除
+    keyring_idle_timeout: Optional[float] = None
+    # 代币过滤规则（名称/符号正则、创建者名单、关注列表、URI 域名）
+    token_filter: FilterRules = FilterRules()
+    # 监控参数，None 表示沿用 MonitorManager 的默认值
+    ws_endpoints: Tuple[str, ...] = ()
+    ingest_queue_size: Optional[int] = None
+    ingest_policy: Optional[str] = None
+    decode_workers: int = 0
+    backfill_gaps: Optional[bool] = None
+    backfill_max_signatures: Optional[int] = None
+    backfill_concurrency: Optional[int] = None
+    heartbeat_interval: Optional[float] = None
+    heartbeat_timeout: Optional[float] = None
+    stale_min_seconds: Optional[float] = None
+    stale_max_seconds: Optional[float] = None
+    # RPC 连接池
+    rpc_max_connections: int = 100
+    rpc_max_keepalive: int = 20
+    rpc_timeout: float = 10.0
+    # 原始配置文档（只读），GET /api/config 原样返回
+    raw: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}), repr=False, compare=False)
+    version: int = field(default=0, compare=False)
+
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    raise TypeError(f"expected true/false, got {value!r}")
+
+
+def _endpoints(value) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)) or not all(isinstance(url, str) for url in value):
+        raise TypeError("expected a list of websocket URLs")
+    return tuple(url for url in value if url)
+
+
+def _choice(*allowed: str) -> Callable[[Any], str]:
+    def convert(value) -> str:
+        if value not in allowed:
+            raise ValueError(f"expected one of {', '.join(allowed)}, got {value!r}")
+        return value
+    return convert
+
+
+# 配置键 -> (字段, 类型转换)
+_FIELDS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    'maxSolPerTrade': ('max_sol_per_trade', float),
+    'gasFee': ('gas_fee', float),
+    'sellDelay': ('sell_delay', float),
+    'sellPercentage': ('sell_percentage', float),
+    'mode': ('mode', _choice('single', 'multi')),
+    'maxParallelBuys': ('max_parallel_buys', int),
+    'backfillMaxAge': ('backfill_max_age', float),
+    'keyringIdleTimeout': ('keyring_idle_timeout', float),
+    'tokenFilter': ('token_filter', FilterRules.from_dict),
+    'wsEndpoints': ('ws_endpoints', _endpoints),
+    'ingestQueueSize': ('ingest_queue_size', int),
+    'ingestPolicy': ('ingest_policy', _choice(*INGEST_POLICIES)),
+    'decodeWorkers': ('decode_workers', int),
+    'backfillGaps': ('backfill_gaps', _bool),
+    'backfillMaxSignatures': ('backfill_max_signatures', int),
+    'backfillConcurrency': ('backfill_concurrency', int),
+    'heartbeatInterval': ('heartbeat_interval', float),
+    'heartbeatTimeout': ('heartbeat_timeout', float),
+    'staleMinSeconds': ('stale_min_seconds', float),
+    'staleMaxSeconds': ('stale_max_seconds', float),
+    'rpcMaxConnections': ('rpc_max_connections', int),
+    'rpcMaxKeepalive': ('rpc_max_keepalive', int),
+    'rpcTimeout': ('rpc_timeout', float),
+}
+
+# 取值范围 (最小值, 最大值)，None 表示不限
+_RANGES = {
+    'maxSolPerTrade': (0.0, None),
+    'gasFee': (0.0, None),
+    'sellDelay': (0.0, None),
+    'sellPercentage': (0.0, 100.0),
+    'maxParallelBuys': (1, None),
+    'backfillMaxAge': (0.0, None),
+    'keyringIdleTimeout': (0.0, None),
+    'decodeWorkers': (0, None),
+    'rpcMaxConnections': (1, None),
+    'rpcMaxKeepalive': (0, None),
+    'rpcTimeout': (0.0, None),
+}
+
+
+def parse_config(data: Mapping[str, Any], version: int = 0) -> SniperConfig:
+    """
+    Validate a config document into an immutable snapshot
+    Args:
+        data: Parsed config.json content
+        version: Snapshot number
+    Returns:
+        SniperConfig
+    Raises:
+        ConfigError: If a key has the wrong type or is out of range
+    """
+    if not isinstance(data, Mapping):
+        raise ConfigError("config must be a JSON object")
+    values = {}
+    for key, (name, convert) in _FIELDS.items():
+        value = data.get(key)
+        if value is None or value == "":
+            continue
+        try:
+            values[name] = convert(value)
+        except (TypeError, ValueError) as e:
+            raise ConfigError(f"{key}: {e}") from None
+        # NaN 与任何值比较都为 False，会绕过下面的范围检查
+        if isinstance(values[name], float) and not math.isfinite(values[name]):
+            raise ConfigError(f"{key} must be a finite number, got {value!r}")
+    for key, (low, high) in _RANGES.items():
+        value = values.get(_FIELDS[key][0])
+        if value is None:
+            continue
+        if value < low or (high is not None and value > high):
+            raise ConfigError(f"{key} out of range: {value}")
+    if values.get('max_sol_per_trade') == 0:
+        raise ConfigError("maxSolPerTrade must be positive")
+    return SniperConfig(**values, raw=MappingProxyType(dict(data)), version=version)
+
+
+class ConfigService:
+    def __init__(self, path: str, poll_interval: float = 1.0):
+        """
+        Holds the current config snapshot; readers get it without any file I/O
+        Args:
+            path: config.json location
+            poll_interval: Seconds between file change checks in the watch thread
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[SniperConfig] = None
+        self._file_state = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._listeners: List[Callable[[SniperConfig], None]] = []
+
+        self.reloads = 0
+        self.updates = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+
+    def get(self) -> SniperConfig:
+        """Current snapshot, loads the file on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.reload()
+        return snapshot
+
+    def add_listener(self, callback: Callable[[SniperConfig], None]):
+        """
+        Call callback with every new snapshot, e.g. to rebuild state derived from the config
+        Args:
+            callback: Runs on the thread that swapped the snapshot
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _swap(self, data: Mapping[str, Any], file_state) -> SniperConfig:
+        # 快照不可变，整体替换引用即可，读取方不需要加锁
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        snapshot = parse_config(data, version)
+        self._snapshot = snapshot
+        self._file_state = file_state
+        self.loaded_at = time.time()
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Config listener error: {e}")
+        return snapshot
+
+    def reload(self) -> SniperConfig:
+        """
+        Re-read the file into a new snapshot; an invalid or missing file keeps the current snapshot
+        Returns:
+            The snapshot in effect afterwards
+        """
+        with self._lock:
+            file_state = self._stat()
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                snapshot = self._swap(data, file_state)
+                self.reloads += 1
+                return snapshot
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Error loading config {self.path}: {e}")
+                self._file_state = file_state
+                if self._snapshot is None:
+                    self._snapshot = SniperConfig()
+                return self._snapshot
+
+    def update(self, data: Mapping[str, Any]) -> SniperConfig:
+        """
+        Merge data into the current config document, validate the result, write it to the file and make it
+        the current snapshot
+        Args:
+            data: Keys to change, keys not present keep their current value (e.g. the web form only sends
+                  the trading fields, tokenFilter and wsEndpoints stay as they are)
+        Raises:
+            ConfigError: If data or the merged document is invalid, nothing is written
+        """
+        if not isinstance(data, Mapping):
+            raise ConfigError("config must be a JSON object")
+        self.get()
+        with self._lock:
+            # 以最新快照的原始文档为底，未提交的键保持不变
+            merged = dict(self._snapshot.raw)
+            merged.update(data)
+            parse_config(merged)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(merged, f, indent=2)
+            os.replace(tmp_path, self.path)
+            snapshot = self._swap(merged, self._stat())
+            self.updates += 1
+            return snapshot
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last load, returns True if it did"""
+        if self._stat() == self._file_state:
+            return False
+        self.reload()
+        return True
+
+    def start(self):
+        """启动文件监视线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.get()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Config watch error: {e}")
+
+    def get_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot is not None else None,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'updates': self.updates,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'watching': bool(self._thread and self._thread.is_alive())
+        }
+
+
+config_service = ConfigService(os.path.join('data', 'config.json'))
@@ -0,0 +1,387 @@
+# utilities/decode_pool.py
+"""
+Optional multi-process decode tier for consuming every Pump.fun event
+
+The monitor writes raw websocket frames into one shared-memory ring per decoder process. Decoders parse the JSON,
+decode create and trade events and write compact records into an output ring, so JSON parsing, event decoding
+and base58 conversion never take the trading process's GIL.
+"""
+import asyncio
+import json
+import marshal
+import multiprocessing as mp
+import struct
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .event_decoder import decode_create, decode_trade, b64_to_bytes
+from .log_filter import CREATE_EVENT_PREFIX, TRADE_EVENT_PREFIX, PAYLOAD_OFFSET
+
+# 环形缓冲区头部: 写位置、读位置(均为累计字节数)、消费者是否在等待唤醒
+_HEADER = struct.Struct('<QQQ')
+_HEADER_SIZE = 64
+_LENGTH = struct.Struct('<I')
+_WRAP = 0xFFFFFFFF
+# 输入记录头: 接收时间(纳秒) + 端点序号
+_FRAME_HEADER = struct.Struct('<qH')
+
+RECORD_CREATE = 'c'
+RECORD_TRADE = 't'
+
+# 每个解码进程的计数: decoded, errors, dropped, create_waits
+_COUNTERS = 4
+# 输出环满时创建事件重试写入的间隔
+_CREATE_RETRY_INTERVAL = 0.001
+
+_CREATE_MARKER = CREATE_EVENT_PREFIX[PAYLOAD_OFFSET:].encode()
+_TRADE_MARKER = TRADE_EVENT_PREFIX[PAYLOAD_OFFSET:].encode()
+
+
+class SharedRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Single-producer single-consumer ring of length-prefixed records in shared memory
+        Use SharedRing.create in the producer process and SharedRing.attach in the consumer.
+        """
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = shm.size - _HEADER_SIZE
+
+    @classmethod
+    def create(cls, capacity: int) -> "SharedRing":
+        shm = shared_memory.SharedMemory(create=True, size=capacity + _HEADER_SIZE)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0)
+        return cls(shm, True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedRing":
+        # 解码进程与创建方共用 resource_tracker，释放由创建方负责
+        return cls(shared_memory.SharedMemory(name=name), False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _positions(self) -> Tuple[int, int, int]:
+        return _HEADER.unpack_from(self.buf, 0)
+
+    def __len__(self) -> int:
+        head, tail, _ = self._positions()
+        return head - tail
+
+    @property
+    def waiting(self) -> bool:
+        return bool(struct.unpack_from('<Q', self.buf, 16)[0])
+
+    def set_waiting(self, waiting: bool):
+        struct.pack_into('<Q', self.buf, 16, int(waiting))
+
+    def write(self, data: bytes, prefix: bytes = b"") -> bool:
+        """
+        Append one record (prefix + data) from the producer side
+        Returns:
+            False if the ring is full
+        """
+        size = len(prefix) + len(data)
+        head, tail, _ = self._positions()
+        phys = head % self.capacity
+        padding = 0
+        if self.capacity - phys < _LENGTH.size + size:
+            # 末尾放不下，写入回绕标记后从头开始
+            padding = self.capacity - phys
+        if self.capacity - (head - tail) < padding + _LENGTH.size + size:
+            return False
+        if padding:
+            if padding >= _LENGTH.size:
+                _LENGTH.pack_into(self.buf, _HEADER_SIZE + phys, _WRAP)
+            head += padding
+            phys = 0
+        start = _HEADER_SIZE + phys + _LENGTH.size
+        _LENGTH.pack_into(self.buf, start - _LENGTH.size, size)
+        self.buf[start:start + len(prefix)] = prefix
+        self.buf[start + len(prefix):start + size] = data
+        # 数据写完后再发布写位置
+        struct.pack_into('<Q', self.buf, 0, head + _LENGTH.size + size)
+        return True
+
+    def read_all(self) -> Iterator[bytes]:
+        """Yield every available record from the consumer side, releasing space as it goes"""
+        head, tail, _ = self._positions()
+        while tail < head:
+            phys = tail % self.capacity
+            remaining = self.capacity - phys
+            if remaining < _LENGTH.size:
+                tail += remaining
+                continue
+            size, = _LENGTH.unpack_from(self.buf, _HEADER_SIZE + phys)
+            if size == _WRAP:
+                tail += remaining
+                continue
+            if remaining < _LENGTH.size + size:
+                # 生产者因末尾不足 4 字节而直接回绕
+                tail += remaining
+                continue
+            start = _HEADER_SIZE + phys + _LENGTH.size
+            record = bytes(self.buf[start:start + size])
+            tail += _LENGTH.size + size
+            struct.pack_into('<Q', self.buf, 8, tail)
+            yield record
+        struct.pack_into('<Q', self.buf, 8, tail)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def decode_frame(frame: bytes) -> List[tuple]:
+    """
+    Decode create and trade events in one raw logsNotification frame
+    Returns:
+        List of record tuples, empty for frames without Pump.fun events or failed transactions
+    """
+    # 不含创建或交易事件的帧不做 JSON 解析
+    if _CREATE_MARKER not in frame and _TRADE_MARKER not in frame:
+        return []
+    params = json.loads(frame).get('params')
+    if not params:
+        return []
+    result = params['result']
+    value = result['value']
+    if value.get('err') is not None:
+        return []
+    signature = value['signature']
+    slot = result['context']['slot']
+
+    records = []
+    creates = {}  # mint -> 创建记录的位置
+    last_trades = {}  # mint -> 本交易中最后一笔成交
+    for line in value['logs']:
+        if line.startswith(CREATE_EVENT_PREFIX):
+            buf = b64_to_bytes(line[PAYLOAD_OFFSET:])
+            event = decode_create(buf) if buf else None
+            if event is not None:
+                creates[event.mint] = len(records)
+                records.append((RECORD_CREATE, signature, slot, event.name, event.symbol, event.uri, event.mint,
+                                event.bonding_curve, event.user))
+        elif line.startswith(TRADE_EVENT_PREFIX):
+            buf = b64_to_bytes(line[PAYLOAD_OFFSET:])
+            event = decode_trade(buf) if buf else None
+            if event is not None:
+                last_trades[event.mint] = event
+                records.append((RECORD_TRADE, signature, slot, event.mint, event.is_buy, event.sol_amount,
+                                event.token_amount, event.virtual_sol_reserves, event.virtual_token_reserves,
+                                event.real_token_reserves, event.timestamp))
+    # 创建交易里开发者的首笔买入已经改变了曲线，创建记录带上成交后的储备，没有买入时为 None
+    for mint, position in creates.items():
+        trade = last_trades.get(mint)
+        records[position] += (trade.virtual_sol_reserves, trade.virtual_token_reserves,
+                              trade.real_token_reserves) if trade is not None else (None, None, None)
+    return records
+
+
+def _write_create(out_ring: SharedRing, data: bytes, wakeup_out, stop_event) -> bool:
+    """
+    Write a create record, waiting for the trading process to free space instead of dropping it
+    Returns:
+        False only if the pool is stopping or the record can never fit in the ring
+    """
+    while not out_ring.write(data):
+        if stop_event.is_set() or _LENGTH.size + len(data) > out_ring.capacity:
+            return False
+        # 唤醒交易进程读取输出环，腾出空间后重试
+        wakeup_out.send_bytes(b'\x01')
+        stop_event.wait(_CREATE_RETRY_INTERVAL)
+    return True
+
+
+def _decoder_main(index: int, in_name: str, out_name: str, wakeup_in, wakeup_out, stop_event, counters):
+    """Decoder process loop"""
+    in_ring = SharedRing.attach(in_name)
+    out_ring = SharedRing.attach(out_name)
+    decoded = errors = dropped = create_waits = 0
+    try:
+        while not stop_event.is_set():
+            wrote = False
+            for frame in in_ring.read_all():
+                received_ns, endpoint_index = _FRAME_HEADER.unpack_from(frame)
+                try:
+                    records = decode_frame(frame[_FRAME_HEADER.size:])
+                except Exception:
+                    errors += 1
+                    continue
+                for record in records:
+                    decoded += 1
+                    data = marshal.dumps(record + (received_ns, endpoint_index))
+                    if record[0] == RECORD_CREATE:
+                        # 输出环满时只丢交易事件，创建事件等待空间（反压到输入环）
+                        if not out_ring.write(data):
+                            create_waits += 1
+                            if not _write_create(out_ring, data, wakeup_out, stop_event):
+                                dropped += 1
+                                continue
+                        # 创建事件立即唤醒交易进程，不等本批处理完
+                        wakeup_out.send_bytes(b'\x01')
+                    elif out_ring.write(data):
+                        wrote = True
+                    else:
+                        dropped += 1
+            counters[index * _COUNTERS:(index + 1) * _COUNTERS] = [decoded, errors, dropped, create_waits]
+            if wrote:
+                wakeup_out.send_bytes(b'\x01')
+
+            # 先标记等待再检查一次，避免漏掉唤醒
+            in_ring.set_waiting(True)
+            if len(in_ring) == 0:
+                if wakeup_in.poll(0.05):
+                    while wakeup_in.poll():
+                        wakeup_in.recv_bytes()
+            in_ring.set_waiting(False)
+    except (KeyboardInterrupt, EOFError, OSError):
+        pass
+    finally:
+        in_ring.close()
+        out_ring.close()
+
+
+class DecodePool:
+    def __init__(self, workers: int = 2, ring_size: int = 16 * 1024 * 1024, result_ring_size: int = 4 * 1024 * 1024):
+        """
+        Decoder processes fed through shared-memory rings
+        Args:
+            workers: Decoder processes
+            ring_size: Bytes of raw frames buffered per decoder
+            result_ring_size: Bytes of decoded records buffered per decoder
+        """
+        self.workers = workers
+        self.ring_size = ring_size
+        self.result_ring_size = result_ring_size
+        # fork 的子进程只运行 _decoder_main；spawn 会在子进程中重新导入 app.py
+        self._ctx = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else 'spawn')
+        self._processes = []
+        self._in_rings: List[SharedRing] = []
+        self._out_rings: List[SharedRing] = []
+        self._wakeups_in = []
+        self._wakeups_out = []
+        self._stop_event = None
+        self._counters = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handler: Optional[Callable[[tuple], None]] = None
+        self._next = 0
+
+        self.submitted = 0
+        self.dropped = 0
+        self.records = 0
+        self.creates = 0
+        self.trades = 0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self, loop: asyncio.AbstractEventLoop, handler: Callable[[tuple], None]):
+        """
+        Start decoder processes; handler receives each decoded record on loop
+        Args:
+            loop: Event loop the records are delivered on
+            handler: Called with each record tuple, see decode_frame for the layouts
+        """
+        if self.is_running:
+            return
+        self._loop = loop
+        self._handler = handler
+        self._stop_event = self._ctx.Event()
+        self._counters = self._ctx.Array('q', _COUNTERS * self.workers, lock=False)
+        for index in range(self.workers):
+            in_ring = SharedRing.create(self.ring_size)
+            out_ring = SharedRing.create(self.result_ring_size)
+            in_reader, in_writer = self._ctx.Pipe(duplex=False)
+            out_reader, out_writer = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(
+                target=_decoder_main,
+                args=(index, in_ring.name, out_ring.name, in_reader, out_writer, self._stop_event, self._counters),
+                name=f"pump-decoder-{index}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+            self._in_rings.append(in_ring)
+            self._out_rings.append(out_ring)
+            self._wakeups_in.append(in_writer)
+            self._wakeups_out.append(out_reader)
+            loop.add_reader(out_reader.fileno(), self._drain, index)
+
+    def submit(self, frame: str, received_ns: int, endpoint_index: int = 0) -> bool:
+        """
+        Hand one raw frame to the next decoder
+        Returns:
+            False if every decoder ring is full and the frame was dropped
+        """
+        prefix = _FRAME_HEADER.pack(received_ns, endpoint_index)
+        data = frame.encode() if isinstance(frame, str) else frame
+        for _ in range(self.workers):
+            index = self._next
+            self._next = (index + 1) % self.workers
+            ring = self._in_rings[index]
+            if ring.write(data, prefix):
+                self.submitted += 1
+                if ring.waiting:
+                    self._wakeups_in[index].send_bytes(b'\x01')
+                return True
+        self.dropped += 1
+        return False
+
+    def _drain(self, index: int):
+        wakeup = self._wakeups_out[index]
+        while wakeup.poll():
+            wakeup.recv_bytes()
+        for data in self._out_rings[index].read_all():
+            record = marshal.loads(data)
+            self.records += 1
+            if record[0] == RECORD_CREATE:
+                self.creates += 1
+            else:
+                self.trades += 1
+            try:
+                self._handler(record)
+            except Exception as e:
+                print(f"Error handling decoded record: {e}")
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        for index, wakeup in enumerate(self._wakeups_out):
+            try:
+                self._loop.remove_reader(wakeup.fileno())
+            except Exception:
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._in_rings + self._out_rings:
+            ring.close()
+        for conn in self._wakeups_in + self._wakeups_out:
+            conn.close()
+        self._processes, self._in_rings, self._out_rings = [], [], []
+        self._wakeups_in, self._wakeups_out = [], []
+
+    def get_stats(self) -> Dict:
+        counters = list(self._counters) if self._counters is not None else []
+        return {
+            'running': self.is_running,
+            'workers': self.workers,
+            'submitted': self.submitted,
+            'dropped_frames': self.dropped,
+            'ring_bytes_used': [len(ring) for ring in self._in_rings],
+            'decoded': sum(counters[0::_COUNTERS]),
+            'decode_errors': sum(counters[1::_COUNTERS]),
+            'dropped_records': sum(counters[2::_COUNTERS]),
+            'create_waits': sum(counters[3::_COUNTERS]),
+            'records': self.records,
+            'creates': self.creates,
+            'trades': self.trades
+        }
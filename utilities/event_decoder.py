@@ -0,0 +1,179 @@
+# utilities/event_decoder.py
+import binascii
+import struct
+from typing import Optional, Union
+from solders.pubkey import Pubkey
+
+CREATE_EVENT_DISCRIMINATOR = bytes.fromhex("1b72a94ddeeb6376")
+TRADE_EVENT_DISCRIMINATOR = bytes.fromhex("bddb7fd34ee661ee")
+COMPLETE_EVENT_DISCRIMINATOR = bytes.fromhex("5f72619cd42e9808")
+
+_U32 = struct.Struct('<I')
+# mint(跳过) sol_amount token_amount is_buy user(跳过) timestamp virtual_sol virtual_token
+_TRADE = struct.Struct('<32xQQ?32xqQQ')
+_TRADE_REAL = struct.Struct('<QQ')
+# user mint bonding_curve(均跳过) timestamp
+_COMPLETE = struct.Struct('<96xq')
+_PUBKEY_LEN = 32
+_MAX_STRING_LEN = 10_000
+
+
+class _LazyPubkey:
+    """Pubkey field stored as an offset into the event buffer, converted to base58 on first access"""
+
+    def __set_name__(self, owner, name):
+        self.offset_slot = f"_{name}"
+        self.cache_slot = f"_{name}_str"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.cache_slot)
+        if value is None:
+            offset = getattr(instance, self.offset_slot)
+            value = str(Pubkey.from_bytes(instance._buf[offset:offset + _PUBKEY_LEN]))
+            setattr(instance, self.cache_slot, value)
+        return value
+
+
+class CreateEvent:
+    __slots__ = ('_buf', 'name', 'symbol', 'uri', '_mint', '_mint_str', '_bonding_curve', '_bonding_curve_str',
+                 '_user', '_user_str')
+    mint = _LazyPubkey()
+    bonding_curve = _LazyPubkey()
+    user = _LazyPubkey()
+
+    def __init__(self, buf: bytes, name: str, symbol: str, uri: str, offset: int):
+        self._buf = buf
+        self.name = name
+        self.symbol = symbol
+        self.uri = uri
+        self._mint = offset
+        self._bonding_curve = offset + _PUBKEY_LEN
+        self._user = offset + 2 * _PUBKEY_LEN
+        self._mint_str = self._bonding_curve_str = self._user_str = None
+
+    def __repr__(self):
+        return f"CreateEvent(name={self.name!r}, symbol={self.symbol!r}, mint={self.mint})"
+
+
+class TradeEvent:
+    __slots__ = ('_buf', 'sol_amount', 'token_amount', 'is_buy', 'timestamp', 'virtual_sol_reserves',
+                 'virtual_token_reserves', 'real_sol_reserves', 'real_token_reserves', '_mint', '_mint_str',
+                 '_user', '_user_str')
+    mint = _LazyPubkey()
+    user = _LazyPubkey()
+
+    def __init__(self, buf: bytes, sol_amount: int, token_amount: int, is_buy: bool, timestamp: int,
+                 virtual_sol_reserves: int, virtual_token_reserves: int,
+                 real_sol_reserves: Optional[int] = None, real_token_reserves: Optional[int] = None):
+        self._buf = buf
+        self.sol_amount = sol_amount
+        self.token_amount = token_amount
+        self.is_buy = is_buy
+        self.timestamp = timestamp
+        self.virtual_sol_reserves = virtual_sol_reserves
+        self.virtual_token_reserves = virtual_token_reserves
+        self.real_sol_reserves = real_sol_reserves
+        self.real_token_reserves = real_token_reserves
+        self._mint = 8
+        self._user = 8 + _PUBKEY_LEN + 17
+        self._mint_str = self._user_str = None
+
+    def __repr__(self):
+        side = "buy" if self.is_buy else "sell"
+        return f"TradeEvent({side}, mint={self.mint}, sol={self.sol_amount}, tokens={self.token_amount})"
+
+
+class CompleteEvent:
+    __slots__ = ('_buf', 'timestamp', '_user', '_user_str', '_mint', '_mint_str', '_bonding_curve',
+                 '_bonding_curve_str')
+    user = _LazyPubkey()
+    mint = _LazyPubkey()
+    bonding_curve = _LazyPubkey()
+
+    def __init__(self, buf: bytes, timestamp: int):
+        self._buf = buf
+        self.timestamp = timestamp
+        self._user = 8
+        self._mint = 8 + _PUBKEY_LEN
+        self._bonding_curve = 8 + 2 * _PUBKEY_LEN
+        self._user_str = self._mint_str = self._bonding_curve_str = None
+
+    def __repr__(self):
+        return f"CompleteEvent(mint={self.mint})"
+
+
+PumpEvent = Union[CreateEvent, TradeEvent, CompleteEvent]
+
+
+def _read_string(buf: bytes, view: memoryview, offset: int):
+    length, = _U32.unpack_from(buf, offset)
+    offset += 4
+    end = offset + length
+    if length > _MAX_STRING_LEN or end > len(buf):
+        raise ValueError("string out of bounds")
+    return str(view[offset:end], 'utf-8'), end
+
+
+def decode_create(buf: bytes) -> Optional[CreateEvent]:
+    """
+    Decode a CreateEvent from raw event bytes (discriminator included)
+    Returns:
+        CreateEvent, None if the buffer is not a well-formed create event
+    """
+    if buf[:8] != CREATE_EVENT_DISCRIMINATOR:
+        return None
+    try:
+        view = memoryview(buf)
+        name, offset = _read_string(buf, view, 8)
+        symbol, offset = _read_string(buf, view, offset)
+        uri, offset = _read_string(buf, view, offset)
+    except (ValueError, struct.error, UnicodeDecodeError):
+        return None
+    if offset + 3 * _PUBKEY_LEN > len(buf) or not name or not symbol:
+        return None
+    return CreateEvent(buf, name, symbol, uri, offset)
+
+
+def decode_trade(buf: bytes) -> Optional[TradeEvent]:
+    """Decode a TradeEvent, real reserves are filled in when the program version emits them"""
+    if buf[:8] != TRADE_EVENT_DISCRIMINATOR or len(buf) < 8 + _TRADE.size:
+        return None
+    event = TradeEvent(buf, *_TRADE.unpack_from(buf, 8))
+    if len(buf) >= 8 + _TRADE.size + _TRADE_REAL.size:
+        event.real_sol_reserves, event.real_token_reserves = _TRADE_REAL.unpack_from(buf, 8 + _TRADE.size)
+    return event
+
+
+def decode_complete(buf: bytes) -> Optional[CompleteEvent]:
+    if buf[:8] != COMPLETE_EVENT_DISCRIMINATOR or len(buf) < 8 + _COMPLETE.size:
+        return None
+    return CompleteEvent(buf, *_COMPLETE.unpack_from(buf, 8))
+
+
+_DECODERS = {
+    CREATE_EVENT_DISCRIMINATOR: decode_create,
+    TRADE_EVENT_DISCRIMINATOR: decode_trade,
+    COMPLETE_EVENT_DISCRIMINATOR: decode_complete,
+}
+
+
+def b64_to_bytes(payload: str) -> Optional[bytes]:
+    try:
+        return binascii.a2b_base64(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def decode_event(payload: Union[str, bytes]) -> Optional[PumpEvent]:
+    """
+    Decode any Pump.fun event from a 'Program data:' base64 payload or raw bytes
+    Returns:
+        CreateEvent, TradeEvent or CompleteEvent, None for unknown or malformed data
+    """
+    buf = b64_to_bytes(payload) if isinstance(payload, str) else payload
+    if buf is None:
+        return None
+    decoder = _DECODERS.get(buf[:8])
+    return decoder(buf) if decoder else None
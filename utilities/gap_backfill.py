@@ -0,0 +1,162 @@
+# utilities/gap_backfill.py
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from solana.rpc.commitment import Confirmed
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from .log_filter import CREATE_EVENT_PREFIX, PAYLOAD_OFFSET
+from .retry import retry_scheduler, RetryPolicy, RetryableError, RetryError
+
+# getSignaturesForAddress 单页上限
+_PAGE_LIMIT = 1000
+# 刚确认的交易 getTransaction 可能暂时查不到
+BACKFILL_SIGNATURES_POLICY = RetryPolicy(deadline=5.0, base_delay=0.2, max_delay=1.0, max_attempts=5)
+BACKFILL_TX_POLICY = RetryPolicy(deadline=5.0, base_delay=0.3, max_delay=1.0, max_attempts=6)
+# 补回使用独立的重试预算，重连后成批的 getTransaction 重试不会耗尽卖出等调用的预算
+BACKFILL_BUDGET = "backfill"
+
+
+class GapBackfiller:
+    def __init__(self, program_id: str, max_signatures: int = 1000, concurrency: int = 16, delay: float = 1.0):
+        """
+        Recover create events broadcast while a log subscription was down
+        Args:
+            program_id: Program whose signature history is scanned
+            max_signatures: Most signatures scanned per gap, newest first
+            concurrency: getTransaction requests in flight
+            delay: Seconds to wait before listing signatures, lets the end of the gap reach confirmed commitment
+        """
+        self.program = Pubkey.from_string(program_id)
+        self.max_signatures = max_signatures
+        self.concurrency = concurrency
+        self.delay = delay
+
+        self.runs = 0
+        self.signatures = 0
+        self.skipped = 0
+        self.failed = 0
+        self.fetched = 0
+        self.missing = 0
+        self.creates = 0
+        self.errors = 0
+        self.truncated = 0
+        self.last_gap: Optional[int] = None
+        self.last_duration_ms: Optional[float] = None
+
+    async def list_signatures(self, client, until: Signature, endpoint: str = BACKFILL_BUDGET) -> List:
+        """Signature infos newer than until, newest first, retries are charged to endpoint's budget"""
+        infos = []
+        before = None
+        while len(infos) < self.max_signatures:
+            limit = min(_PAGE_LIMIT, self.max_signatures - len(infos))
+            page = (await retry_scheduler.call_async(
+                "backfill_signatures", client.get_signatures_for_address, self.program,
+                before=before, until=until, limit=limit, commitment=Confirmed,
+                policy=BACKFILL_SIGNATURES_POLICY, endpoint=endpoint
+            )).value
+            infos.extend(page)
+            if len(page) < limit:
+                return infos
+            before = page[-1].signature
+        self.truncated += 1
+        return infos
+
+    async def fetch_create(self, client, signature: Signature, endpoint: str = BACKFILL_BUDGET) -> Optional[tuple]:
+        """
+        Create event payload of one transaction, retries are charged to endpoint's budget
+        Returns:
+            (payload, slot, block_time), None if the transaction has no create event
+        """
+        async def fetch():
+            resp = await client.get_transaction(signature, encoding="json", commitment=Confirmed,
+                                                max_supported_transaction_version=0)
+            if resp.value is None:
+                raise RetryableError("transaction not available yet")
+            return resp.value
+
+        try:
+            tx = await retry_scheduler.call_async("backfill_transaction", fetch, policy=BACKFILL_TX_POLICY,
+                                                  endpoint=endpoint)
+        except RetryError:
+            self.missing += 1
+            return None
+        self.fetched += 1
+        meta = tx.transaction.meta
+        if meta is None:
+            return None
+        for line in meta.log_messages or []:
+            if line.startswith(CREATE_EVENT_PREFIX):
+                return line[PAYLOAD_OFFSET:], tx.slot, tx.block_time
+        return None
+
+    async def run(self, client, until: str, seen: Callable[[Signature], bool],
+                  handler: Callable[[Signature, str, int, Optional[int]], None],
+                  endpoint: str = BACKFILL_BUDGET) -> int:
+        """
+        Scan the program's signatures newer than until and hand every missed create to handler
+        Args:
+            client: AsyncClient used for the RPC calls
+            until: Last signature processed before the gap
+            seen: Returns True for signatures already processed from the live stream
+            handler: Called as handler(signature, payload, slot, block_time) as soon as each create is parsed
+            endpoint: Retry budget charged for the burst of requests, the backfill's own budget by default
+        Returns:
+            Number of creates recovered
+        """
+        self.runs += 1
+        started = time.perf_counter()
+        await asyncio.sleep(self.delay)
+        creates = 0
+        try:
+            infos = await self.list_signatures(client, Signature.from_string(until), endpoint)
+            self.signatures += len(infos)
+            self.last_gap = len(infos)
+
+            pending = []
+            for info in infos:
+                if info.err is not None:
+                    self.failed += 1
+                elif seen(info.signature):
+                    self.skipped += 1
+                else:
+                    pending.append(info.signature)
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def recover(signature: Signature):
+                nonlocal creates
+                # 单个交易出错只影响它自己，其余交易继续补回
+                try:
+                    async with semaphore:
+                        found = await self.fetch_create(client, signature, endpoint)
+                    if found is not None:
+                        handler(signature, *found)
+                        creates += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Gap backfill error for {signature}: {e}")
+
+            # 从最新的交易开始，越新的代币越值得处理
+            await asyncio.gather(*(recover(signature) for signature in pending))
+        except Exception as e:
+            self.errors += 1
+            print(f"Gap backfill error: {e}")
+        self.creates += creates
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        return creates
+
+    def get_stats(self) -> Dict:
+        return {
+            'runs': self.runs,
+            'signatures': self.signatures,
+            'skipped_seen': self.skipped,
+            'skipped_failed': self.failed,
+            'fetched': self.fetched,
+            'missing': self.missing,
+            'creates': self.creates,
+            'errors': self.errors,
+            'truncated': self.truncated,
+            'last_gap': self.last_gap,
+            'last_duration_ms': round(self.last_duration_ms, 3) if self.last_duration_ms is not None else None
+        }
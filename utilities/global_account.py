@@ -0,0 +1,102 @@
+# utilities/global_account.py
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from solana.rpc.api import Client
+from solders.pubkey import Pubkey
+from .pump_constants import GLOBAL, FEE_RECIPIENT
+
+# discriminator(8) + initialized(1) + authority(32) + fee_recipient(32) + 5 * u64
+_GLOBAL_LAYOUT = struct.Struct("<8s?32s32sQQQQQ")
+
+
+@dataclass(frozen=True)
+class GlobalAccount:
+    fee_recipient: Pubkey
+    initial_virtual_token_reserves: int
+    initial_virtual_sol_reserves: int
+    initial_real_token_reserves: int
+    token_total_supply: int
+    fee_basis_points: int
+
+
+# Pump.fun 当前的初始参数，在 Global 账户读取成功前使用
+DEFAULT_GLOBAL_ACCOUNT = GlobalAccount(
+    fee_recipient=FEE_RECIPIENT,
+    initial_virtual_token_reserves=1_073_000_000_000_000,
+    initial_virtual_sol_reserves=30_000_000_000,
+    initial_real_token_reserves=793_100_000_000_000,
+    token_total_supply=1_000_000_000_000_000,
+    fee_basis_points=100
+)
+
+
+def parse_global_account(data: bytes) -> GlobalAccount:
+    """
+    Parse the Pump.fun Global account
+    Args:
+        data: Raw account data
+    Returns:
+        GlobalAccount
+    """
+    (_, _, _, fee_recipient, initial_virtual_token_reserves, initial_virtual_sol_reserves,
+     initial_real_token_reserves, token_total_supply, fee_basis_points) = _GLOBAL_LAYOUT.unpack_from(data)
+    return GlobalAccount(
+        fee_recipient=Pubkey.from_bytes(fee_recipient),
+        initial_virtual_token_reserves=initial_virtual_token_reserves,
+        initial_virtual_sol_reserves=initial_virtual_sol_reserves,
+        initial_real_token_reserves=initial_real_token_reserves,
+        token_total_supply=token_total_supply,
+        fee_basis_points=fee_basis_points
+    )
+
+
+class GlobalAccountCache:
+    def __init__(self, client: Client, refresh_interval: float = 300.0):
+        """
+        In-memory copy of the Pump.fun Global account
+        Args:
+            client: RPC client used for loading
+            refresh_interval: Seconds between background reloads
+        """
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self._account: Optional[GlobalAccount] = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def load(self) -> Optional[GlobalAccount]:
+        """从链上读取 Global 账户"""
+        try:
+            account_info = self.client.get_account_info(GLOBAL)
+            if not account_info.value:
+                return None
+            self._account = parse_global_account(account_info.value.data)
+            return self._account
+        except Exception as e:
+            print(f"Error loading global account: {e}")
+            return None
+
+    def get(self) -> GlobalAccount:
+        """Cached Global account, or the known defaults if it was never loaded"""
+        return self._account or DEFAULT_GLOBAL_ACCOUNT
+
+    def is_loaded(self) -> bool:
+        return self._account is not None
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="global-account-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.load()
+            self._stop_event.wait(self.refresh_interval)
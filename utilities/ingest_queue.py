@@ -0,0 +1,109 @@
+# utilities/ingest_queue.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict
+
+DROP_NON_CREATE = "drop_non_create"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+POLICIES = (DROP_NON_CREATE, DROP_OLDEST, BLOCK)
+
+
+class IngestQueue:
+    def __init__(self, maxsize: int = 10_000, policy: str = DROP_NON_CREATE):
+        """
+        Bounded queue between websocket readers and the notification handler, used from one event loop
+        Args:
+            maxsize: Notifications held before the overload policy applies
+            policy: drop_non_create keeps creates ahead of everything else and sheds other events first,
+                    drop_oldest discards the oldest notification, block makes readers wait for space
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown ingest policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._creates = deque()
+        self._others = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped_non_create = 0
+        self.dropped_create = 0
+        self.blocked = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._creates) + len(self._others)
+
+    def _drop_oldest(self):
+        # 优先丢弃非创建事件
+        if self._others:
+            self._others.popleft()
+            self.dropped_non_create += 1
+        else:
+            self._creates.popleft()
+            self.dropped_create += 1
+
+    async def put(self, item: Any, is_create: bool = False) -> bool:
+        """
+        Add a notification
+        Returns:
+            False if the notification itself was dropped
+        """
+        if len(self) >= self.maxsize:
+            if self.policy == BLOCK:
+                self.blocked += 1
+                while len(self) >= self.maxsize:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+            elif self.policy == DROP_NON_CREATE and not is_create:
+                self.dropped_non_create += 1
+                return False
+            else:
+                self._drop_oldest()
+
+        # 只有 drop_non_create 策略下创建事件才插队，其余策略保持到达顺序
+        if is_create and self.policy == DROP_NON_CREATE:
+            self._creates.append((time.perf_counter(), item))
+        else:
+            self._others.append((time.perf_counter(), item))
+        self.enqueued += 1
+        depth = len(self)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> Any:
+        while not (self._creates or self._others):
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        enqueued_at, item = self._creates.popleft() if self._creates else self._others.popleft()
+        latency = time.perf_counter() - enqueued_at
+        self.dequeued += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self._not_full.set()
+        return item
+
+    def get_stats(self) -> Dict:
+        return {
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'depth': len(self),
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'dequeued': self.dequeued,
+            'dropped_non_create': self.dropped_non_create,
+            'dropped_create': self.dropped_create,
+            'blocked': self.blocked,
+            'avg_latency_ms': round(self.latency_total / self.dequeued * 1000, 3) if self.dequeued else None,
+            'max_latency_ms': round(self.latency_max * 1000, 3)
+        }
@@ -0,0 +1,189 @@
+# utilities/instruction_templates.py
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional
+from solders.pubkey import Pubkey
+from solders.instruction import Instruction, AccountMeta
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from spl.token.instructions import get_associated_token_address, create_associated_token_account
+from .pump_constants import (
+    GLOBAL, FEE_RECIPIENT, SYSTEM_PROGRAM, TOKEN_PROGRAM, PUMP_FUN_PROGRAM, RENT, EVENT_AUTHORITY,
+    ASSOC_TOKEN_ACC_PROG, BUY_DISCRIMINATOR, SELL_DISCRIMINATOR, UNIT_BUDGET, UNIT_PRICE
+)
+
+_AMOUNTS = struct.Struct("<QQ")
+
+# 所有交易共用的账户
+_GLOBAL_META = AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False)
+_FEE_RECIPIENT_META = AccountMeta(pubkey=FEE_RECIPIENT, is_signer=False, is_writable=True)
+_SYSTEM_PROGRAM_META = AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False)
+_TOKEN_PROGRAM_META = AccountMeta(pubkey=TOKEN_PROGRAM, is_signer=False, is_writable=False)
+_RENT_META = AccountMeta(pubkey=RENT, is_signer=False, is_writable=False)
+_ASSOC_TOKEN_ACC_PROG_META = AccountMeta(pubkey=ASSOC_TOKEN_ACC_PROG, is_signer=False, is_writable=False)
+_EVENT_AUTHORITY_META = AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False)
+_PUMP_FUN_PROGRAM_META = AccountMeta(pubkey=PUMP_FUN_PROGRAM, is_signer=False, is_writable=False)
+
+
+@lru_cache(maxsize=4096)
+def derive_bonding_curve(mint: Pubkey) -> Tuple[Pubkey, Pubkey]:
+    """
+    Derive the bonding curve PDA and its associated token account for a mint
+    Args:
+        mint: Token mint
+    Returns:
+        Tuple of (bonding_curve, associated_bonding_curve)
+    """
+    bonding_curve, _ = Pubkey.find_program_address(
+        ["bonding-curve".encode(), bytes(mint)],
+        PUMP_FUN_PROGRAM
+    )
+    return bonding_curve, get_associated_token_address(bonding_curve, mint)
+
+
+@lru_cache(maxsize=64)
+def compute_budget_instructions(gas_fee: float) -> Tuple[Instruction, Instruction]:
+    """Compute budget instructions for a given gasFee multiplier"""
+    return (
+        set_compute_unit_limit(UNIT_BUDGET),
+        set_compute_unit_price(int(UNIT_PRICE * gas_fee))
+    )
+
+
+@dataclass
+class TradeTemplate:
+    wallet: Pubkey
+    mint: Pubkey
+    bonding_curve: Pubkey
+    associated_bonding_curve: Pubkey
+    user_ata: Pubkey
+    buy_keys: List[AccountMeta]
+    sell_keys: List[AccountMeta]
+    create_ata_ix: Instruction
+
+    def buy_instruction(self, token_amount: int, max_sol_cost: int) -> Instruction:
+        """Buy instruction with only the amount fields filled in"""
+        return Instruction(PUMP_FUN_PROGRAM, BUY_DISCRIMINATOR + _AMOUNTS.pack(token_amount, max_sol_cost),
+                           self.buy_keys)
+
+    def sell_instruction(self, token_amount: int, min_sol_output: int) -> Instruction:
+        """Sell instruction with only the amount fields filled in"""
+        return Instruction(PUMP_FUN_PROGRAM, SELL_DISCRIMINATOR + _AMOUNTS.pack(token_amount, min_sol_output),
+                           self.sell_keys)
+
+
+def build_trade_template(wallet: Pubkey, mint: Pubkey, bonding_curve: Optional[Pubkey] = None,
+                         associated_bonding_curve: Optional[Pubkey] = None) -> TradeTemplate:
+    """
+    Derive every address and account list needed to trade mint from wallet
+    Args:
+        wallet: Trading wallet
+        mint: Token mint
+        bonding_curve: Bonding curve if already known (e.g. from the create event)
+        associated_bonding_curve: Bonding curve token account if already known
+    Returns:
+        TradeTemplate
+    """
+    if bonding_curve is None or associated_bonding_curve is None:
+        bonding_curve, associated_bonding_curve = derive_bonding_curve(mint)
+    user_ata = get_associated_token_address(wallet, mint)
+
+    mint_meta = AccountMeta(pubkey=mint, is_signer=False, is_writable=False)
+    curve_meta = AccountMeta(pubkey=bonding_curve, is_signer=False, is_writable=True)
+    curve_ata_meta = AccountMeta(pubkey=associated_bonding_curve, is_signer=False, is_writable=True)
+    user_ata_meta = AccountMeta(pubkey=user_ata, is_signer=False, is_writable=True)
+    wallet_meta = AccountMeta(pubkey=wallet, is_signer=True, is_writable=True)
+
+    buy_keys = [
+        _GLOBAL_META, _FEE_RECIPIENT_META, mint_meta, curve_meta, curve_ata_meta, user_ata_meta, wallet_meta,
+        _SYSTEM_PROGRAM_META, _TOKEN_PROGRAM_META, _RENT_META, _EVENT_AUTHORITY_META, _PUMP_FUN_PROGRAM_META
+    ]
+    sell_keys = [
+        _GLOBAL_META, _FEE_RECIPIENT_META, mint_meta, curve_meta, curve_ata_meta, user_ata_meta, wallet_meta,
+        _SYSTEM_PROGRAM_META, _ASSOC_TOKEN_ACC_PROG_META, _TOKEN_PROGRAM_META, _EVENT_AUTHORITY_META,
+        _PUMP_FUN_PROGRAM_META
+    ]
+
+    return TradeTemplate(
+        wallet=wallet,
+        mint=mint,
+        bonding_curve=bonding_curve,
+        associated_bonding_curve=associated_bonding_curve,
+        user_ata=user_ata,
+        buy_keys=buy_keys,
+        sell_keys=sell_keys,
+        create_ata_ix=create_associated_token_account(wallet, wallet, mint)
+    )
+
+
+class InstructionTemplateCache:
+    def __init__(self, max_size: int = 1024):
+        """
+        LRU cache of TradeTemplate keyed by (wallet, mint)
+        Args:
+            max_size: Maximum number of templates kept
+        """
+        self.max_size = max_size
+        self._templates: "OrderedDict[Tuple[Pubkey, Pubkey], TradeTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_time = 0.0
+
+    def get(self, wallet: Pubkey, mint: Pubkey, bonding_curve: Optional[Pubkey] = None,
+            associated_bonding_curve: Optional[Pubkey] = None) -> TradeTemplate:
+        """Get the template for (wallet, mint), building it on a miss"""
+        key = (wallet, mint)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+
+        start = time.perf_counter()
+        template = build_trade_template(wallet, mint, bonding_curve, associated_bonding_curve)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.build_time += elapsed
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def prepare(self, wallets: List[Pubkey], mint: Pubkey):
+        """预先为所有钱包构建模板"""
+        for wallet in wallets:
+            self.get(wallet, mint)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+    def get_stats(self) -> Dict:
+        """Cache counters and an estimate of the CPU time saved by hits"""
+        avg_build_us = self.build_time / self.misses * 1e6 if self.misses else 0.0
+        derive_info = derive_bonding_curve.cache_info()
+        return {
+            'size': len(self._templates),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'avg_build_us': round(avg_build_us, 3),
+            'estimated_saved_ms': round(self.hits * avg_build_us / 1000, 3),
+            'derive_hits': derive_info.hits,
+            'derive_misses': derive_info.misses
+        }
+
+
+template_cache = InstructionTemplateCache()
@@ -0,0 +1,187 @@
+# utilities/latency_trace.py
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 从收到创建事件到买入交易发送返回的各阶段，按发生顺序排列
+STAGES = ('ws_receive', 'decode', 'dequeue', 'classify', 'parse', 'dispatch', 'filter', 'config_keypair', 'build',
+          'blockhash', 'sign', 'sign_others', 'send')
+# 只有发送过交易的 trace 计入直方图和日志，过滤、跳过等未发送的只按结果计数
+RECORDED_STAGE = 'send'
+# 直方图桶上界: 1us, 2us, 4us ... 2^26us (约 67 秒)
+_BUCKET_COUNT = 27
+
+
+class SnipeTrace:
+    __slots__ = ('signature', 'mint', 'marks', 'outcome', 'finished')
+
+    def __init__(self, signature: str, received_ns: Optional[int] = None, mint: Optional[str] = None):
+        """Timestamps of one snipe, starting when its create notification was received"""
+        self.signature = signature
+        self.mint = mint
+        self.marks: List[Tuple[str, int]] = [('ws_receive', received_ns or time.perf_counter_ns())]
+        self.outcome = None
+        self.finished = False
+
+    def mark(self, stage: str, ns: Optional[int] = None):
+        """Record that stage ended now (or at ns)"""
+        self.marks.append((stage, ns or time.perf_counter_ns()))
+
+    def fork(self) -> 'SnipeTrace':
+        """Child trace sharing the marks so far, finished independently of this one"""
+        child = SnipeTrace(self.signature, self.marks[0][1], self.mint)
+        child.marks = list(self.marks)
+        return child
+
+    @property
+    def sent(self) -> bool:
+        return any(stage == RECORDED_STAGE for stage, _ in self.marks)
+
+    def durations(self) -> List[Tuple[str, float]]:
+        """Microseconds spent in each stage, measured from the previous mark"""
+        return [(stage, (ns - prev) / 1000) for (_, prev), (stage, ns) in zip(self.marks, self.marks[1:])]
+
+    @property
+    def total_us(self) -> float:
+        return (self.marks[-1][1] - self.marks[0][1]) / 1000
+
+
+class LatencyHistogram:
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        """Log2 bucketed latency histogram in microseconds"""
+        self.buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, us: float):
+        index = min(max(int(us) - 1, 0).bit_length(), _BUCKET_COUNT - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound (us) of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(float(1 << index), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_us': round(self.total / self.count, 1) if self.count else None,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': round(self.max, 1),
+            'buckets': {f"<={1 << i}us": n for i, n in enumerate(self.buckets) if n}
+        }
+
+
+class LatencyTracer:
+    def __init__(self, log_file: Optional[str] = None, max_log_bytes: int = 10 * 1024 * 1024):
+        """
+        Per-stage snipe latency histograms and trace log, covering snipes that sent a transaction
+        Args:
+            log_file: JSON lines file receiving one record per sent snipe, None to disable
+            max_log_bytes: Size at which log_file is rotated to log_file.1, replacing the previous one
+        """
+        self.log_file = log_file
+        self.max_log_bytes = max_log_bytes
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._log_size: Optional[int] = None
+        self.traces = 0
+        self.unsent: Dict[str, int] = {}
+        self.rotations = 0
+
+    def start(self, signature: str, received_ns: Optional[int] = None, mint: Optional[str] = None) -> SnipeTrace:
+        return SnipeTrace(signature, received_ns, mint)
+
+    def finish(self, trace: Optional[SnipeTrace], outcome: str = "done"):
+        """
+        Aggregate a trace into the histograms and append it to the trace log, only the first call counts;
+        traces that never reached the send stage are only counted by outcome
+        """
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        trace.outcome = outcome
+        if not trace.sent:
+            with self._lock:
+                self.unsent[outcome] = self.unsent.get(outcome, 0) + 1
+            return
+        durations = trace.durations()
+        with self._lock:
+            for stage, us in durations:
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = self._histograms[stage] = LatencyHistogram()
+                histogram.add(us)
+            total = self._histograms.get('total')
+            if total is None:
+                total = self._histograms['total'] = LatencyHistogram()
+            total.add(trace.total_us)
+            self.traces += 1
+
+        if self.log_file:
+            record = {
+                'time': time.time(),
+                'signature': trace.signature,
+                'mint': trace.mint,
+                'outcome': outcome,
+                'stages_us': {stage: round(us, 1) for stage, us in durations},
+                'total_us': round(trace.total_us, 1)
+            }
+            self._write_log(json.dumps(record) + "\n")
+
+    def _write_log(self, line: str):
+        with self._log_lock:
+            try:
+                if self._log_size is None:
+                    os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+                    self._log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+                if self._log_size + len(line) > self.max_log_bytes:
+                    # 只保留一个旧文件，日志总大小不超过 2 * max_log_bytes
+                    os.replace(self.log_file, self.log_file + ".1")
+                    self._log_size = 0
+                    self.rotations += 1
+                with open(self.log_file, 'a') as f:
+                    f.write(line)
+                self._log_size += len(line)
+            except Exception as e:
+                self._log_size = None
+                print(f"Error writing snipe trace: {e}")
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.unsent.clear()
+            self.traces = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            order = {stage: i for i, stage in enumerate(STAGES + ('total',))}
+            stages = sorted(self._histograms.items(), key=lambda item: order.get(item[0], len(order)))
+            return {
+                'traces': self.traces,
+                'unsent': dict(self.unsent),
+                'log_rotations': self.rotations,
+                'stages': {stage: histogram.to_dict() for stage, histogram in stages}
+            }
+
+
+latency_tracer = LatencyTracer(os.path.join('data', 'snipe_traces.jsonl'))
@@ -0,0 +1,96 @@
+# utilities/log_filter.py
+import base64
+import hashlib
+from typing import List, Optional, Tuple, Dict
+
+PROGRAM_DATA_PREFIX = "Program data: "
+
+
+def _event_prefix(event_name: str) -> str:
+    """
+    Base64 text every log line of this Anchor event starts with
+
+    The first 6 discriminator bytes always encode to the same 8 base64 characters,
+    so events can be recognised without decoding.
+    """
+    discriminator = hashlib.sha256(f"event:{event_name}".encode()).digest()[:8]
+    return PROGRAM_DATA_PREFIX + base64.b64encode(discriminator[:6]).decode()
+
+
+CREATE_EVENT_PREFIX = _event_prefix("CreateEvent")  # "Program data: G3KpTd7r"
+TRADE_EVENT_PREFIX = _event_prefix("TradeEvent")  # "Program data: vdt/007m"
+COMPLETE_EVENT_PREFIX = _event_prefix("CompleteEvent")  # "Program data: X3JhnNQu"
+PAYLOAD_OFFSET = len(PROGRAM_DATA_PREFIX)
+
+EVENT_CREATE = "create"
+EVENT_TRADE = "trade"
+EVENT_COMPLETE = "complete"
+
+
+def has_create_event(logs: List[str]) -> bool:
+    """Uncounted create check, used to prioritise notifications before they are handled"""
+    for line in logs:
+        if line.startswith(CREATE_EVENT_PREFIX):
+            return True
+    return False
+
+
+def find_trades(logs: List[str]) -> List[str]:
+    """Uncounted base64 payloads of every trade event in logs, e.g. the creator's dev buy in a create transaction"""
+    return [line[PAYLOAD_OFFSET:] for line in logs if line.startswith(TRADE_EVENT_PREFIX)]
+
+
+class LogClassifier:
+    def __init__(self):
+        """Classify Pump.fun log notifications by event discriminator prefix"""
+        self.notifications = 0
+        self.creates = 0
+        self.trades = 0
+        self.completes = 0
+        self.rejected = 0
+
+    def find_create(self, logs: List[str]) -> Optional[str]:
+        """
+        Base64 payload of the create event in logs
+        Returns:
+            Payload string, None if this notification is not a token creation
+        """
+        self.notifications += 1
+        for line in logs:
+            if line.startswith(CREATE_EVENT_PREFIX):
+                self.creates += 1
+                return line[PAYLOAD_OFFSET:]
+        self.rejected += 1
+        return None
+
+    def classify(self, logs: List[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Kind and base64 payload of the first Pump.fun event in logs
+        Returns:
+            Tuple of (EVENT_CREATE / EVENT_TRADE / EVENT_COMPLETE or None, payload or None)
+        """
+        self.notifications += 1
+        for line in logs:
+            if not line.startswith(PROGRAM_DATA_PREFIX):
+                continue
+            if line.startswith(CREATE_EVENT_PREFIX):
+                self.creates += 1
+                return EVENT_CREATE, line[PAYLOAD_OFFSET:]
+            if line.startswith(TRADE_EVENT_PREFIX):
+                self.trades += 1
+                return EVENT_TRADE, line[PAYLOAD_OFFSET:]
+            if line.startswith(COMPLETE_EVENT_PREFIX):
+                self.completes += 1
+                return EVENT_COMPLETE, line[PAYLOAD_OFFSET:]
+        self.rejected += 1
+        return None, None
+
+    def get_stats(self) -> Dict:
+        return {
+            'notifications': self.notifications,
+            'creates': self.creates,
+            'trades': self.trades,
+            'completes': self.completes,
+            'rejected': self.rejected,
+            'rejection_rate': round(self.rejected / self.notifications, 4) if self.notifications else None
+        }
@@ -1,17 +1,34 @@
 import asyncio
 from datetime import datetime
+import websockets
 from solana.rpc.websocket_api import connect
 from solders.pubkey import Pubkey
-from solders.rpc.config import RpcTransactionLogsFilter, RpcTransactionLogsFilterMentions
+from solders.rpc.config import RpcTransactionLogsFilter, RpcTransactionLogsFilterMentions, RpcAccountInfoConfig
+from solders.rpc.requests import AccountSubscribe
+from solders.account_decoder import UiAccountEncoding
+from solders.commitment_config import CommitmentLevel
 from solana.rpc.commitment import Commitment
 import json
-import base64
 import time
 import threading
-import struct
 import traceback
-from typing import Optional, Dict, List, Callable
-from dataclasses import dataclass
+from typing import Optional, Dict, List, Callable, Awaitable
+from dataclasses import dataclass, field, replace
+from solders.rpc.responses import AccountNotification, SubscriptionResult
+from .pump import parse_bonding_curve_account, CoinData
+from .instruction_templates import derive_bonding_curve
+from .reserve_cache import reserve_cache
+from .log_filter import LogClassifier, has_create_event, find_trades, CREATE_EVENT_PREFIX, PAYLOAD_OFFSET
+from .event_decoder import decode_create, decode_trade, b64_to_bytes
+from .stream_merger import StreamMerger, endpoint_label
+from .stream_health import StreamHealth, StandbyConnection, heartbeat, REASON_CLOSED
+from .callback_runtime import CallbackRuntime
+from .ingest_queue import IngestQueue, DROP_NON_CREATE, POLICIES as INGEST_POLICIES
+from .latency_trace import latency_tracer, SnipeTrace
+from .decode_pool import DecodePool, decode_frame, RECORD_CREATE
+from .gap_backfill import GapBackfiller
+
+DEFAULT_WS_ENDPOINT = "wss://mainnet.helius-rpc.com/?api-key=bc8bd2ae-8330-4a02-9c98-2970d98545cd"
 
 
 @dataclass
@@ -20,37 +37,156 @@ class TokenCreationInfo:
     symbol: str
     mint: str
     date: str
+    uri: str = ""
+    bonding_curve: Optional[str] = None
+    user: Optional[str] = None
+    # 补回的事件距离上链的秒数，实时推送的事件为 None
+    age: Optional[float] = None
+    # 创建交易中开发者买入后的曲线储备，创建时没有买入则为 None
+    virtual_sol_reserves: Optional[int] = None
+    virtual_token_reserves: Optional[int] = None
+    real_token_reserves: Optional[int] = None
+    trace: Optional[SnipeTrace] = field(default=None, repr=False, compare=False)
 
 
-from concurrent.futures import ThreadPoolExecutor
-
 
 class MonitorManager:
-    def __init__(self, websocket_url: str = None):
-        self.endpoint = websocket_url or "wss://mainnet.helius-rpc.com/?api-key=bc8bd2ae-8330-4a02-9c98-2970d98545cd"
+    def __init__(self, websocket_url: str = None, websocket_urls: Optional[List[str]] = None):
+        self.endpoints = []
+        # 心跳间隔与 pong 超时（秒），静默判定见 StreamHealth
+        self.heartbeat_interval = 5.0
+        self.heartbeat_timeout = 2.0
+        # 关闭后只在连接断开时重订阅（回放录制流量时静默不代表连接失效）
+        self.heartbeat_enabled = True
+        self.min_stale = 3.0
+        self.max_stale = 30.0
+        self.set_endpoints(websocket_urls or [websocket_url or DEFAULT_WS_ENDPOINT])
         self.subscription_id = None
         self.websocket = None
+        # 每个端点的日志订阅连接
+        self.websockets: Dict[str, object] = {}
+        self.subscription_ids: Dict[str, int] = {}
         self.is_running = False
         self.callbacks = []
         self.monitor_task = None
-        # 创建线程池
-        self.thread_pool = ThreadPoolExecutor(max_workers=10)
+        self.log_classifier = LogClassifier()
+        # 读取 websocket 与处理消息之间的有界队列，在监控循环中创建
+        self.ingest_maxsize = 10_000
+        self.ingest_policy = DROP_NON_CREATE
+        self.ingest_queue: Optional[IngestQueue] = None
+        self.process_task = None
+        # 大于 0 时启用多进程解码（全量交易事件模式）
+        self.decode_workers = 0
+        self.decode_pool: Optional[DecodePool] = None
+        # 最后处理的通知，重连后从这里补回断线期间的创建事件
+        self.last_signature = None
+        self.last_slot: Optional[int] = None
+        self.backfill_enabled = True
+        self.backfill_max_signatures = 1000
+        self.backfill_concurrency = 16
+        self.backfiller: Optional[GapBackfiller] = None
+        self.backfill_task = None
+        # 常驻的回调事件循环，客户端和缓存可以在回调之间复用
+        self.callback_runtime = CallbackRuntime()
+
+        # 持仓代币的曲线账户订阅
+        self.loop = None
+        self.reserve_cache = reserve_cache
+        self.watched_curves: Dict[str, Pubkey] = {}
+        self._watch_lock = threading.Lock()
+        self._watch_event = None
+        self.account_task = None
+
+    def set_endpoints(self, websocket_urls: Optional[List[str]]):
+        """
+        Set the websocket endpoints subscribed in parallel, takes effect on the next start_monitoring
+        Args:
+            websocket_urls: Endpoint URLs, the first one also carries the account subscriptions
+        """
+        urls = list(dict.fromkeys(u for u in (websocket_urls or []) if u))
+        if not urls:
+            return
+        self.endpoints = urls
+        self.endpoint = urls[0]
+        self.stream_merger = StreamMerger(urls)
+        self.stream_health: Dict[str, StreamHealth] = {
+            url: StreamHealth(self.min_stale, self.max_stale) for url in urls
+        }
 
-    def run_callback_in_thread(self, callback, token_info, tx_signature):
-        """在线程中执行回调的包装函数"""
-        try:
-            # 创建新的事件循环给这个线程
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    def set_heartbeat_options(self, interval: Optional[float] = None, timeout: Optional[float] = None,
+                              min_stale: Optional[float] = None, max_stale: Optional[float] = None,
+                              enabled: Optional[bool] = None):
+        """
+        Configure stream liveness checks, takes effect on the next start_monitoring
+        Args:
+            interval: Seconds between pings
+            timeout: Seconds to wait for a pong before resubscribing
+            min_stale: Shortest silence (seconds) treated as a dead stream
+            max_stale: Silence (seconds) always treated as a dead stream, however quiet the program is
+            enabled: False resubscribes only when the connection closes, e.g. when replaying a recording
+        """
+        if enabled is not None:
+            self.heartbeat_enabled = bool(enabled)
+        self.heartbeat_interval = interval or self.heartbeat_interval
+        self.heartbeat_timeout = timeout or self.heartbeat_timeout
+        self.min_stale = min_stale or self.min_stale
+        self.max_stale = max_stale or self.max_stale
+        for health in self.stream_health.values():
+            health.min_stale = self.min_stale
+            health.max_stale = self.max_stale
+
+    def set_ingest_options(self, maxsize: Optional[int] = None, policy: Optional[str] = None):
+        """
+        Configure the ingest queue, takes effect on the next start_monitoring
+        Args:
+            maxsize: Notifications held before the overload policy applies
+            policy: drop_non_create, drop_oldest or block
+        """
+        self.ingest_maxsize = maxsize or self.ingest_maxsize
+        if policy and policy not in INGEST_POLICIES:
+            # 未知策略在 start_monitoring 中创建队列时才会报错，这里直接回退到默认策略
+            print(f"Unknown ingest policy {policy!r}, using {DROP_NON_CREATE}")
+            policy = DROP_NON_CREATE
+        self.ingest_policy = policy or self.ingest_policy
+
+    def set_decode_workers(self, workers: Optional[int]):
+        """
+        Number of decoder processes, 0 decodes in this process; takes effect on the next start_monitoring
+        """
+        self.decode_workers = max(0, int(workers or 0))
 
-            # 在新的事件循环中运行回调
-            loop.run_until_complete(callback(token_info, tx_signature))
-            loop.close()
-        except Exception as e:
-            print(f"Thread callback error: {e}")
+    def set_backfill_options(self, enabled: Optional[bool] = None, max_signatures: Optional[int] = None,
+                             concurrency: Optional[int] = None):
+        """
+        Configure gap backfill after reconnects, takes effect on the next start_monitoring
+        Args:
+            enabled: Backfill creates missed while a subscription was down
+            max_signatures: Most program signatures scanned per gap
+            concurrency: getTransaction requests in flight
+        """
+        if enabled is not None:
+            self.backfill_enabled = bool(enabled)
+        self.backfill_max_signatures = max_signatures or self.backfill_max_signatures
+        self.backfill_concurrency = concurrency or self.backfill_concurrency
+
+    @staticmethod
+    def is_create_notification(msg) -> bool:
+        value = getattr(getattr(msg, 'result', None), 'value', None)
+        logs = getattr(value, 'logs', None)
+        return bool(logs) and has_create_event(logs)
+
+    async def process_ingest(self):
+        """Handle queued notifications until monitoring stops"""
+        while self.is_running:
+            msg, endpoint, received_ns = await self.ingest_queue.get()
+            try:
+                await self.handle_log_message(msg, endpoint, received_ns)
+            except Exception as e:
+                print(f"Error handling message: {e}")
 
-    async def handle_log_message(self, msg):
+    async def handle_log_message(self, msg, endpoint: Optional[str] = None, received_ns: Optional[int] = None):
         try:
+            dequeued_ns = time.perf_counter_ns()
             if not hasattr(msg, 'result'):
                 return False
 
@@ -65,19 +201,27 @@ class MonitorManager:
             tx_signature = value.signature
             logs = value.logs
 
-            token_info = self.is_pump_token_creation(logs)
+            # 多个端点或重连后重复推送的同一笔交易只处理最先到达的一份，避免重复买入
+            if not self.stream_merger.accept(endpoint or self.endpoint, tx_signature):
+                return True
+            self.last_signature = tx_signature
+            self.last_slot = result.context.slot
+
+            # 只按前缀判断是否为创建事件，其它交易不做任何解码
+            payload = self.log_classifier.find_create(logs)
+            if payload is None:
+                return True
+            classified_ns = time.perf_counter_ns()
+
+            token_info = self.parse_create_event_log(payload)
             if token_info:
-                print(f"New token detected: {token_info}")
-                print(f"Transaction: https://solscan.io/tx/{tx_signature}")
-
-                # 在线程池中执行每个回调
-                for callback in self.callbacks:
-                    self.thread_pool.submit(
-                        self.run_callback_in_thread,
-                        callback,
-                        token_info,
-                        tx_signature
-                    )
+                self.attach_dev_buy(token_info, logs)
+                trace = latency_tracer.start(str(tx_signature), received_ns or dequeued_ns, token_info.mint)
+                trace.mark('dequeue', dequeued_ns)
+                trace.mark('classify', classified_ns)
+                trace.mark('parse')
+                token_info.trace = trace
+                self._dispatch_token(token_info, tx_signature)
 
             return True
 
@@ -85,91 +229,213 @@ class MonitorManager:
             print(f"Error processing message: {e}")
             return False
 
-    async def stop_monitoring(self):
-        """停止监控并清理资源"""
-        self.is_running = False
-        if self.websocket and self.subscription_id:
+    def _dispatch_token(self, token_info: TokenCreationInfo, tx_signature):
+        # 交给常驻回调循环执行，打印放在分发之后
+        callbacks = self.callbacks
+        if len(callbacks) > 1 and token_info.trace is not None:
+            # 多个回调各自拿到一份子 trace，每个回调的 finish 都会计入统计
+            for callback in callbacks:
+                self.callback_runtime.dispatch(callback, replace(token_info, trace=token_info.trace.fork()),
+                                               tx_signature)
+        else:
+            for callback in callbacks:
+                self.callback_runtime.dispatch(callback, token_info, tx_signature)
+
+        print(f"New token detected: {token_info}")
+        print(f"Transaction: https://solscan.io/tx/{tx_signature}")
+
+    def handle_decoded_record(self, record: tuple):
+        """Handle a create or trade record coming back from the decode pool"""
+        received_ns, endpoint_index = record[-2], record[-1]
+        if record[0] == RECORD_CREATE:
+            _, signature, slot, name, symbol, uri, mint, bonding_curve, user, \
+                virtual_sol_reserves, virtual_token_reserves, real_token_reserves = record[:-2]
+            if not self.stream_merger.accept(self.endpoints[endpoint_index], signature):
+                return
+            self.last_signature = signature
+            self.last_slot = slot
+            trace = latency_tracer.start(signature, received_ns, mint)
+            trace.mark('decode')
+            token_info = TokenCreationInfo(
+                name=name,
+                symbol=symbol,
+                mint=mint,
+                date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                uri=uri,
+                bonding_curve=bonding_curve,
+                user=user,
+                virtual_sol_reserves=virtual_sol_reserves,
+                virtual_token_reserves=virtual_token_reserves,
+                real_token_reserves=real_token_reserves,
+                trace=trace
+            )
+            trace.mark('parse')
+            self._dispatch_token(token_info, signature)
+        else:
+            # 交易事件带有成交后的虚拟储备，持仓代币可直接更新储备缓存
+            _, signature, slot, mint, is_buy, sol_amount, token_amount, virtual_sol_reserves, \
+                virtual_token_reserves, real_token_reserves, timestamp = record[:-2]
+            self.last_signature = signature
+            self.last_slot = slot
+            with self._watch_lock:
+                curve = self.watched_curves.get(mint)
+            if curve is None:
+                return
+            mint_pubkey = Pubkey.from_string(mint)
+            _, associated_bonding_curve = derive_bonding_curve(mint_pubkey)
+            self.reserve_cache.update(mint, CoinData(
+                mint=mint_pubkey,
+                bonding_curve=curve,
+                associated_bonding_curve=associated_bonding_curve,
+                virtual_token_reserves=virtual_token_reserves,
+                virtual_sol_reserves=virtual_sol_reserves,
+                complete=False,
+                real_token_reserves=real_token_reserves
+            ), slot)
+
+    def watch_bonding_curve(self, mint: str, bonding_curve: Optional[str] = None):
+        """
+        Keep reserves of mint's bonding curve in the reserve cache, callable from any thread
+        Args:
+            mint: Token mint address
+            bonding_curve: Bonding curve address, derived if None
+        """
+        mint_pubkey = Pubkey.from_string(mint)
+        curve = Pubkey.from_string(bonding_curve) if bonding_curve else derive_bonding_curve(mint_pubkey)[0]
+        with self._watch_lock:
+            self.watched_curves[mint] = curve
+        self._notify_watch_change()
+
+    def unwatch_bonding_curve(self, mint: str):
+        """停止订阅已清仓代币的曲线账户"""
+        with self._watch_lock:
+            self.watched_curves.pop(mint, None)
+        self.reserve_cache.remove(mint)
+        self._notify_watch_change()
+
+    def _notify_watch_change(self):
+        if self.loop is not None and self._watch_event is not None:
+            self.loop.call_soon_threadsafe(self._watch_event.set)
+
+    async def run_account_subscriptions(self):
+        """Maintain accountSubscribe on every watched bonding curve and feed the reserve cache"""
+        self._watch_event = asyncio.Event()
+        config = RpcAccountInfoConfig(encoding=UiAccountEncoding.Base64, commitment=CommitmentLevel.Processed)
+        while self.is_running:
+            # 每个连接各自维护映射，不依赖库内部的 websocket.subscriptions
+            requests: Dict[int, str] = {}  # 已发送、尚未确认的订阅请求 id -> mint
+            subscribed: Dict[str, int] = {}  # mint -> subscription id
+            mints: Dict[int, str] = {}  # subscription id -> mint
             try:
-                await self.websocket.logs_unsubscribe(self.subscription_id)
-                print(f"Stopped monitoring logs for subscription: {self.subscription_id}")
+                async with connect(self.endpoint) as websocket:
+                    async def sync_subscriptions():
+                        while True:
+                            with self._watch_lock:
+                                watched = dict(self.watched_curves)
+                            requested = set(requests.values())
+                            for mint, curve in watched.items():
+                                if mint not in subscribed and mint not in requested:
+                                    request_id = websocket.increment_counter_and_get_id()
+                                    requests[request_id] = mint
+                                    await websocket.send_data(AccountSubscribe(curve, config, request_id))
+                            for mint in [m for m in subscribed if m not in watched]:
+                                subscription_id = subscribed.pop(mint)
+                                mints.pop(subscription_id, None)
+                                await websocket.account_unsubscribe(subscription_id)
+                            self._watch_event.clear()
+                            await self._watch_event.wait()
+
+                    def is_current(mint: str, subscription_id: int) -> bool:
+                        return subscribed.get(mint) == subscription_id
+
+                    sync_task = asyncio.create_task(sync_subscriptions())
+                    try:
+                        async for msgs in websocket:
+                            if not self.is_running:
+                                break
+                            for msg in msgs:
+                                if isinstance(msg, SubscriptionResult):
+                                    mint = requests.pop(msg.id, None)
+                                    if mint is None:
+                                        continue
+                                    with self._watch_lock:
+                                        still_watched = mint in self.watched_curves
+                                    if not still_watched:
+                                        # 等待确认期间已取消关注
+                                        await websocket.account_unsubscribe(msg.result)
+                                        continue
+                                    subscribed[mint] = msg.result
+                                    mints[msg.result] = mint
+                                    # 读取到当前状态后才算实时，重连前的旧数据不会被当作实时数据
+                                    asyncio.create_task(self._seed_reserves(
+                                        mint, lambda m=mint, sub=msg.result: is_current(m, sub)))
+                                elif isinstance(msg, AccountNotification):
+                                    self._handle_account_notification(mints.get(msg.subscription), msg)
+                    finally:
+                        sync_task.cancel()
             except Exception as e:
-                print(f"Error stopping monitor: {e}")
-            finally:
-                self.subscription_id = None
-                self.websocket = None
-
-        # 关闭线程池
-        self.thread_pool.shutdown(wait=False)
-
+                print(f"Account subscription error: {e}")
+            subscribed.clear()
+            self.reserve_cache.mark_all_stale()
+            if self.is_running:
+                await asyncio.sleep(1)
 
+    def _handle_account_notification(self, mint: Optional[str], msg: AccountNotification):
+        if mint is None or msg.result.value is None:
+            return
+        curve = self.watched_curves.get(mint)
+        if curve is None:
+            return
+        mint_pubkey = Pubkey.from_string(mint)
+        _, associated_bonding_curve = derive_bonding_curve(mint_pubkey)
+        coin_data = parse_bonding_curve_account(mint_pubkey, curve, associated_bonding_curve, msg.result.value.data)
+        self.reserve_cache.update(mint, coin_data, msg.result.context.slot)
 
+    async def _seed_reserves(self, mint: str, is_current: Callable[[], bool]):
+        """
+        Read the curve once after its subscription is confirmed, pushes keep it current afterwards
+        Args:
+            mint: Token mint address
+            is_current: False once the subscription is gone, the result is then dropped
+        """
+        from .async_pump import get_async_pump_client
+        with self._watch_lock:
+            curve = self.watched_curves.get(mint)
+        if curve is None:
+            return
+        try:
+            resp = await get_async_pump_client().client.get_account_info(curve)
+            if resp.value is None or not is_current():
+                return
+            mint_pubkey = Pubkey.from_string(mint)
+            _, associated_bonding_curve = derive_bonding_curve(mint_pubkey)
+            coin_data = parse_bonding_curve_account(mint_pubkey, curve, associated_bonding_curve, resp.value.data)
+            # 缓存中已有更新的推送时不替换，推送数据本身已是实时的
+            self.reserve_cache.update(mint, coin_data, resp.context.slot)
+        except Exception as e:
+            print(f"Error seeding reserves for {mint}: {e}")
 
-    async def keepalive(self):
-        while 1:
+    async def stop_monitoring(self):
+        """停止监控并清理资源"""
+        self.is_running = False
+        for endpoint, websocket in list(self.websockets.items()):
+            subscription_id = self.subscription_ids.pop(endpoint, None)
+            if subscription_id is None:
+                continue
             try:
-                print('ping')
-                if self.websocket.closed:
-                    print("WebSocket closed, initiating reconnection...")
-                    await self.reconnect()
-                    continue
-
-                await self.websocket.ping()
-                print('ping finish')
-                # try:
-                #     await asyncio.wait_for(self.websocket.pong(), timeout=self.ping_timeout)
-                # except asyncio.TimeoutError:
-                #     print("Ping timeout, reconnecting...")
-                #     await self.reconnect()
-                #     continue
-
-                await asyncio.sleep(self.ping_interval)
-
+                await websocket.logs_unsubscribe(subscription_id)
+                print(f"Stopped monitoring logs for subscription: {subscription_id}")
             except Exception as e:
-                print(f"Keepalive error: {e}")
-                await self.reconnect()
-                await asyncio.sleep(1)
-
-    async def reconnect(self):
-        # if self.current_retries >= self.max_retries:
-        #     print("Max reconnection attempts reached")
-        #     self.is_running = False
-        #     return
-
-        self.current_retries += 1
-        print(f"Attempting to reconnect... (attempt {self.current_retries})")
+                print(f"Error stopping monitor: {e}")
+        self.websockets.clear()
+        self.subscription_id = None
+        self.websocket = None
 
-        try:
-            # if self.websocket and not self.websocket.closed:
-            #     await self.websocket.close()
+        # 已排队的回调执行完后回调线程退出
+        self.callback_runtime.stop()
 
-            self.websocket = None
-            self.subscription_id = None
 
-            await asyncio.sleep(self.retry_delay)
-            self.is_running = False
-            await self.start_monitoring()
-            self.current_retries = 0
 
-        except Exception as e:
-            print(f"Reconnection failed: {e}")
-            if self.current_retries < self.max_retries:
-                await self.reconnect()
-            else:
-                self.is_running = False
-
-    def test(self):
-        async def ping():
-            while 1:
-                try:
-                    print('1')
-                    await self.websocket.ping()
-                except Exception as e:
-                    pass
-                await asyncio.sleep(15)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.create_task(ping())
-        loop.run_forever()
 
     # 在 MonitorManager 类中修改 start_monitoring 方法
     async def start_monitoring(self, program_id: Optional[str] = None):
@@ -177,124 +443,270 @@ class MonitorManager:
             print('已在运行中')
             return
 
-        threading.Thread(target=self.test, args=()).start()
-
         print('开始运行监控')
         self.is_running = True
         program_id = program_id or self.TOKEN_PROGRAM_ID
+        self.loop = asyncio.get_running_loop()
+        self.account_task = asyncio.create_task(self.run_account_subscriptions())
+        if self.backfill_enabled:
+            self.backfiller = GapBackfiller(program_id, self.backfill_max_signatures, self.backfill_concurrency)
+
+        if self.decode_workers > 0:
+            # 原始帧交给解码进程，只有解码后的创建和交易记录回到本进程
+            self.decode_pool = DecodePool(self.decode_workers)
+            self.decode_pool.start(self.loop, self.handle_decoded_record)
+            readers = [self.run_raw_log_subscription(index, endpoint, program_id)
+                       for index, endpoint in enumerate(self.endpoints)]
+        else:
+            self.ingest_queue = IngestQueue(self.ingest_maxsize, self.ingest_policy)
+            self.process_task = asyncio.create_task(self.process_ingest())
+            readers = [self.run_log_subscription(endpoint, program_id) for endpoint in self.endpoints]
+
+        # 每个端点一条独立连接，消息按签名合并
+        try:
+            await asyncio.gather(*readers)
+        finally:
+            if self.process_task is not None:
+                self.process_task.cancel()
+            if self.decode_pool is not None:
+                self.decode_pool.stop()
 
-        while self.is_running:
-            print('开始创建监控')
-            try:
-                async with connect(self.endpoint) as websocket:
-                    print('监控创建成功')
-                    self.websocket = websocket
-
-                    filter_ = RpcTransactionLogsFilterMentions(
-                        Pubkey.from_string(program_id)
-                    )
-
-                    await websocket.logs_subscribe(
-                        filter_=filter_,
-                        commitment=Commitment("processed")
-                    )
-
-                    first_resp = await websocket.recv()
-                    self.subscription_id = first_resp[0].result
-
-                    print(f"Started monitoring program: {program_id}")
-                    print(f"Subscription ID: {self.subscription_id}")
-
-                    # 使用异步迭代器模式
-                    async for msg in websocket:
-                        if not self.is_running:
-                            break
-                        try:
-                            await self.handle_log_message(msg[0])
-                        except Exception as e:
-                            print(f"Error handling message: {e}")
-                            continue
+    async def run_stream(self, endpoint: str, open_connection: Callable[[], Awaitable],
+                         subscribe: Callable[[object], Awaitable], read: Callable[[object], Awaitable]):
+        """
+        Keep one subscription to endpoint alive until monitoring stops
+        The heartbeat runs next to the reader in this loop; when the connection drops, stops answering pings or
+        goes silent, the subscription is re-sent on a standby connection opened in advance.
+        Args:
+            open_connection: Coroutine factory opening a new connection
+            subscribe: Sends the subscription on a connection and waits for its confirmation
+            read: Reads notifications from a subscribed connection until it closes
+        """
+        stats = self.stream_merger.endpoints[endpoint]
+        health = self.stream_health[endpoint]
+        standby = StandbyConnection(open_connection)
+        failures = 0
+        failed_ns = None
+        try:
+            while self.is_running:
+                websocket = None
+                try:
+                    websocket, warm = await standby.acquire()
+                    await subscribe(websocket)
+                    health.on_subscribed()
+                    failures = 0
+                    stats.connected = True
+                    stats.connects += 1
+                    if failed_ns is not None:
+                        # 从判定失效到新订阅确认的耗时
+                        health.failovers += 1
+                        health.standby_hits += warm
+                        health.last_failover_ms = (time.perf_counter_ns() - failed_ns) / 1e6
+                        print(f"Resubscribed to {endpoint_label(endpoint)} in {health.last_failover_ms:.1f} ms "
+                              f"({'standby' if warm else 'new'} connection)")
+                        self.start_backfill(time.time() - (time.perf_counter_ns() - failed_ns) / 1e9)
+                        failed_ns = None
+
+                    reader = asyncio.create_task(read(websocket))
+                    tasks = [reader]
+                    monitor = None
+                    if self.heartbeat_enabled:
+                        monitor = asyncio.create_task(heartbeat(websocket, health, self.heartbeat_interval,
+                                                                self.heartbeat_timeout, standby))
+                        tasks.append(monitor)
+                    try:
+                        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                    health.last_reason = monitor.result() if monitor in done else REASON_CLOSED
+                    if reader in done and reader.exception() is not None:
+                        raise reader.exception()
+                    if self.is_running:
+                        print(f"Stream {endpoint_label(endpoint)} lost ({health.last_reason}), resubscribing")
 
-            except Exception as e:
-                print(f"Connection error: {e}")
-                if self.is_running:
-                    print("Attempting to reconnect in 5 seconds...")
-                    await asyncio.sleep(5)
-                continue
+                except Exception as e:
+                    stats.errors += 1
+                    failures += 1
+                    print(f"Connection error: {e}")
+
+                finally:
+                    if failed_ns is None:
+                        failed_ns = time.perf_counter_ns()
+                    stats.connected = False
+                    self.websockets.pop(endpoint, None)
+                    self.subscription_ids.pop(endpoint, None)
+                    if websocket is not None:
+                        standby.discard(websocket)
+
+                # 订阅成功过的连接断开后立即重订阅，连续建连或订阅失败（端点不可用）时指数退避
+                if failures > 1 and self.is_running:
+                    await asyncio.sleep(min(0.1 * 2 ** (failures - 2), 5.0))
+        finally:
+            await standby.close()
 
-            finally:
-                continue
+    def start_backfill(self, lost_at: float):
+        """
+        Backfill creates missed since the last processed signature, one backfill runs at a time
+        Args:
+            lost_at: Unix time the stream was lost, the age of events without a block time
+        """
+        if self.backfiller is None or self.last_signature is None:
+            return
+        if self.backfill_task is not None and not self.backfill_task.done():
+            return
+        self.backfill_task = asyncio.create_task(self.backfill_gap(str(self.last_signature), lost_at))
+
+    async def backfill_gap(self, until: str, lost_at: float):
+        from .async_pump import get_async_pump_client
+        deduper = self.stream_merger.deduper
+        # 去重键与实时路径一致：进程内解析用 Signature 对象，解码进程返回字符串
+        as_key = str if self.decode_pool is not None else (lambda signature: signature)
+
+        def handle(signature, payload: str, slot: int, block_time: Optional[int]):
+            if deduper.check(as_key(signature)) is not None:
+                return
+            token_info = self.parse_create_event_log(payload)
+            if token_info is None:
+                return
+            token_info.age = max(0.0, time.time() - (block_time or lost_at))
+            self._dispatch_token(token_info, signature)
+
+        pump_client = get_async_pump_client()
+        recovered = await self.backfiller.run(pump_client.client, until,
+                                              lambda signature: deduper.seen(as_key(signature)), handle)
+        print(f"Gap backfill recovered {recovered} creates ({self.backfiller.last_gap} signatures scanned)")
+
+    async def run_raw_log_subscription(self, index: int, endpoint: str, program_id: str):
+        """logsSubscribe on a plain websocket connection, frames go to the decode pool without being parsed here"""
+        health = self.stream_health[endpoint]
+        request = json.dumps({
+            "jsonrpc": "2.0", "id": 1, "method": "logsSubscribe",
+            "params": [{"mentions": [program_id]}, {"commitment": "processed"}]
+        })
+
+        async def subscribe(websocket):
+            await websocket.send(request)
+            subscription_id = json.loads(await websocket.recv())['result']
+            self.subscription_ids[endpoint] = subscription_id
+            print(f"Started raw monitoring program: {program_id}")
+            print(f"Subscription ID: {subscription_id}")
+
+        async def read(websocket):
+            async for frame in websocket:
+                if not self.is_running:
+                    break
+                received_ns = time.perf_counter_ns()
+                health.on_message(received_ns)
+                if not self.decode_pool.submit(frame, received_ns, index):
+                    # 解码进程积压时创建事件在本进程解码，不丢弃
+                    data = frame.encode() if isinstance(frame, str) else frame
+                    for record in decode_frame(data):
+                        if record[0] == RECORD_CREATE:
+                            self.handle_decoded_record(record + (received_ns, index))
+
+        # 心跳由 run_stream 负责，关闭库自带的 ping
+        await self.run_stream(endpoint, lambda: websockets.connect(endpoint, max_size=None, ping_interval=None),
+                              subscribe, read)
+
+    async def run_log_subscription(self, endpoint: str, program_id: str):
+        """Keep a logsSubscribe connection to one endpoint open until monitoring stops"""
+        health = self.stream_health[endpoint]
+
+        async def subscribe(websocket):
+            await websocket.logs_subscribe(
+                filter_=RpcTransactionLogsFilterMentions(Pubkey.from_string(program_id)),
+                commitment=Commitment("processed")
+            )
+            first_resp = await websocket.recv()
+            self.websockets[endpoint] = websocket
+            self.subscription_ids[endpoint] = first_resp[0].result
+            if endpoint == self.endpoint:
+                self.websocket = websocket
+                self.subscription_id = first_resp[0].result
+            print(f"Started monitoring program: {program_id}")
+            print(f"Subscription ID: {first_resp[0].result}")
+
+        async def read(websocket):
+            # 读取循环只负责入队，解析和回调在 process_ingest 中执行
+            async for msg in websocket:
+                if not self.is_running:
+                    break
+                received_ns = time.perf_counter_ns()
+                health.on_message(received_ns)
+                await self.ingest_queue.put((msg[0], endpoint, received_ns), self.is_create_notification(msg[0]))
+
+        await self.run_stream(endpoint, lambda: connect(endpoint, ping_interval=None), subscribe, read)
 
     @staticmethod
     def parse_create_event_log(base64_log: str) -> Optional[TokenCreationInfo]:
         try:
-            buffer = base64.b64decode(base64_log)
-            if len(buffer) < 8:
-                return None
-
-            offset = [8]  # Skip discriminator
-
-            def parse_string() -> str:
-                try:
-                    if offset[0] + 4 > len(buffer):
-                        return ""
-
-                    length = int.from_bytes(buffer[offset[0]:offset[0] + 4], 'little')
-                    if not (0 <= length <= 10000):  # 合理的字符串长度限制
-                        return ""
-
-                    offset[0] += 4
-                    if offset[0] + length > len(buffer):
-                        return ""
-
-                    string_data = buffer[offset[0]:offset[0] + length].decode('utf-8')
-                    offset[0] += length
-                    return string_data
-                except:
-                    return ""
-
-            def parse_public_key() -> Optional[str]:
-                try:
-                    if offset[0] + 32 > len(buffer):
-                        return None
-
-                    key_bytes = buffer[offset[0]:offset[0] + 32]
-                    offset[0] += 32
-                    return str(Pubkey(key_bytes))
-                except:
-                    return None
-
-            name = parse_string()
-            symbol = parse_string()
-            _ = parse_string()  # uri
-            mint = parse_public_key()
-
-            if not all([name, symbol, mint]):
+            buffer = b64_to_bytes(base64_log)
+            event = decode_create(buffer) if buffer else None
+            if event is None:
                 return None
 
             return TokenCreationInfo(
-                name=name,
-                symbol=symbol,
-                mint=mint,
-                date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                name=event.name,
+                symbol=event.symbol,
+                mint=event.mint,
+                date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                uri=event.uri,
+                bonding_curve=event.bonding_curve,
+                user=event.user
             )
 
         except Exception as e:
             print(f"Error parsing create event log: {e}")
             return None
 
+    @staticmethod
+    def attach_dev_buy(token_info: TokenCreationInfo, logs: List[str]):
+        """
+        Copy the curve reserves after the creator's dev buy in the same transaction onto token_info
+        Args:
+            token_info: Parsed create event
+            logs: Log messages of the create transaction
+        """
+        # 同一交易可能有多笔买入，最后一笔成交后的储备才是上链后的曲线状态
+        for payload in reversed(find_trades(logs)):
+            buffer = b64_to_bytes(payload)
+            event = decode_trade(buffer) if buffer else None
+            if event is not None and event.mint == token_info.mint:
+                token_info.virtual_sol_reserves = event.virtual_sol_reserves
+                token_info.virtual_token_reserves = event.virtual_token_reserves
+                token_info.real_token_reserves = event.real_token_reserves
+                return
+
     def is_pump_token_creation(self, logs: List[str]) -> Optional[TokenCreationInfo]:
         try:
-            program_data_logs = [d for d in logs if len(d) > 200 and 'Program data:' in d]
-            if not program_data_logs:
+            # 只按前缀判断是否为创建事件，其它交易不做任何解码
+            payload = self.log_classifier.find_create(logs)
+            if payload is None:
                 return None
 
-            return self.parse_create_event_log(program_data_logs[0].split('Program data:')[1].strip())
+            token_info = self.parse_create_event_log(payload)
+            if token_info:
+                self.attach_dev_buy(token_info, logs)
+            return token_info
         except Exception as e:
             print(f"Error checking pump token creation: {e}")
             return None
 
 
+    def get_stats(self) -> Dict:
+        """监控指标"""
+        return {
+            'classifier': self.log_classifier.get_stats(),
+            'streams': self.stream_merger.get_stats(),
+            'health': {endpoint_label(url): health.to_dict() for url, health in self.stream_health.items()},
+            'callbacks': self.callback_runtime.get_stats(),
+            'ingest': self.ingest_queue.get_stats() if self.ingest_queue is not None else None,
+            'decode_pool': self.decode_pool.get_stats() if self.decode_pool is not None else None,
+            'backfill': self.backfiller.get_stats() if self.backfiller is not None else None,
+            'last_slot': self.last_slot
+        }
+
     def add_callback(self, callback: Callable):
         self.callbacks.append(callback)
 
@@ -325,39 +737,18 @@ class MonitorManager:
         Returns:
             Token information dictionary if successful
         """
-        token_info = {
-            'name': None,
-            'symbol': None,
-            'mint_address': None
-        }
-
-        for i, log in enumerate(logs):
-            if log.startswith('Program data:'):
-                try:
-                    data = log.split('Program data: ')[1]
-                    decoded = base64.b64decode(data)
-                    readable = ''.join(chr(c) if 32 <= c <= 126 else ' ' for c in decoded)
-                    parts = readable.split()
-                    for j, part in enumerate(parts):
-                        if j + 1 < len(parts):
-                            if len(part) >= 3:
-                                if token_info['name'] is None:
-                                    token_info['name'] = part
-                                elif token_info['symbol'] is None:
-                                    token_info['symbol'] = part
-                except:
-                    continue
-
-            elif "Create" in log and i > 0:
-                prev_log = logs[i - 1]
-                if "Invoking Token Program" in prev_log:
-                    words = log.split()
-                    for word in words:
-                        if len(word) >= 32:
-                            token_info['mint_address'] = word
-                            break
-
-        return token_info if all(token_info.values()) else None
+        for log in logs:
+            if not log.startswith(CREATE_EVENT_PREFIX):
+                continue
+            buffer = b64_to_bytes(log[PAYLOAD_OFFSET:])
+            event = decode_create(buffer) if buffer else None
+            if event is not None:
+                return {
+                    'name': event.name,
+                    'symbol': event.symbol,
+                    'mint_address': event.mint
+                }
+        return None
 
 
 if __name__ == '__main__':
@@ -0,0 +1,250 @@
+# utilities/position_ledger.py
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Optional, Tuple, List
+from solana.rpc.api import Client
+from solana.rpc.commitment import Confirmed
+from solana.rpc.types import TokenAccountOpts
+from solders.transaction_status import TransactionConfirmationStatus
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+# getSignatureStatuses 单次请求上限
+MAX_SIGNATURES_PER_REQUEST = 256
+# 超过 blockhash 有效期仍查不到的交易视为已丢弃
+PENDING_EXPIRY = 90.0
+# 达到这些确认级别才计入余额，对账也按同一级别读取
+SETTLED_STATUSES = (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)
+
+
+@dataclass
+class Position:
+    wallet: str
+    mint: str
+    balance: int = 0
+    pending: Dict[str, int] = field(default_factory=dict)  # 未确认交易签名 -> 代币变化量
+    sent_at: Dict[str, float] = field(default_factory=dict)  # 未确认交易签名 -> 发送时间
+    updated_at: float = 0.0
+    reconciled_at: float = 0.0
+
+    @property
+    def expected_balance(self) -> int:
+        """Confirmed balance plus every unconfirmed change"""
+        return max(0, self.balance + sum(self.pending.values()))
+
+
+class PositionLedger:
+    def __init__(self, data_dir: str, client: Client, reconcile_interval: float = 2.0,
+                 full_reconcile_interval: float = 30.0):
+        """
+        In-memory per-wallet, per-mint token balances
+        Args:
+            data_dir: Directory holding positions.json
+            client: RPC client used for background reconciliation
+            reconcile_interval: Seconds between signature confirmation checks
+            full_reconcile_interval: Seconds between balance checks against chain state
+        """
+        self.positions_file = os.path.join(data_dir, "positions.json")
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self.full_reconcile_interval = full_reconcile_interval
+
+        self._positions: Dict[Tuple[str, str], Position] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._loaded = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.reconciliations = 0
+        self.corrections = 0
+
+    def _get(self, wallet: str, mint: str) -> Position:
+        key = (wallet, mint)
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = Position(wallet=wallet, mint=mint)
+        return position
+
+    def record_buy(self, wallet: str, mint: str, token_amount: int, signature: str):
+        """记录已发送的买入，确认前计入 pending"""
+        with self._lock:
+            position = self._get(wallet, mint)
+            position.pending[signature] = token_amount
+            position.sent_at[signature] = position.updated_at = time.time()
+            self._dirty = True
+
+    def record_sell(self, wallet: str, mint: str, token_amount: int, signature: str):
+        """记录已发送的卖出，确认前计入 pending"""
+        with self._lock:
+            position = self._get(wallet, mint)
+            position.pending[signature] = -token_amount
+            position.sent_at[signature] = position.updated_at = time.time()
+            self._dirty = True
+
+    def set_balance(self, wallet: str, mint: str, balance: int):
+        """Overwrite the confirmed balance with chain state"""
+        with self._lock:
+            position = self._get(wallet, mint)
+            if position.balance != balance:
+                self.corrections += 1
+            position.balance = balance
+            position.reconciled_at = time.time()
+            self._dirty = True
+
+    def get_balance(self, wallet: str, mint: str) -> Optional[int]:
+        """
+        Expected token balance with no I/O
+        Returns:
+            Raw token amount, None if the ledger knows nothing about this position
+        """
+        position = self._positions.get((wallet, mint))
+        if position is None:
+            return None
+        return position.expected_balance
+
+    def get_positions(self) -> List[Position]:
+        with self._lock:
+            return [p for p in self._positions.values() if p.expected_balance > 0 or p.pending]
+
+    def remove(self, wallet: str, mint: str):
+        with self._lock:
+            self._positions.pop((wallet, mint), None)
+            self._dirty = True
+
+    def _drop_pending(self, position: Position, signature: str) -> int:
+        position.sent_at.pop(signature, None)
+        return position.pending.pop(signature)
+
+    def confirm_signatures(self):
+        """Move pending changes confirmed at SETTLED_STATUSES into the balance and drop failed ones"""
+        with self._lock:
+            pending = [(key, sig) for key, p in self._positions.items() for sig in p.pending]
+        for i in range(0, len(pending), MAX_SIGNATURES_PER_REQUEST):
+            chunk = pending[i:i + MAX_SIGNATURES_PER_REQUEST]
+            try:
+                statuses = self.client.get_signature_statuses(
+                    [Signature.from_string(sig) for _, sig in chunk]
+                ).value
+            except Exception as e:
+                print(f"Error confirming signatures: {e}")
+                continue
+
+            now = time.time()
+            with self._lock:
+                for (key, sig), status in zip(chunk, statuses):
+                    position = self._positions.get(key)
+                    if position is None or sig not in position.pending:
+                        continue
+                    if status is None:
+                        # 按该签名自己的发送时间判断，同一持仓的新交易不会延长旧交易的有效期
+                        if now - position.sent_at.get(sig, position.updated_at) > PENDING_EXPIRY:
+                            self._drop_pending(position, sig)
+                            self._dirty = True
+                        continue
+                    if status.err is not None:
+                        self._drop_pending(position, sig)
+                    elif status.confirmation_status in SETTLED_STATUSES:
+                        position.balance = max(0, position.balance + self._drop_pending(position, sig))
+                        # 刚结算的余额在最终确认窗口内不和链上对账
+                        position.reconciled_at = now
+                    else:
+                        continue
+                    self._dirty = True
+
+    def reconcile_balances(self):
+        """Compare every settled position with its on-chain token account, read at confirmed commitment"""
+        now = time.time()
+        with self._lock:
+            due = [(p, p.reconciled_at) for p in self._positions.values()
+                   if not p.pending and now - p.reconciled_at >= self.full_reconcile_interval]
+        for position, reconciled_at in due:
+            try:
+                token_accounts = self.client.get_token_accounts_by_owner(
+                    Pubkey.from_string(position.wallet),
+                    TokenAccountOpts(Pubkey.from_string(position.mint)),
+                    commitment=Confirmed
+                ).value
+                balance = int.from_bytes(token_accounts[0].account.data[64:72], 'little') if token_accounts else 0
+                self._apply_reconciled(position, reconciled_at, balance)
+            except Exception as e:
+                print(f"Error reconciling {position.mint} for {position.wallet}: {e}")
+        self.reconciliations += 1
+
+    def _apply_reconciled(self, position: Position, reconciled_at: float, balance: int):
+        """读取链上余额期间有新交易或新结算时放弃这次结果，下一轮再对账"""
+        key = (position.wallet, position.mint)
+        with self._lock:
+            if self._positions.get(key) is not position or position.pending \
+                    or position.reconciled_at != reconciled_at:
+                return
+            if position.balance != balance:
+                self.corrections += 1
+            position.balance = balance
+            position.reconciled_at = time.time()
+            if balance == 0:
+                del self._positions[key]
+            self._dirty = True
+
+    def load(self):
+        """从 positions.json 恢复持仓"""
+        with self._lock:
+            self._loaded = True
+            if not os.path.exists(self.positions_file):
+                return
+            try:
+                with open(self.positions_file, 'r') as f:
+                    records = json.load(f)
+                for record in records:
+                    position = Position(**record)
+                    self._positions[(position.wallet, position.mint)] = position
+            except Exception as e:
+                print(f"Error loading positions: {e}")
+
+    def save(self):
+        """写入 positions.json（先写临时文件再替换）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            records = [asdict(p) for p in self._positions.values()]
+            self._dirty = False
+        tmp_file = self.positions_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(records, f, indent=2)
+        os.replace(tmp_file, self.positions_file)
+
+    def start(self):
+        """启动后台对账线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        if not self._loaded:
+            self.load()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="position-ledger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.confirm_signatures()
+                self.reconcile_balances()
+                self.save()
+            except Exception as e:
+                print(f"Position ledger error: {e}")
+            self._stop_event.wait(self.reconcile_interval)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            positions = list(self._positions.values())
+        return {
+            'positions': len(positions),
+            'pending_signatures': sum(len(p.pending) for p in positions),
+            'reconciliations': self.reconciliations,
+            'corrections': self.corrections
+        }
@@ -1,37 +1,39 @@
 import traceback
-import time
-import os
-import json
 from solana.rpc.api import Client
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
-from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
-from solders.instruction import Instruction
 from solders.message import MessageV0
 from solders.transaction import VersionedTransaction
 from solana.rpc.types import TokenAccountOpts, TxOpts
-from spl.token.instructions import get_associated_token_address, create_associated_token_account
-import struct
-from solana.transaction import AccountMeta
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from .blockhash_service import get_blockhash_service
+from .instruction_templates import template_cache, derive_bonding_curve, compute_budget_instructions
+from .global_account import GlobalAccountCache
+from .bonding_curve import quote_buy, quote_sell, BuyQuote
+from .reserve_cache import reserve_cache
+from .position_ledger import PositionLedger
+from .latency_trace import SnipeTrace
+from .config_service import config_service
+from .retry import retry_scheduler, RetryableError, RetryError, COIN_DATA_POLICY, TOKEN_BALANCE_POLICY, SEND_POLICY
+from spl.token.instructions import get_associated_token_address
 
 # Constants
-GLOBAL = Pubkey.from_string("4wTV1YmiEkRvAtNtsSGPtUrqRYQMe5SKy2uB4Jjaxnjf")
-FEE_RECIPIENT = Pubkey.from_string("CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM")
-SYSTEM_PROGRAM = Pubkey.from_string("11111111111111111111111111111111")
-TOKEN_PROGRAM = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-PUMP_FUN_PROGRAM = Pubkey.from_string("6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P")
-RENT = Pubkey.from_string("SysvarRent111111111111111111111111111111111")
-EVENT_AUTHORITY = Pubkey.from_string("Ce6TQqeHC9p8KetsN6JsjHK7UTZk7nasjjnr7XxXp9F1")
-ASSOC_TOKEN_ACC_PROG = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+from .pump_constants import (
+    GLOBAL, FEE_RECIPIENT, SYSTEM_PROGRAM, TOKEN_PROGRAM, PUMP_FUN_PROGRAM, RENT, EVENT_AUTHORITY,
+    ASSOC_TOKEN_ACC_PROG, UNIT_BUDGET, UNIT_PRICE, LAMPORTS_PER_SOL
+)
 
 # Configuration
 RPC_URL = "https://staked.helius-rpc.com?api-key=bc8bd2ae-8330-4a02-9c98-2970d98545cd"
-UNIT_BUDGET = 100_000
-UNIT_PRICE = 333_333
+
+# getMultipleAccounts 单次请求的账户上限
+MAX_ACCOUNTS_PER_REQUEST = 100
 
 client = Client(RPC_URL)
+global_account_cache = GlobalAccountCache(client)
+position_ledger = PositionLedger('data', client)
 
 
 @dataclass
@@ -42,6 +44,30 @@ class CoinData:
     virtual_token_reserves: int
     virtual_sol_reserves: int
     complete: bool
+    real_token_reserves: Optional[int] = None
+
+
+def parse_bonding_curve_account(mint: Pubkey, bonding_curve: Pubkey, associated_bonding_curve: Pubkey,
+                                data: bytes) -> CoinData:
+    """
+    Parse bonding curve account data into CoinData
+    Args:
+        mint: Token mint
+        bonding_curve: Bonding curve address
+        associated_bonding_curve: Bonding curve token account
+        data: Raw account data
+    Returns:
+        CoinData
+    """
+    return CoinData(
+        mint=mint,
+        bonding_curve=bonding_curve,
+        associated_bonding_curve=associated_bonding_curve,
+        virtual_token_reserves=int.from_bytes(data[8:16], 'little'),
+        virtual_sol_reserves=int.from_bytes(data[16:24], 'little'),
+        complete=bool(data[-1]),
+        real_token_reserves=int.from_bytes(data[24:32], 'little')
+    )
 
 
 def get_coin_data(mint_str: str) -> Optional[CoinData]:
@@ -56,51 +82,243 @@ def get_coin_data(mint_str: str) -> Optional[CoinData]:
     try:
         mint = Pubkey.from_string(mint_str)
 
-        # Derive bonding curve address
-        bonding_curve, _ = Pubkey.find_program_address(
-            ["bonding-curve".encode(), bytes(mint)],
-            PUMP_FUN_PROGRAM
-        )
+        # Derive bonding curve address and its token account (cached per mint)
+        bonding_curve, associated_bonding_curve = derive_bonding_curve(mint)
 
-        # Get associated token account
-        associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
-
-        # Get account info
-        try:
+        def fetch():
             account_info = client.get_account_info(bonding_curve)
-        except Exception:
-            return get_coin_data(mint_str)
-
-        if not account_info:
-            return None
-
-        if not account_info.value:
-            time.sleep(1)
-            return get_coin_data(mint_str)
-        else:
-
-            # Parse account data
-            data = account_info.value.data
-            virtual_token_reserves = int.from_bytes(data[8:16], 'little')
-            virtual_sol_reserves = int.from_bytes(data[16:24], 'little')
-            complete = bool(data[-1])
-
-        return CoinData(
-            mint=mint,
-            bonding_curve=bonding_curve,
-            associated_bonding_curve=associated_bonding_curve,
-            virtual_token_reserves=virtual_token_reserves,
-            virtual_sol_reserves=virtual_sol_reserves,
-            complete=complete
-        )
+            if not account_info.value:
+                raise RetryableError(f"bonding curve {bonding_curve} not found")
+            return account_info.value.data
+
+        # Get account info, retrying until the curve account is visible or the deadline passes
+        data = retry_scheduler.call("get_coin_data", fetch, policy=COIN_DATA_POLICY, endpoint=RPC_URL)
+
+        # Parse account data
+        return parse_bonding_curve_account(mint, bonding_curve, associated_bonding_curve, data)
+    except RetryError as e:
+        print(f"get_coin_data error: {e}")
+        return None
     except Exception as e:
         print(f"get_coin_data error: {e}")
         traceback.print_exc()
         return None
 
 
-def buy_token(mint_str: str, keypair: Keypair, sol_amount: float = 0.01, slippage: int = 5) -> Tuple[
-    bool, Optional[str]]:
+def chunk_mints(mint_strs: List[str], size: int = MAX_ACCOUNTS_PER_REQUEST) -> List[List[str]]:
+    """Split mints into getMultipleAccounts sized chunks, dropping duplicates"""
+    unique = list(dict.fromkeys(mint_strs))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def parse_multiple_coin_data(mint_strs: List[str], accounts: list) -> Dict[str, Optional[CoinData]]:
+    """
+    Pair a getMultipleAccounts result with the mints it was requested for
+    Args:
+        mint_strs: Mint addresses in request order
+        accounts: Account values returned by getMultipleAccounts
+    Returns:
+        Dict of mint address to CoinData, None where the curve account does not exist
+    """
+    result = {}
+    for mint_str, account in zip(mint_strs, accounts):
+        if account is None:
+            result[mint_str] = None
+            continue
+        mint = Pubkey.from_string(mint_str)
+        bonding_curve, associated_bonding_curve = derive_bonding_curve(mint)
+        result[mint_str] = parse_bonding_curve_account(mint, bonding_curve, associated_bonding_curve, account.data)
+    return result
+
+
+def get_multiple_coin_data(mint_strs: List[str], max_workers: int = 4) -> Dict[str, Optional[CoinData]]:
+    """
+    Get coin data for many mints with getMultipleAccounts
+    Args:
+        mint_strs: Token mint addresses
+        max_workers: Chunks fetched in parallel
+    Returns:
+        Dict of mint address to CoinData, None where missing or failed
+    """
+    def fetch_chunk(chunk: List[str]) -> Dict[str, Optional[CoinData]]:
+        try:
+            curves = [derive_bonding_curve(Pubkey.from_string(m))[0] for m in chunk]
+            accounts = retry_scheduler.call("get_multiple_coin_data", lambda: client.get_multiple_accounts(curves).value,
+                                            policy=COIN_DATA_POLICY, endpoint=RPC_URL)
+            return parse_multiple_coin_data(chunk, accounts)
+        except Exception as e:
+            print(f"get_multiple_coin_data error: {e}")
+            return {m: None for m in chunk}
+
+    chunks = chunk_mints(mint_strs)
+    result = {}
+    if len(chunks) == 1:
+        result.update(fetch_chunk(chunks[0]))
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_result in executor.map(fetch_chunk, chunks):
+                result.update(chunk_result)
+    return result
+
+
+def estimate_sell_value(coin_data: CoinData, amount: int) -> int:
+    """Lamports received for selling amount tokens against the curve, after fees"""
+    return quote_sell(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, amount, 0,
+                      global_account_cache.get().fee_basis_points).net_sol
+
+
+def coin_data_from_create_event(mint_str: str, bonding_curve_str: Optional[str] = None,
+                                virtual_sol_reserves: Optional[int] = None,
+                                virtual_token_reserves: Optional[int] = None,
+                                real_token_reserves: Optional[int] = None) -> CoinData:
+    """
+    Build CoinData for a freshly created token without any RPC call
+    Args:
+        mint_str: Token mint address from the create event
+        bonding_curve_str: Bonding curve address from the create event, derived if None
+        virtual_sol_reserves: Reserves after the creator's dev buy (TradeEvent in the create transaction)
+        virtual_token_reserves: Reserves after the creator's dev buy
+        real_token_reserves: Reserves after the creator's dev buy, derived from the virtual reserves if None
+    Returns:
+        CoinData with the dev buy reserves, or the initial virtual reserves from the cached Global account
+        when the create transaction had no buy
+    """
+    mint = Pubkey.from_string(mint_str)
+    if bonding_curve_str:
+        bonding_curve = Pubkey.from_string(bonding_curve_str)
+        associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
+    else:
+        bonding_curve, associated_bonding_curve = derive_bonding_curve(mint)
+
+    global_account = global_account_cache.get()
+    if virtual_sol_reserves is None or virtual_token_reserves is None:
+        virtual_sol_reserves = global_account.initial_virtual_sol_reserves
+        virtual_token_reserves = global_account.initial_virtual_token_reserves
+        real_token_reserves = global_account.initial_real_token_reserves
+    elif real_token_reserves is None:
+        # 旧版程序的 TradeEvent 不带真实储备，买走的代币数量在虚拟和真实储备上相同
+        real_token_reserves = global_account.initial_real_token_reserves - (
+            global_account.initial_virtual_token_reserves - virtual_token_reserves)
+    return CoinData(
+        mint=mint,
+        bonding_curve=bonding_curve,
+        associated_bonding_curve=associated_bonding_curve,
+        virtual_token_reserves=virtual_token_reserves,
+        virtual_sol_reserves=virtual_sol_reserves,
+        complete=False,
+        real_token_reserves=real_token_reserves
+    )
+
+
+def get_token_balance(owner: Pubkey, mint: Pubkey) -> int:
+    """
+    Raw token balance of owner for mint
+    Raises:
+        RetryableError: If the token account does not exist yet
+    """
+    token_accounts = client.get_token_accounts_by_owner(owner, TokenAccountOpts(mint)).value
+    if not token_accounts:
+        raise RetryableError(f"no {mint} token account for {owner}")
+    return int.from_bytes(token_accounts[0].account.data[64:72], 'little')
+
+
+def load_gas_fee() -> float:
+    """配置快照中的 gasFee 倍数"""
+    return config_service.get().gas_fee
+
+
+def build_buy_transaction(keypair: Keypair, coin_data: CoinData, sol_amount: float, slippage: int,
+                          gas_fee: float, trace: Optional[SnipeTrace] = None) -> Tuple[VersionedTransaction, BuyQuote]:
+    """
+    Build and sign a buy transaction without any network I/O
+    Args:
+        keypair: Keypair of the buyer
+        coin_data: Bonding curve state
+        sol_amount: Amount of SOL to spend
+        slippage: Slippage tolerance percentage
+        gas_fee: Compute unit price multiplier
+        trace: Snipe trace receiving build, blockhash and sign marks
+    Returns:
+        Tuple of (signed VersionedTransaction, BuyQuote it was built from)
+    """
+    # Calculate amounts with exact curve math
+    quote = quote_buy(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves,
+                      int(sol_amount * LAMPORTS_PER_SOL), slippage, global_account_cache.get().fee_basis_points,
+                      coin_data.real_token_reserves)
+
+    # Only the amount fields change between buys of the same (wallet, mint)
+    template = template_cache.get(keypair.pubkey(), coin_data.mint, coin_data.bonding_curve,
+                                  coin_data.associated_bonding_curve)
+    swap_ix = template.buy_instruction(quote.token_amount, quote.max_sol_cost)
+    if trace:
+        trace.mark('build')
+
+    # Get recent blockhash (served from memory by the background refresher)
+    blockhash = get_blockhash_service().get_blockhash()
+    if trace:
+        trace.mark('blockhash')
+
+    # Create and compile message
+    message = MessageV0.try_compile(
+        keypair.pubkey(),
+        [
+            *compute_budget_instructions(gas_fee),
+            template.create_ata_ix,
+            swap_ix
+        ],
+        [],
+        blockhash
+    )
+
+    # Create and sign transaction
+    tx = VersionedTransaction(message, [keypair])
+    if trace:
+        trace.mark('sign')
+    return tx, quote
+
+
+def build_sell_transaction(keypair: Keypair, coin_data: CoinData, amount: int, slippage: int,
+                           gas_fee: float) -> VersionedTransaction:
+    """
+    Build and sign a sell transaction without any network I/O
+    Args:
+        keypair: Keypair of the seller
+        coin_data: Bonding curve state
+        amount: Token amount to sell (raw units)
+        slippage: Slippage tolerance percentage
+        gas_fee: Compute unit price multiplier
+    Returns:
+        Signed VersionedTransaction
+    """
+    # Calculate minimum SOL output with exact curve math
+    quote = quote_sell(coin_data.virtual_sol_reserves, coin_data.virtual_token_reserves, amount, slippage,
+                       global_account_cache.get().fee_basis_points)
+
+    # Create swap instruction
+    template = template_cache.get(keypair.pubkey(), coin_data.mint, coin_data.bonding_curve,
+                                  coin_data.associated_bonding_curve)
+    swap_ix = template.sell_instruction(amount, quote.min_sol_output)
+
+    # Get recent blockhash (served from memory by the background refresher)
+    blockhash = get_blockhash_service().get_blockhash()
+
+    # Create and compile message
+    message = MessageV0.try_compile(
+        keypair.pubkey(),
+        [
+            *compute_budget_instructions(gas_fee),
+            swap_ix
+        ],
+        [],
+        blockhash
+    )
+
+    # Create and sign transaction
+    return VersionedTransaction(message, [keypair])
+
+
+def buy_token(mint_str: str, keypair: Keypair, sol_amount: float = 0.01, slippage: int = 5,
+              coin_data: Optional[CoinData] = None, trace: Optional[SnipeTrace] = None) -> Tuple[bool, Optional[str]]:
     """
     Buy token from the Pump.fun platform
     Args:
@@ -108,102 +326,30 @@ def buy_token(mint_str: str, keypair: Keypair, sol_amount: float = 0.01, slippag
         keypair: Keypair of the buyer
         sol_amount: Amount of SOL to spend
         slippage: Slippage tolerance percentage
+        coin_data: Known curve state (e.g. from the create event), fetched over RPC if None
+        trace: Snipe trace receiving per-stage marks
     Returns:
         Tuple of (success: bool, transaction_signature: Optional[str])
     """
     try:
-        # print(f"Buying token {mint_str} with wallet {keypair.pubkey()}")
-        # ... 其他代码保持不变，但把所有 keypair 替换为 keypair ...
-
         # Get coin data
-        coin_data = get_coin_data(mint_str)
+        if coin_data is None:
+            coin_data = get_coin_data(mint_str)
         if not coin_data:
             print("Invalid token or token has completed bonding")
             return False, None
 
-        # Calculate amounts
-        sol_lamports = int(sol_amount * 1e18)  # Convert to lamports
-        amount = sol_lamports
-        slippage_adjusted = int(sol_lamports * (1 + slippage / 100))
-
-        # print(f"Amount (lamports): {amount}")
-        # print(f"Max sol cost (lamports): {slippage_adjusted}")
-        # print(f"Virtual sol reserves: {coin_data.virtual_sol_reserves}")
-        # print(f"Virtual token reserves: {coin_data.virtual_token_reserves}")
-
-        # Get or create associated token account
-        user_ata = get_associated_token_address(keypair.pubkey(), coin_data.mint)
-        create_ata_ix = None
-
-        # try:
-        #     client.get_token_accounts_by_owner(keypair.pubkey(), TokenAccountOpts(coin_data.mint))
-        # except:
-        #     create_ata_ix = create_associated_token_account(
-        #         keypair.pubkey(),
-        #         keypair.pubkey(),
-        #         coin_data.mint
-        #     )
-        create_ata_ix = create_associated_token_account(
-            keypair.pubkey(),
-            keypair.pubkey(),
-            coin_data.mint
-        )
-
-        # Create account metas
-        keys = [
-            AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=FEE_RECIPIENT, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=coin_data.mint, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=coin_data.bonding_curve, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=coin_data.associated_bonding_curve, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=user_ata, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=keypair.pubkey(), is_signer=True, is_writable=True),
-            AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=TOKEN_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=RENT, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_PROGRAM, is_signer=False, is_writable=False)
-        ]
-
-        # Create instruction data
-        data = bytearray(bytes.fromhex("66063d1201daebea"))  # buy instruction discriminator
-        data.extend(struct.pack("<Q",
-                                int(coin_data.virtual_token_reserves / coin_data.virtual_sol_reserves * 10 ** 10 * amount / 10e18)))
-        data.extend(struct.pack("<Q", int(amount * 1.1)))
-
-        # Create swap instruction
-        swap_ix = Instruction(PUMP_FUN_PROGRAM, bytes(data), keys)
-
-        with open(os.path.join('data', "config.json"), 'r') as f:
-            config = json.load(f)
-
-        # Create instructions list
-        instructions = [
-            set_compute_unit_limit(UNIT_BUDGET),
-            set_compute_unit_price(UNIT_PRICE * config['gasFee'])
-        ]
-
-        if create_ata_ix:
-            instructions.append(create_ata_ix)
-        instructions.append(swap_ix)
-
-        # Get recent blockhash
-        blockhash = client.get_latest_blockhash().value.blockhash
-
-        # Create and compile message
-        message = MessageV0.try_compile(
-            keypair.pubkey(),
-            instructions,
-            [],
-            blockhash
-        )
-
-        # Create and sign transaction
-        tx = VersionedTransaction(message, [keypair])
+        tx, quote = build_buy_transaction(keypair, coin_data, sol_amount, slippage, load_gas_fee(), trace)
 
         # Send transaction
-        sig = client.send_transaction(tx, opts=TxOpts(skip_preflight=True)).value
+        try:
+            sig = client.send_transaction(tx, opts=TxOpts(skip_preflight=True)).value
+        finally:
+            # 发送失败也计入发送阶段的延迟
+            if trace:
+                trace.mark('send')
         # print(f"Buy transaction sent: {sig}")
+        position_ledger.record_buy(str(keypair.pubkey()), mint_str, quote.token_amount, str(sig))
 
         return True, str(sig)
 
@@ -227,98 +373,42 @@ def sell_token(mint_str: str, keypair: Keypair, percentage: int = 100, slippage:
         print(f"Selling {percentage}% of token {mint_str}")
         print(f"Slippage: {slippage}%")
 
-        # Get coin data
-        coin_data = get_coin_data(mint_str)
+        # Get coin data, from the subscription-fed cache when fresh
+        coin_data = reserve_cache.get(mint_str) or get_coin_data(mint_str)
         if not coin_data:
             print("Invalid token or token has completed bonding")
             return False, None
 
-        # Get token balance
-        user_ata = get_associated_token_address(keypair.pubkey(), coin_data.mint)
-        token_account = client.get_token_accounts_by_owner(
-            keypair.pubkey(),
-            TokenAccountOpts(coin_data.mint)
-        ).value
-        if len(token_account) == 0:
-            return sell_token(mint_str, keypair, percentage, slippage)
-        else:
-            token_account = token_account[0]
+        # Get token balance from the ledger, or wait for the token account to become visible
+        balance = position_ledger.get_balance(str(keypair.pubkey()), mint_str)
+        if not balance:
+            balance = retry_scheduler.call("get_token_balance", get_token_balance, keypair.pubkey(), coin_data.mint,
+                                           policy=TOKEN_BALANCE_POLICY, endpoint=RPC_URL)
 
         # Calculate amount to sell
-        data = token_account.account.data
-        balance = int.from_bytes(data[64:72], 'little')
         amount = int(balance * percentage / 100)
 
         if amount == 0:
             print("No tokens to sell")
             return False, None
 
-        # Calculate minimum SOL output
-        virtual_sol = coin_data.virtual_sol_reserves / 1e9
-        virtual_tokens = coin_data.virtual_token_reserves / 1e6
-        expected_sol = (virtual_sol * amount) / (virtual_tokens + amount)
-        min_sol = int(expected_sol * (1 - slippage / 100) * 1e9)
-
-        # print(f"Amount to sell: {amount}")
-        # print(f"Expected SOL: {expected_sol}")
-        # print(f"Minimum SOL: {min_sol}")
-
-        # Create account metas
-        keys = [
-            AccountMeta(pubkey=GLOBAL, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=FEE_RECIPIENT, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=coin_data.mint, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=coin_data.bonding_curve, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=coin_data.associated_bonding_curve, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=user_ata, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=keypair.pubkey(), is_signer=True, is_writable=True),
-            AccountMeta(pubkey=SYSTEM_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=ASSOC_TOKEN_ACC_PROG, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=TOKEN_PROGRAM, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_PROGRAM, is_signer=False, is_writable=False)
-        ]
-
-        # Create instruction data
-        data = bytearray(bytes.fromhex("33e685a4017f83ad"))  # sell instruction discriminator
-        data.extend(struct.pack("<Q", amount))
-        data.extend(struct.pack("<Q", 1))
-
-        # Create swap instruction
-        swap_ix = Instruction(PUMP_FUN_PROGRAM, bytes(data), keys)
-
-        # Get recent blockhash
-        blockhash = client.get_latest_blockhash().value.blockhash
-
-        with open(os.path.join('data', "config.json"), 'r') as f:
-            config = json.load(f)
-
-        # Create and compile message
-        message = MessageV0.try_compile(
-            keypair.pubkey(),
-            [
-                set_compute_unit_limit(UNIT_BUDGET),
-                set_compute_unit_price(UNIT_PRICE * config['gasFee']),
-                swap_ix
-            ],
-            [],
-            blockhash
-        )
-
-        # Create and sign transaction
-        tx = VersionedTransaction(message, [keypair])
+        tx = build_sell_transaction(keypair, coin_data, amount, slippage, load_gas_fee())
 
-        # Send transaction
-        sig = client.send_transaction(tx, opts=TxOpts(skip_preflight=True)).value
+        # Send transaction, resending the same signed transaction on transport errors
+        sig = retry_scheduler.call("send_sell", client.send_transaction, tx, opts=TxOpts(skip_preflight=True),
+                                   policy=SEND_POLICY, endpoint=RPC_URL).value
         print(f"Sell transaction sent: {sig}")
+        position_ledger.record_sell(str(keypair.pubkey()), mint_str, amount, str(sig))
 
         return True, str(sig)
 
+    except RetryError as e:
+        print(f"Error during sell: {e}")
+        return False, None
     except Exception as e:
         print(f"Error during sell: {e}")
         traceback.print_exc()
-        return sell_token(mint_str, keypair, percentage, slippage)
-        # return False, None
+        return False, None
 
 
 # Example usage
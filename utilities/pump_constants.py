@@ -0,0 +1,22 @@
+# utilities/pump_constants.py
+from solders.pubkey import Pubkey
+
+# Pump.fun program accounts
+GLOBAL = Pubkey.from_string("4wTV1YmiEkRvAtNtsSGPtUrqRYQMe5SKy2uB4Jjaxnjf")
+FEE_RECIPIENT = Pubkey.from_string("CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM")
+SYSTEM_PROGRAM = Pubkey.from_string("11111111111111111111111111111111")
+TOKEN_PROGRAM = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+PUMP_FUN_PROGRAM = Pubkey.from_string("6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P")
+RENT = Pubkey.from_string("SysvarRent111111111111111111111111111111111")
+EVENT_AUTHORITY = Pubkey.from_string("Ce6TQqeHC9p8KetsN6JsjHK7UTZk7nasjjnr7XxXp9F1")
+ASSOC_TOKEN_ACC_PROG = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+
+# Instruction discriminators
+BUY_DISCRIMINATOR = bytes.fromhex("66063d1201daebea")
+SELL_DISCRIMINATOR = bytes.fromhex("33e685a4017f83ad")
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Transaction budget
+UNIT_BUDGET = 100_000
+UNIT_PRICE = 333_333
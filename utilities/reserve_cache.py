@@ -0,0 +1,99 @@
+# utilities/reserve_cache.py
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .pump import CoinData
+
+
+@dataclass
+class CachedReserves:
+    coin_data: "CoinData"
+    slot: int
+    updated_at: float
+    live: bool = False
+
+
+class ReserveCache:
+    def __init__(self, max_age: float = 2.0):
+        """
+        Bonding curve reserves kept current by account subscriptions
+        Args:
+            max_age: Seconds an entry stays usable once its subscription is no longer live
+        """
+        self.max_age = max_age
+        self._entries: Dict[str, CachedReserves] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.updates = 0
+
+    def update(self, mint: str, coin_data: "CoinData", slot: int, live: bool = True) -> bool:
+        """
+        Store reserves for mint unless an entry from a newer slot is already cached
+        Returns:
+            True if the entry was replaced
+        """
+        with self._lock:
+            entry = self._entries.get(mint)
+            if entry is not None and entry.slot > slot:
+                return False
+            self._entries[mint] = CachedReserves(coin_data, slot, time.monotonic(), live)
+            self.updates += 1
+            return True
+
+    def get(self, mint: str, max_age: Optional[float] = None) -> Optional["CoinData"]:
+        """
+        Cached reserves for mint
+        Returns:
+            CoinData if the subscription is live or the entry is recent enough, None otherwise
+        """
+        max_age = self.max_age if max_age is None else max_age
+        entry = self._entries.get(mint)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not entry.live and time.monotonic() - entry.updated_at > max_age:
+            self.stale += 1
+            return None
+        self.hits += 1
+        return entry.coin_data
+
+    def set_live(self, mint: str, live: bool):
+        with self._lock:
+            entry = self._entries.get(mint)
+            if entry is not None:
+                entry.live = live
+
+    def mark_all_stale(self):
+        """连接断开时调用，之后的读取按 max_age 判断"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.live = False
+
+    def remove(self, mint: str):
+        with self._lock:
+            self._entries.pop(mint, None)
+
+    def mints(self) -> List[str]:
+        return list(self._entries)
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        entries = list(self._entries.values())
+        return {
+            'entries': len(entries),
+            'live': sum(1 for e in entries if e.live),
+            'oldest_update_ms': round(max((now - e.updated_at for e in entries), default=0) * 1000, 3),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'updates': self.updates
+        }
+
+
+reserve_cache = ReserveCache()
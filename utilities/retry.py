@@ -0,0 +1,225 @@
+# utilities/retry.py
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Type, Any, Awaitable
+from .stream_merger import endpoint_label
+
+
+class RetryableError(Exception):
+    """Raised by an operation to request another attempt, e.g. an account that is not visible yet"""
+
+
+class RetryError(Exception):
+    def __init__(self, operation: str, reason: str, last_error: Optional[BaseException] = None):
+        super().__init__(f"{operation} failed ({reason}): {last_error}")
+        self.operation = operation
+        self.reason = reason
+        self.last_error = last_error
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    deadline: float = 10.0
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+    multiplier: float = 2.0
+    max_attempts: int = 20
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before the given retry (1-based)"""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 5.0, max_tokens: float = 50.0):
+        """
+        Token bucket limiting retries against one endpoint
+        Args:
+            ratio: Retry tokens earned per first attempt
+            min_per_second: Retry tokens refilled per second regardless of traffic
+            max_tokens: Bucket capacity
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_attempt(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class _OperationStats:
+    __slots__ = ('calls', 'successes', 'failures', 'retries', 'budget_denied', 'deadline_exceeded',
+                 'attempts_exhausted', 'total_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.budget_denied = 0
+        self.deadline_exceeded = 0
+        self.attempts_exhausted = 0
+        self.total_time = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'failures': self.failures,
+            'retries': self.retries,
+            'budget_denied': self.budget_denied,
+            'deadline_exceeded': self.deadline_exceeded,
+            'attempts_exhausted': self.attempts_exhausted,
+            'avg_ms': round(self.total_time / self.calls * 1000, 3) if self.calls else None
+        }
+
+
+class RetryScheduler:
+    def __init__(self, default_policy: Optional[RetryPolicy] = None):
+        """Shared retry engine with per-operation deadlines, jittered backoff and per-endpoint budgets"""
+        self.default_policy = default_policy or RetryPolicy()
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._stats: Dict[str, _OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def get_budget(self, endpoint: str) -> RetryBudget:
+        with self._lock:
+            budget = self._budgets.get(endpoint)
+            if budget is None:
+                budget = self._budgets[endpoint] = RetryBudget()
+            return budget
+
+    def _get_stats(self, operation: str) -> _OperationStats:
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = _OperationStats()
+            return stats
+
+    def _next_delay(self, operation: str, policy: RetryPolicy, budget: RetryBudget, attempt: int, start: float,
+                    error: BaseException) -> float:
+        """Decide whether another attempt is allowed; returns the delay or raises RetryError"""
+        stats = self._get_stats(operation)
+        if attempt >= policy.max_attempts:
+            stats.attempts_exhausted += 1
+            raise RetryError(operation, "attempts exhausted", error)
+
+        delay = policy.backoff(attempt)
+        if time.monotonic() + delay - start > policy.deadline:
+            stats.deadline_exceeded += 1
+            raise RetryError(operation, "deadline exceeded", error)
+
+        if not budget.try_spend():
+            stats.budget_denied += 1
+            raise RetryError(operation, "retry budget exhausted", error)
+
+        stats.retries += 1
+        return delay
+
+    def call(self, operation: str, fn: Callable[..., Any], *args, policy: Optional[RetryPolicy] = None,
+             endpoint: str = "default", retry_on: Tuple[Type[BaseException], ...] = (Exception,), **kwargs) -> Any:
+        """
+        Run fn with retries
+        Args:
+            operation: Name used for metrics
+            fn: Function to call
+            policy: Retry policy, default policy if None
+            endpoint: Key of the retry budget to charge
+            retry_on: Exception types that trigger a retry
+        Returns:
+            Result of fn
+        Raises:
+            RetryError: When the deadline, attempt limit or retry budget is exhausted
+        """
+        policy = policy or self.default_policy
+        budget = self.get_budget(endpoint)
+        stats = self._get_stats(operation)
+        stats.calls += 1
+        budget.record_attempt()
+        start = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    result = fn(*args, **kwargs)
+                    stats.successes += 1
+                    return result
+                except retry_on as e:
+                    time.sleep(self._next_delay(operation, policy, budget, attempt, start, e))
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            stats.total_time += time.monotonic() - start
+
+    async def call_async(self, operation: str, fn: Callable[..., Awaitable[Any]], *args,
+                         policy: Optional[RetryPolicy] = None, endpoint: str = "default",
+                         retry_on: Tuple[Type[BaseException], ...] = (Exception,), **kwargs) -> Any:
+        """Async version of call, fn is a coroutine function"""
+        policy = policy or self.default_policy
+        budget = self.get_budget(endpoint)
+        stats = self._get_stats(operation)
+        stats.calls += 1
+        budget.record_attempt()
+        start = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    result = await fn(*args, **kwargs)
+                    stats.successes += 1
+                    return result
+                except retry_on as e:
+                    await asyncio.sleep(self._next_delay(operation, policy, budget, attempt, start, e))
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            stats.total_time += time.monotonic() - start
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'operations': {name: stats.to_dict() for name, stats in self._stats.items()},
+                # 预算按 RPC URL 区分，URL 中可能带 API key，输出时只显示端点标签
+                'budgets': {endpoint_label(endpoint) if '://' in endpoint else endpoint: round(budget.tokens, 2)
+                            for endpoint, budget in self._budgets.items()}
+            }
+
+
+# 各类操作的默认策略
+COIN_DATA_POLICY = RetryPolicy(deadline=10.0, base_delay=0.2, max_delay=1.0)
+TOKEN_BALANCE_POLICY = RetryPolicy(deadline=30.0, base_delay=0.5, max_delay=2.0)
+SEND_POLICY = RetryPolicy(deadline=5.0, base_delay=0.1, max_delay=0.5, max_attempts=3)
+
+retry_scheduler = RetryScheduler()
@@ -0,0 +1,218 @@
+# utilities/sell_scheduler.py
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class PendingSell:
+    mint: str
+    wallets: List[str]
+    percentage: float
+    due: float  # Unix 时间
+    bonding_curve: Optional[str] = None
+    created: float = field(default_factory=time.time)
+
+
+# 卖出执行函数: (mint, 钱包列表, 百分比, bonding_curve) -> 协程
+SellHandler = Callable[[str, List[str], float, Optional[str]], Awaitable]
+# 把协程函数交给其它事件循环执行: (协程函数, *参数) -> 是否已接收
+SellDispatcher = Callable[..., bool]
+
+
+class SellScheduler:
+    def __init__(self, data_dir: str):
+        """
+        One deadline heap owning every pending delayed sell; sells of the same mint already due when the
+        scheduler wakes up are sent as one batch
+        Args:
+            data_dir: Directory holding pending_sells.json
+        """
+        self.pending_file = os.path.join(data_dir, "pending_sells.json")
+        self._heap: List[Tuple[float, int, PendingSell]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task = None
+        self._handler: Optional[SellHandler] = None
+        self._dispatch: Optional[SellDispatcher] = None
+        self._running = set()
+
+        self.scheduled = 0
+        self.fired = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+
+    def schedule(self, mint: str, wallets: List[str], percentage: float, delay: float,
+                 bonding_curve: Optional[str] = None) -> PendingSell:
+        """
+        Queue a sell of mint from wallets delay seconds from now, callable from any thread
+        Args:
+            mint: Token mint address
+            wallets: Seller wallet pubkeys
+            percentage: Percentage of each wallet's balance to sell
+            delay: Seconds until the sell is due
+            bonding_curve: Bonding curve address, passed through to the handler
+        """
+        if not self._loaded:
+            self.load()
+        entry = PendingSell(mint=mint, wallets=list(wallets), percentage=percentage, due=time.time() + delay,
+                            bonding_curve=bonding_curve)
+        with self._lock:
+            heapq.heappush(self._heap, (entry.due, next(self._seq), entry))
+            self.scheduled += 1
+        self.save()
+        self._notify()
+        return entry
+
+    def _notify(self):
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self, handler: SellHandler, dispatch: Optional[SellDispatcher] = None):
+        """
+        Run the scheduler on the calling event loop, overdue sells restored from disk fire immediately
+        Args:
+            handler: Coroutine function executing one batch: handler(mint, wallets, percentage, bonding_curve)
+            dispatch: Runs batches elsewhere, e.g. CallbackRuntime.dispatch, so that selling and its file I/O
+                      stay off the scheduler's loop; batches run on that loop if None or if dispatch refuses
+        """
+        loop = asyncio.get_running_loop()
+        self._handler = handler
+        self._dispatch = dispatch
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        if not self._loaded:
+            self.load()
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._task = None
+
+    def _pop_due(self) -> Tuple[Optional[float], List[PendingSell]]:
+        """已到期的条目，以及下一个截止时间；不提前执行未到期的卖出"""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+            next_due = self._heap[0][0] if self._heap else None
+        return next_due, due
+
+    async def _run(self):
+        while True:
+            # 先清除唤醒标记再检查堆，避免丢失调度期间的通知
+            self._wakeup.clear()
+            next_due, due = self._pop_due()
+            if not due:
+                timeout = None if next_due is None else max(0.0, next_due - time.time())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # 先持久化再执行：进程在卖出途中退出时不会重复卖出
+            self.save()
+            self._fire(due)
+
+    def _fire(self, entries: List[PendingSell]):
+        now = time.time()
+        batches: Dict[Tuple[str, float], List[PendingSell]] = {}
+        for entry in entries:
+            lateness = max(0.0, now - entry.due)
+            self.lateness_total += lateness
+            self.lateness_max = max(self.lateness_max, lateness)
+            batches.setdefault((entry.mint, entry.percentage), []).append(entry)
+        self.fired += len(entries)
+        self.batches += len(batches)
+        self.coalesced += len(entries) - len(batches)
+
+        async def run(mint: str, percentage: float, group: List[PendingSell]):
+            wallets = list(dict.fromkeys(wallet for entry in group for wallet in entry.wallets))
+            try:
+                await self._handler(mint, wallets, percentage, group[0].bonding_curve)
+            except Exception as e:
+                # 批次可能在回调线程上执行
+                with self._lock:
+                    self.errors += 1
+                print(f"Scheduled sell of {mint} failed: {e}")
+
+        # 不同代币的批次并发执行，不阻塞后续到期的卖出
+        for (mint, percentage), group in batches.items():
+            if self._dispatch is not None and self._dispatch(run, mint, percentage, group):
+                continue
+            task = asyncio.create_task(run(mint, percentage, group))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def get_pending(self) -> List[PendingSell]:
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap)]
+
+    def load(self):
+        """从 pending_sells.json 恢复未执行的卖出"""
+        with self._lock:
+            self._loaded = True
+            if not os.path.exists(self.pending_file):
+                return
+            try:
+                with open(self.pending_file, 'r') as f:
+                    records = json.load(f)
+                for record in records:
+                    entry = PendingSell(**record)
+                    heapq.heappush(self._heap, (entry.due, next(self._seq), entry))
+            except Exception as e:
+                print(f"Error loading pending sells: {e}")
+
+    def save(self):
+        """写入 pending_sells.json（先写临时文件再替换）"""
+        # 调度可能来自多个线程，写文件串行进行，每次写入当时最新的堆
+        with self._save_lock:
+            with self._lock:
+                records = [asdict(entry) for _, _, entry in self._heap]
+            try:
+                os.makedirs(os.path.dirname(self.pending_file) or '.', exist_ok=True)
+                tmp_file = self.pending_file + ".tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(records, f, indent=2)
+                os.replace(tmp_file, self.pending_file)
+            except Exception as e:
+                print(f"Error saving pending sells: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._heap)
+            next_due = self._heap[0][0] if self._heap else None
+        return {
+            'pending': pending,
+            'next_due_in_s': round(next_due - time.time(), 3) if next_due is not None else None,
+            'running': self._task is not None and not self._task.done(),
+            'in_flight': len(self._running),
+            'scheduled': self.scheduled,
+            'fired': self.fired,
+            'batches': self.batches,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'avg_lateness_ms': round(self.lateness_total / self.fired * 1000, 3) if self.fired else None,
+            'max_lateness_ms': round(self.lateness_max * 1000, 3)
+        }
+
+
+sell_scheduler = SellScheduler('data')
@@ -0,0 +1,84 @@
+# utilities/signature_dedupe.py
+import sys
+import time
+from array import array
+from typing import Dict, Hashable, Optional
+
+_EMPTY = 0.0
+# 索引表中每条记录的哈希和槽位两个 int 对象大小
+_ENTRY_OBJECT_BYTES = 64
+
+
+class SignatureDeduper:
+    def __init__(self, capacity: int = 65_536, window: float = 120.0):
+        """
+        Fixed-memory, time-windowed set of recently seen transaction signatures
+        Args:
+            capacity: Signatures held in the ring, the oldest is evicted when full
+            window: Seconds a signature counts as a duplicate after it was first seen
+        """
+        self.capacity = capacity
+        self.window = window
+        # 环形缓冲区保存 64 位签名哈希和首次出现时间，索引表只保存哈希 -> 槽位
+        self._keys = array('q', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._index: Dict[int, int] = {}
+        self._head = 0
+
+        self.checks = 0
+        self.hits = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def check(self, signature: Hashable) -> Optional[float]:
+        """
+        Look up signature and record it if it is new
+        Returns:
+            Monotonic time the signature was first seen if it is a duplicate, None otherwise
+        """
+        now = time.monotonic()
+        key = hash(signature)
+        self.checks += 1
+
+        slot = self._index.get(key)
+        if slot is not None:
+            first_seen = self._times[slot]
+            if now - first_seen <= self.window:
+                self.hits += 1
+                return first_seen
+            self.expired += 1
+
+        slot = self._head
+        if self._times[slot] != _EMPTY:
+            old_key = self._keys[slot]
+            if self._index.get(old_key) == slot:
+                del self._index[old_key]
+            self.evictions += 1
+        self._keys[slot] = key
+        self._times[slot] = now
+        self._index[key] = slot
+        self._head = (slot + 1) % self.capacity
+        return None
+
+    def seen(self, signature: Hashable) -> bool:
+        """Whether signature was recorded within the window, without recording it"""
+        slot = self._index.get(hash(signature))
+        return slot is not None and time.monotonic() - self._times[slot] <= self.window
+
+    def memory_bytes(self) -> int:
+        """Estimated footprint of the ring and the index"""
+        return (self._keys.itemsize * len(self._keys) + self._times.itemsize * len(self._times)
+                + sys.getsizeof(self._index) + len(self._index) * _ENTRY_OBJECT_BYTES)
+
+    def get_stats(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'window_s': self.window,
+            'entries': len(self._index),
+            'checks': self.checks,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.checks, 4) if self.checks else None,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'memory_bytes': self.memory_bytes()
+        }
@@ -3,12 +3,18 @@ from .monitor_manager import MonitorManager, TokenCreationInfo
 from .wallet_manager import WalletManager
 from datetime import datetime
 import asyncio
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List
 import json
 import os
-from .pump import buy_token, sell_token
+from .pump import coin_data_from_create_event, global_account_cache, position_ledger
+from .async_pump import get_async_pump_client, get_client_options, close_async_pump_client
+from .buy_fanout import fan_out_buys
+from .blockhash_service import get_blockhash_service
+from .latency_trace import latency_tracer
+from .config_service import config_service
+from .sell_scheduler import sell_scheduler
+from .token_filter import token_filter
 import threading
-from solders.keypair import Keypair
 
 class SniperManager:
     def __init__(self, data_dir: str, monitor_manager: MonitorManager, wallet_manager: WalletManager):
@@ -22,6 +28,8 @@ class SniperManager:
         self.stop_event = threading.Event()
         self.thread = None
         self.sniper_is_running = False
+        # 过滤规则随配置快照重新编译；只在这里注册一次，重复启动狙击器不会叠加监听器
+        config_service.add_listener(self.apply_config)
 
         # 初始化状态文件如果不存在
         if not os.path.exists(self.status_file):
@@ -33,6 +41,11 @@ class SniperManager:
     def get_status(self) -> bool:
         return self.sniper_is_running
 
+    @staticmethod
+    def apply_config(config):
+        """配置快照替换后更新由配置派生的状态"""
+        token_filter.set_rules(config.token_filter)
+
     @staticmethod
     def sniper_thread_func(stop_event: threading.Event, data_dir: str, monitor_manager: MonitorManager,
                            wallet_manager: WalletManager):
@@ -45,18 +58,25 @@ class SniperManager:
             asyncio.set_event_loop(loop)
 
             async def handle_token_creation(token_info: TokenCreationInfo, creation_tx: str):
+                trace = token_info.trace
+                if trace:
+                    trace.mark('dispatch')
+                # 编译好的过滤规则最先执行，不匹配的代币不做任何配置、密钥或 RPC 处理
+                passed, _ = token_filter.evaluate(token_info)
+                if not passed:
+                    latency_tracer.finish(trace, 'filtered')
+                    return
+                if trace:
+                    trace.mark('filter')
+                # 内存中的配置快照，不读文件
+                config = config_service.get()
                 try:
-                    # 加载配置
                     print('买')
-                    with open(os.path.join(data_dir, "config.json"), 'r') as f:
-                        config = json.load(f)
-
-                    # with open(os.path.join(data_dir, "contracts.json"), 'r') as f:
-                    #     contracts = json.load(f)
-
-                    # 检查是否应该监控这个代币
-                    # if contracts and token_info.mint not in contracts:
-                    #     return
+                    # 重连后补回的代币已上链一段时间，超过设定时长不再买入
+                    if token_info.age is not None and token_info.age > config.backfill_max_age:
+                        print(f"跳过补回的代币 {token_info.symbol}: 已创建 {token_info.age:.1f} 秒")
+                        latency_tracer.finish(trace, 'stale')
+                        return
 
                     # 获取可用钱包
                     wallets = wallet_manager.get_all_pubkeys()
@@ -68,87 +88,136 @@ class SniperManager:
                     print(f"代币铸造地址: {token_info.mint}")
                     print(f"创建交易: https://solscan.io/tx/{creation_tx}\n")
 
-                    if config['mode'] == 'single':
+                    pump_client = get_async_pump_client(**get_client_options(config))
+                    if token_info.age is None:
+                        # 直接使用创建交易中的数据（含开发者买入后的储备），买入路径不需要查询 RPC
+                        coin_data = coin_data_from_create_event(token_info.mint, token_info.bonding_curve,
+                                                                token_info.virtual_sol_reserves,
+                                                                token_info.virtual_token_reserves,
+                                                                token_info.real_token_reserves)
+                    else:
+                        # 补回的代币创建后已经有成交，按链上当前曲线报价
+                        coin_data = await pump_client.get_coin_data(token_info.mint)
+                        if coin_data is None or coin_data.complete:
+                            print(f"跳过补回的代币 {token_info.symbol}: 无法读取曲线或已完成")
+                            latency_tracer.finish(trace, 'stale')
+                            return
+
+                    if config.mode == 'single':
                         # 获取第一个钱包的密钥对
                         keypair = wallet_manager.get_keypair(wallets[0])
                         if not keypair:
                             print("无法获取钱包密钥对")
                             return
+                        if trace:
+                            trace.mark('config_keypair')
 
-                        success, buy_tx = buy_token(token_info.mint, keypair, config['maxSolPerTrade'], 5)
+                        success, buy_tx = await pump_client.buy(token_info.mint, keypair, config.max_sol_per_trade, 5,
+                                                                coin_data, trace)
+                        latency_tracer.finish(trace, 'success' if success else 'failed')
                         if success and buy_tx:
                             # print(f"买入交易: https://solscan.io/tx/{buy_tx}")
+                            monitor_manager.watch_bonding_curve(token_info.mint, token_info.bonding_curve)
                             save_transaction(data_dir, {
                                 'type': '买入',
                                 'token': token_info.mint,
                                 'token_name': token_info.name,
                                 'token_symbol': token_info.symbol,
-                                'amount': config['maxSolPerTrade'],
+                                'amount': config.max_sol_per_trade,
                                 'status': '成功',
                                 'hash': buy_tx,
                                 'wallet': str(keypair.pubkey())
                             })
 
-                            # 延迟卖出
-                            if config['sellDelay'] > 0:
-                                await asyncio.sleep(config['sellDelay'])
-                                print('卖出')
-                                await delayed_sell(token_info.mint, keypair, config['sellPercentage'])
+                            # 延迟卖出交给调度器，回调不再占用事件循环等待
+                            if config.sell_delay > 0:
+                                sell_scheduler.schedule(token_info.mint, [str(keypair.pubkey())],
+                                                        config.sell_percentage, config.sell_delay,
+                                                        token_info.bonding_curve)
                     else:
-                        # 多钱包模式
-                        sell_tasks = []  # 存储所有卖出任务
-                        split_amount = config['maxSolPerTrade'] / len(wallets)
+                        # 多钱包模式：先解密所有钱包，再并发发送所有买入
+                        sell_wallets = []  # 需要延迟卖出的钱包
+                        split_amount = config.max_sol_per_trade / len(wallets)
 
+                        keypairs = []
                         for wallet_pubkey in wallets:
                             keypair = wallet_manager.get_keypair(wallet_pubkey)
                             if not keypair:
                                 print(f"无法获取钱包密钥对 {wallet_pubkey}")
                                 continue
+                            keypairs.append(keypair)
+                        if trace:
+                            trace.mark('config_keypair')
+
+                        fanout = await fan_out_buys(pump_client, coin_data, keypairs, split_amount, 5,
+                                                    config.gas_fee, config.max_parallel_buys, trace)
+                        latency_tracer.finish(trace, 'success' if fanout.successful else 'failed')
+                        print(f"多钱包买入统计: {fanout.summary()}")
+                        if fanout.successful:
+                            # 持仓期间通过账户订阅跟踪曲线储备
+                            monitor_manager.watch_bonding_curve(token_info.mint, token_info.bonding_curve)
+
+                        for wallet_result in fanout.results:
+                            if not wallet_result.success:
+                                print(f"钱包 {wallet_result.wallet} 买入失败: {wallet_result.error}")
+                                continue
+
+                            buy_tx = wallet_result.signature
+                            print(f"钱包 {wallet_result.wallet} 的买入交易: https://solscan.io/tx/{buy_tx}")
+                            save_transaction(data_dir, {
+                                'type': '买入',
+                                'token': token_info.mint,
+                                'token_name': token_info.name,
+                                'token_symbol': token_info.symbol,
+                                'amount': split_amount,
+                                'status': '成功',
+                                'hash': buy_tx,
+                                'wallet': wallet_result.wallet
+                            })
+
+                            if config.sell_delay > 0:
+                                sell_wallets.append(wallet_result.wallet)
 
-                            success, buy_tx = buy_token(token_info.mint, keypair, split_amount, 5)
-                            if success and buy_tx:
-                                print(f"钱包 {wallet_pubkey} 的买入交易: https://solscan.io/tx/{buy_tx}")
-                                save_transaction(data_dir, {
-                                    'type': '买入',
-                                    'token': token_info.mint,
-                                    'token_name': token_info.name,
-                                    'token_symbol': token_info.symbol,
-                                    'amount': split_amount,
-                                    'status': '成功',
-                                    'hash': buy_tx,
-                                    'wallet': str(keypair.pubkey())
-                                })
-
-                                # 为每个钱包创建延迟卖出任务
-                                if config['sellDelay'] > 0:
-                                    task = asyncio.create_task(
-                                        delayed_sell(token_info.mint, keypair, config['sellPercentage']))
-                                    sell_tasks.append(task)
-
-                        # 等待所有卖出任务完成
-                        if sell_tasks:
-                            await asyncio.gather(*sell_tasks)
+                        # 所有钱包一起延迟卖出，曲线状态只读取一次
+                        if sell_wallets:
+                            sell_scheduler.schedule(token_info.mint, sell_wallets, config.sell_percentage,
+                                                    config.sell_delay, token_info.bonding_curve)
                     print('结束')
 
                 except Exception as e:
+                    latency_tracer.finish(trace, 'error')
                     print(f"处理代币创建时出错: {e}")
                     save_transaction(data_dir, {
                         'type': '买入',
                         'token': token_info.mint,
                         'token_name': token_info.name,
                         'token_symbol': token_info.symbol,
-                        'amount': config['maxSolPerTrade'],
+                        'amount': config.max_sol_per_trade,
                         'status': '失败',
                         'error': str(e)
                     })
-
-            async def delayed_sell(token_mint: str, keypair: Keypair, percentage: float):
-                with open(os.path.join(data_dir, "config.json"), 'r') as f:
-                    config = json.load(f)
-
+                finally:
+                    # 没有钱包等提前返回的情况
+                    latency_tracer.finish(trace, 'skipped')
+
+            async def execute_sell(token_mint: str, wallets: List[str], percentage: float,
+                                   bonding_curve: Optional[str] = None):
+                """由 sell_scheduler 在到期时调用，同一代币已到期的钱包合并为一批"""
+                keypairs = [keypair for keypair in map(wallet_manager.get_keypair, wallets) if keypair]
+                if not keypairs:
+                    print(f"卖出 {token_mint} 时没有可用钱包")
+                    return
+                print('卖出')
                 try:
-                    await asyncio.sleep(config['sellDelay'])
-                    success, sell_tx = sell_token(token_mint, keypair, int(percentage))
+                    pump_client = get_async_pump_client(**get_client_options(config_service.get()))
+                    results = await pump_client.sell_many(token_mint, keypairs, int(percentage))
+                except Exception as e:
+                    print(f"延迟卖出时出错: {e}")
+                    results = [(False, str(e))] * len(keypairs)
+                if percentage >= 100:
+                    monitor_manager.unwatch_bonding_curve(token_mint)
+
+                for keypair, (success, sell_tx) in zip(keypairs, results):
                     if success and sell_tx:
                         print(f"钱包 {keypair.pubkey()} 的卖出交易: https://solscan.io/tx/{sell_tx}")
                         save_transaction(data_dir, {
@@ -159,19 +228,29 @@ class SniperManager:
                             'hash': sell_tx,
                             'wallet': str(keypair.pubkey())
                         })
-                except Exception as e:
-                    print(f"延迟卖出时出错: {e}")
-                    save_transaction(data_dir, {
-                        'type': '卖出',
-                        'token': token_mint,
-                        'amount': f"{percentage}%",
-                        'status': '失败',
-                        'error': str(e),
-                        'wallet': str(keypair.pubkey())
-                    })
+                    else:
+                        save_transaction(data_dir, {
+                            'type': '卖出',
+                            'token': token_mint,
+                            'amount': f"{percentage}%",
+                            'status': '失败',
+                            'error': sell_tx or '卖出失败',
+                            'wallet': str(keypair.pubkey())
+                        })
 
             async def run_monitor():
+                config = config_service.get()
+                # 可配置多个 websocket 端点同时订阅，取最先到达的推送
+                monitor_manager.set_endpoints(config.ws_endpoints)
+                monitor_manager.set_ingest_options(config.ingest_queue_size, config.ingest_policy)
+                monitor_manager.set_decode_workers(config.decode_workers)
+                monitor_manager.set_backfill_options(config.backfill_gaps, config.backfill_max_signatures,
+                                                     config.backfill_concurrency)
+                monitor_manager.set_heartbeat_options(config.heartbeat_interval, config.heartbeat_timeout,
+                                                      config.stale_min_seconds, config.stale_max_seconds)
                 monitor_manager.add_callback(handle_token_creation)
+                # 重启前未执行的延迟卖出在这里恢复；到期的批次交给回调线程执行，卖出和写文件不占用监听循环
+                sell_scheduler.start(execute_sell, monitor_manager.callback_runtime.dispatch)
                 program_id = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
                 await monitor_manager.start_monitoring(program_id)
                 # try:
@@ -201,6 +280,10 @@ class SniperManager:
         except Exception as e:
             print(f"狙击线程出错error: {e}")
         finally:
+            try:
+                loop.run_until_complete(close_async_pump_client())
+            except Exception as e:
+                print(f"关闭 RPC 客户端时出错: {e}")
             loop.close()
 
     def start(self):
@@ -209,6 +292,18 @@ class SniperManager:
             return False
 
         try:
+            # 提前预热 blockhash，保证第一笔买入不需要等待 RPC
+            get_blockhash_service().start()
+            global_account_cache.start()
+            position_ledger.start()
+            # 配置文件改动后自动加载新快照
+            config_service.start()
+            # contracts.json 作为关注列表，规则取当前配置快照
+            token_filter.load_contracts()
+            self.apply_config(config_service.get())
+            # 启动时一次性解密所有钱包，买入路径直接从内存取密钥对
+            self.wallet_manager.unlock(config_service.get().keyring_idle_timeout or 0)
+
             # 创建并启动线程
             self.stop_event.clear()
             self.thread = threading.Thread(
@@ -0,0 +1,224 @@
+# utilities/stream_health.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import websockets
+
+# 心跳结束的原因
+REASON_STALE = 'stale'
+REASON_PING_TIMEOUT = 'ping_timeout'
+REASON_CLOSED = 'closed'
+
+_NS = 1_000_000_000
+# 通知间隔与 RTT 的指数滑动平均系数
+_EWMA_ALPHA = 0.05
+
+
+class StreamHealth:
+    __slots__ = ('min_stale', 'max_stale', 'stale_factor', 'last_message_ns', 'interval_avg', 'messages',
+                 'rtt_ms', 'rtt_avg_ms', 'rtt_max_ms', 'pings', 'ping_failures', 'stale', 'failovers',
+                 'standby_hits', 'last_failover_ms', 'last_reason')
+
+    def __init__(self, min_stale: float = 3.0, max_stale: float = 30.0, stale_factor: float = 20.0):
+        """
+        Liveness of one notification stream, judged from ping RTT and the notification rate
+        Args:
+            min_stale: Never call the stream silent before this many seconds without a notification
+            max_stale: Always call it silent after this many seconds
+            stale_factor: Silent once the gap exceeds this many average notification intervals
+        """
+        self.min_stale = min_stale
+        self.max_stale = max_stale
+        self.stale_factor = stale_factor
+        self.last_message_ns = 0
+        self.interval_avg: Optional[float] = None
+        self.messages = 0
+        self.rtt_ms: Optional[float] = None
+        self.rtt_avg_ms: Optional[float] = None
+        self.rtt_max_ms = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+        self.stale = 0
+        self.failovers = 0
+        self.standby_hits = 0
+        self.last_failover_ms: Optional[float] = None
+        self.last_reason: Optional[str] = None
+
+    def on_subscribed(self):
+        """新订阅从确认时刻开始计算静默时间，平均间隔沿用之前的值"""
+        self.last_message_ns = time.perf_counter_ns()
+
+    def on_message(self, now_ns: int):
+        interval = (now_ns - self.last_message_ns) / _NS
+        if self.interval_avg is None:
+            self.interval_avg = interval
+        else:
+            self.interval_avg += _EWMA_ALPHA * (interval - self.interval_avg)
+        self.last_message_ns = now_ns
+        self.messages += 1
+
+    def on_pong(self, rtt_ms: float):
+        self.pings += 1
+        self.rtt_ms = rtt_ms
+        self.rtt_avg_ms = rtt_ms if self.rtt_avg_ms is None else self.rtt_avg_ms + _EWMA_ALPHA * (rtt_ms - self.rtt_avg_ms)
+        if rtt_ms > self.rtt_max_ms:
+            self.rtt_max_ms = rtt_ms
+
+    def stale_after(self) -> float:
+        """Seconds of silence after which the stream counts as dead"""
+        if self.interval_avg is None:
+            return self.max_stale
+        return min(max(self.min_stale, self.stale_factor * self.interval_avg), self.max_stale)
+
+    def silence(self, now_ns: Optional[int] = None) -> float:
+        return ((now_ns or time.perf_counter_ns()) - self.last_message_ns) / _NS
+
+    def is_stale(self, now_ns: Optional[int] = None) -> bool:
+        return self.silence(now_ns) > self.stale_after()
+
+    def to_dict(self) -> Dict:
+        return {
+            'messages': self.messages,
+            'avg_interval_ms': round(self.interval_avg * 1000, 3) if self.interval_avg is not None else None,
+            'stale_after_s': round(self.stale_after(), 3),
+            'silence_s': round(self.silence(), 3) if self.last_message_ns else None,
+            'rtt_ms': round(self.rtt_ms, 3) if self.rtt_ms is not None else None,
+            'avg_rtt_ms': round(self.rtt_avg_ms, 3) if self.rtt_avg_ms is not None else None,
+            'max_rtt_ms': round(self.rtt_max_ms, 3),
+            'pings': self.pings,
+            'ping_failures': self.ping_failures,
+            'stale': self.stale,
+            'failovers': self.failovers,
+            'standby_hits': self.standby_hits,
+            'last_failover_ms': round(self.last_failover_ms, 3) if self.last_failover_ms is not None else None,
+            'last_reason': self.last_reason
+        }
+
+
+async def ping_rtt(websocket, timeout: float) -> float:
+    """Send a ping and wait for its pong, returns the round trip in milliseconds"""
+    started = time.perf_counter()
+    pong_waiter = await websocket.ping()
+    await asyncio.wait_for(pong_waiter, timeout)
+    return (time.perf_counter() - started) * 1000
+
+
+async def heartbeat(websocket, health: StreamHealth, interval: float = 5.0, timeout: float = 2.0,
+                    standby: Optional['StandbyConnection'] = None) -> str:
+    """
+    Watch a subscribed connection from its own event loop until it looks dead
+    Args:
+        websocket: Connection carrying the subscription
+        health: Stream state, updated by the reader on every notification
+        interval: Seconds between pings
+        timeout: Seconds to wait for a pong
+        standby: Pre-opened spare connection, pinged along with the active one
+    Returns:
+        REASON_STALE, REASON_PING_TIMEOUT or REASON_CLOSED
+    """
+    # 静默检查比 ping 更频繁，静默判定不受 ping 间隔限制
+    check_interval = min(interval, health.min_stale / 4)
+    next_ping = time.monotonic() + interval
+    while True:
+        await asyncio.sleep(check_interval)
+        if health.is_stale():
+            health.stale += 1
+            return REASON_STALE
+        if time.monotonic() < next_ping:
+            continue
+        next_ping = time.monotonic() + interval
+        messages = health.messages
+        try:
+            health.on_pong(await ping_rtt(websocket, timeout))
+        except asyncio.TimeoutError:
+            health.ping_failures += 1
+            # 等待期间仍有通知到达说明是读取积压（pong 排在未读帧之后），连接本身正常
+            if health.messages == messages:
+                return REASON_PING_TIMEOUT
+        except websockets.ConnectionClosed:
+            return REASON_CLOSED
+        if standby is not None:
+            await standby.keepalive(timeout)
+
+
+class StandbyConnection:
+    def __init__(self, open_connection: Callable[[], Awaitable]):
+        """
+        Keeps one connected but unsubscribed websocket ready, so a failover only costs the subscribe round trip
+        Args:
+            open_connection: Coroutine factory returning a new open connection
+        """
+        self._open = open_connection
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+
+    def prepare(self):
+        """Start opening the spare connection in the background if none is ready or pending"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._connect())
+
+    async def _connect(self):
+        # websockets 的 connect 对象只是 awaitable，不能直接交给 create_task
+        return await self._open()
+
+    async def acquire(self):
+        """
+        Take the spare connection (or open one) and start preparing the next spare
+        Returns:
+            (connection, True if the pre-opened spare was used)
+        """
+        task, self._task = self._task, None
+        websocket = None
+        if task is not None:
+            try:
+                # 备用连接仍在建立时等它完成，比重新建立更快
+                websocket = await task
+            except Exception:
+                websocket = None
+            if websocket is not None and not websocket.open:
+                self.discard(websocket)
+                websocket = None
+        warm = websocket is not None
+        if websocket is None:
+            websocket = await self._open()
+        self.prepare()
+        return websocket, warm
+
+    async def keepalive(self, timeout: float):
+        """Ping the spare connection, replace it if it stopped answering"""
+        task = self._task
+        if task is None or not task.done():
+            return
+        try:
+            await ping_rtt(task.result(), timeout)
+        except Exception:
+            self._task = None
+            if not task.cancelled() and task.exception() is None:
+                self.discard(task.result())
+            self.prepare()
+
+    def discard(self, websocket):
+        """Close a connection in the background without waiting for the close handshake"""
+        closing = asyncio.create_task(self._close(websocket))
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket):
+        websocket.close_timeout = 1
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                self.discard(await task)
+            except BaseException:
+                pass
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
@@ -0,0 +1,256 @@
+# utilities/token_filter.py
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+# tokenFilter 配置键 -> 字段
+_RULE_KEYS = {
+    'nameInclude': 'name_include',
+    'nameExclude': 'name_exclude',
+    'symbolInclude': 'symbol_include',
+    'symbolExclude': 'symbol_exclude',
+    'creatorAllow': 'creator_allow',
+    'creatorDeny': 'creator_deny',
+    'watchlist': 'watchlist',
+    'uriHostAllow': 'uri_host_allow',
+    'uriHostDeny': 'uri_host_deny',
+}
+_PATTERN_FIELDS = ('name_include', 'name_exclude', 'symbol_include', 'symbol_exclude')
+
+
+@dataclass(frozen=True)
+class FilterRules:
+    name_include: Tuple[str, ...] = ()
+    name_exclude: Tuple[str, ...] = ()
+    symbol_include: Tuple[str, ...] = ()
+    symbol_exclude: Tuple[str, ...] = ()
+    creator_allow: Tuple[str, ...] = ()
+    creator_deny: Tuple[str, ...] = ()
+    watchlist: Tuple[str, ...] = ()
+    uri_host_allow: Tuple[str, ...] = ()
+    uri_host_deny: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'FilterRules':
+        """
+        Validate the tokenFilter config object
+        Raises:
+            TypeError, ValueError: Unknown rule, non-list value or invalid regex
+        """
+        if not isinstance(data, Mapping):
+            raise TypeError("expected an object of rule lists")
+        values = {}
+        for key, value in data.items():
+            name = _RULE_KEYS.get(key)
+            if name is None:
+                raise ValueError(f"unknown rule {key}")
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+                raise TypeError(f"{key} must be a list of strings")
+            value = tuple(item.strip() for item in value if item.strip())
+            if name in _PATTERN_FIELDS:
+                for pattern in value:
+                    try:
+                        # 与编译时相同的包装方式校验，全局标志等写法在这里报错
+                        re.compile(f"(?P<p0>{pattern})")
+                    except re.error as e:
+                        raise ValueError(f"{key}: invalid pattern {pattern!r}: {e}") from None
+            values[name] = value
+        return cls(**values)
+
+
+def _pattern_check(rule: str, patterns: Tuple[str, ...], attribute: str, exclude: bool) -> Callable:
+    """名称/符号的所有正则（不区分大小写）合并为一个带命名分组的 alternation，lastgroup 即命中的规则"""
+    regex = re.compile('|'.join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns)), re.IGNORECASE)
+    search = regex.search
+    labels = {f"p{i}": f"{rule}:{p}" for i, p in enumerate(patterns)}
+
+    if exclude:
+        def check(token_info):
+            match = search(getattr(token_info, attribute) or "")
+            return labels[match.lastgroup] if match else None
+    else:
+        def check(token_info):
+            return None if search(getattr(token_info, attribute) or "") else rule
+    return check
+
+
+def _host_lookup(domains: Tuple[str, ...]) -> Callable[[Optional[str]], Optional[str]]:
+    """域名规则匹配主机本身及其所有上级域名，例如 ipfs.io 匹配 cf.ipfs.io"""
+    domain_set = frozenset(domain.lower().strip('.') for domain in domains)
+
+    def lookup(host: Optional[str]) -> Optional[str]:
+        while host:
+            if host in domain_set:
+                return host
+            _, _, host = host.partition('.')
+        return None
+    return lookup
+
+
+def _uri_host(uri: Optional[str]) -> Optional[str]:
+    try:
+        return urlsplit(uri).hostname if uri else None
+    except ValueError:
+        return None
+
+
+def compile_rules(rules: FilterRules, contracts: Iterable[str] = ()) -> Callable:
+    """
+    Compile rules into one matcher function. A non-empty watchlist replaces the allow rules (creatorAllow,
+    nameInclude, symbolInclude, uriHostAllow); the deny rules (creatorDeny, nameExclude, symbolExclude,
+    uriHostDeny) still reject watchlisted mints
+    Args:
+        rules: Parsed tokenFilter rules
+        contracts: Extra watchlist mints (contracts.json)
+    Returns:
+        matcher(token_info) -> (passed, rule label or None)
+    """
+    watchlist = frozenset(rules.watchlist) | frozenset(contracts)
+    # 设置了关注列表时只买列表中的代币，关注列表取代放行类规则，排除类规则照常生效
+    use_allow = not watchlist
+
+    # 只编译已配置的规则，按开销从小到大排列：集合查找 -> 正则 -> URI 解析
+    checks: List[Callable] = []
+    if watchlist:
+        checks.append(lambda token_info: None if token_info.mint in watchlist else 'watchlist_miss')
+    if rules.creator_deny:
+        deny = frozenset(rules.creator_deny)
+        checks.append(lambda token_info: f"creator_deny:{token_info.user}" if token_info.user in deny else None)
+    if rules.creator_allow and use_allow:
+        allow = frozenset(rules.creator_allow)
+        checks.append(lambda token_info: None if token_info.user in allow else 'creator_allow')
+    if rules.symbol_exclude:
+        checks.append(_pattern_check('symbol_exclude', rules.symbol_exclude, 'symbol', True))
+    if rules.symbol_include and use_allow:
+        checks.append(_pattern_check('symbol_include', rules.symbol_include, 'symbol', False))
+    if rules.name_exclude:
+        checks.append(_pattern_check('name_exclude', rules.name_exclude, 'name', True))
+    if rules.name_include and use_allow:
+        checks.append(_pattern_check('name_include', rules.name_include, 'name', False))
+    check_allow = bool(rules.uri_host_allow) and use_allow
+    if rules.uri_host_deny or check_allow:
+        deny_host = _host_lookup(rules.uri_host_deny)
+        allow_host = _host_lookup(rules.uri_host_allow)
+
+        def check_uri(token_info):
+            host = _uri_host(token_info.uri)
+            denied = deny_host(host)
+            if denied:
+                return f"uri_host_deny:{denied}"
+            if check_allow and not allow_host(host):
+                return 'uri_host_allow'
+            return None
+        checks.append(check_uri)
+
+    if not checks:
+        return lambda token_info: (True, None)
+
+    # 通过关注列表的代币记为 watchlist 命中
+    passed_rule = 'watchlist' if watchlist else None
+
+    def matcher(token_info):
+        for check in checks:
+            rule = check(token_info)
+            if rule is not None:
+                return False, rule
+        return True, passed_rule
+    return matcher
+
+
+class TokenFilter:
+    def __init__(self, contracts_file: str):
+        """
+        Pre-RPC filter deciding whether a new token is worth buying
+        Args:
+            contracts_file: contracts.json, mints listed there act as a watchlist
+        """
+        self.contracts_file = contracts_file
+        self.rules = FilterRules()
+        self.contracts: Tuple[str, ...] = ()
+        self._matcher = compile_rules(self.rules)
+        self._lock = threading.Lock()
+
+        self.hits: Dict[str, int] = {}
+        self.evaluations = 0
+        self.passed = 0
+        self.rejected = 0
+        self.eval_ns_total = 0
+        self.eval_ns_max = 0
+        self.compiles = 0
+
+    def _compile(self):
+        # 编译完成后整体替换，评估方始终拿到完整的匹配函数
+        self._matcher = compile_rules(self.rules, self.contracts)
+        self.compiles += 1
+
+    def set_rules(self, rules: FilterRules):
+        if rules != self.rules:
+            self.rules = rules
+            self._compile()
+
+    def set_contracts(self, contracts: Iterable[str]):
+        contracts = tuple(dict.fromkeys(c for c in contracts if c))
+        if contracts != self.contracts:
+            self.contracts = contracts
+            self._compile()
+
+    def load_contracts(self):
+        """从 contracts.json 读取关注列表"""
+        try:
+            with open(self.contracts_file, 'r') as f:
+                self.set_contracts(json.load(f))
+        except FileNotFoundError:
+            self.set_contracts(())
+        except Exception as e:
+            print(f"Error loading contracts: {e}")
+
+    def evaluate(self, token_info) -> Tuple[bool, Optional[str]]:
+        """
+        Run the compiled rules on a parsed creation event
+        Returns:
+            (passed, label of the deciding rule or None)
+        """
+        started = time.perf_counter_ns()
+        passed, rule = self._matcher(token_info)
+        elapsed = time.perf_counter_ns() - started
+        with self._lock:
+            self.evaluations += 1
+            if passed:
+                self.passed += 1
+            else:
+                self.rejected += 1
+            if rule is not None:
+                self.hits[rule] = self.hits.get(rule, 0) + 1
+            self.eval_ns_total += elapsed
+            if elapsed > self.eval_ns_max:
+                self.eval_ns_max = elapsed
+        return passed, rule
+
+    def reset(self):
+        with self._lock:
+            self.hits.clear()
+            self.evaluations = self.passed = self.rejected = 0
+            self.eval_ns_total = self.eval_ns_max = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'evaluations': self.evaluations,
+                'passed': self.passed,
+                'rejected': self.rejected,
+                'hits': dict(sorted(self.hits.items(), key=lambda item: -item[1])),
+                'avg_eval_us': round(self.eval_ns_total / self.evaluations / 1000, 3) if self.evaluations else None,
+                'max_eval_us': round(self.eval_ns_max / 1000, 3),
+                'watchlist': len(frozenset(self.rules.watchlist) | frozenset(self.contracts)),
+                'compiles': self.compiles
+            }
+
+
+token_filter = TokenFilter(os.path.join('data', 'contracts.json'))
@@ -14,6 +14,7 @@ from spl.token.constants import TOKEN_PROGRAM_ID
 from solana.rpc.types import TxOpts
 from typing import Optional, Dict
 from .solana_client import SolanaClient
+from .blockhash_service import get_blockhash_service
 
 
 class TokenManager:
@@ -51,7 +52,7 @@ class TokenManager:
             set_compute_price_ix = set_compute_unit_price(self.COMPUTE_UNIT_PRICE)
 
             # Get recent blockhash
-            blockhash = self.solana_client.client.get_latest_blockhash().value.blockhash
+            blockhash = get_blockhash_service().get_blockhash()
 
             # Create and compile message
             msg = MessageV0.try_compile(
@@ -144,7 +145,7 @@ class TokenManager:
             instructions.append(transfer_ix)
 
             # Get recent blockhash
-            blockhash = self.solana_client.client.get_latest_blockhash().value.blockhash
+            blockhash = get_blockhash_service().get_blockhash()
 
             # Create and compile message
             msg = MessageV0.try_compile(
@@ -3,6 +3,8 @@ from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 import json
 import os
+import threading
+import time
 import base58
 from cryptography.fernet import Fernet
 from .solana_client import SolanaClient
@@ -15,6 +17,18 @@ class WalletManager:
         self.key_file = os.path.join(data_dir, "encryption.key")
         self.solana_client = SolanaClient()
 
+        # 解密后的密钥对缓存，pubkey -> Keypair；None 表示尚未加载或已清除
+        self._keyring: Optional[Dict[str, Keypair]] = None
+        # 解密失败的钱包，pubkey -> 错误信息；仍然出现在钱包列表中
+        self.decrypt_failures: Dict[str, str] = {}
+        self._keyring_lock = threading.Lock()
+        self.idle_timeout: Optional[float] = None
+        self._last_access = 0.0
+        self._wipe_thread = None
+        self.keyring_loads = 0
+        self.keyring_wipes = 0
+        self.last_load_ms: Optional[float] = None
+
         # Initialize encryption
         self._init_encryption(encryption_key)
         self._ensure_wallet_file()
@@ -56,9 +70,13 @@ class WalletManager:
             encrypted_key = self.cipher_suite.encrypt(bytes(keypair)).decode('utf-8')
 
             # Save wallet info
-            wallets = self._load_wallets()
-            wallets[pubkey] = encrypted_key
-            self._save_wallets(wallets)
+            with self._keyring_lock:
+                wallets = self._load_wallets()
+                wallets[pubkey] = encrypted_key
+                self._save_wallets(wallets)
+                if self._keyring is not None:
+                    self._keyring[pubkey] = keypair
+                self.decrypt_failures.pop(pubkey, None)
 
             return pubkey
         except Exception as e:
@@ -66,35 +84,102 @@ class WalletManager:
             return None
 
     def get_keypair(self, pubkey: str) -> Optional[Keypair]:
-        try:
-            wallets = self._load_wallets()
-            if pubkey not in wallets:
-                return None
-
-            # Decrypt private key
-            encrypted_key = wallets[pubkey]
-            keypair_bytes = self.cipher_suite.decrypt(encrypted_key.encode())
-            return Keypair.from_bytes(keypair_bytes)
-        except Exception as e:
-            print(f"Error getting keypair: {e}")
-            return None
+        """Keypair of a stored wallet, decrypted once and then served from memory"""
+        keyring = self._keyring
+        if keyring is None:
+            keyring = self.unlock()
+        self._last_access = time.monotonic()
+        return keyring.get(pubkey)
+
+    def unlock(self, idle_timeout: Optional[float] = None) -> Dict[str, Keypair]:
+        """
+        Decrypt every stored wallet into the in-memory keyring
+        Args:
+            idle_timeout: Seconds without keypair access after which the keyring is wiped, None keeps the current setting
+        Returns:
+            The keyring, pubkey -> Keypair
+        """
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout or None
+        with self._keyring_lock:
+            if self._keyring is None:
+                started = time.perf_counter()
+                keyring = {}
+                failures = {}
+                for pubkey, encrypted_key in self._load_wallets().items():
+                    try:
+                        keyring[pubkey] = Keypair.from_bytes(self.cipher_suite.decrypt(encrypted_key.encode()))
+                    except Exception as e:
+                        failures[pubkey] = str(e) or type(e).__name__
+                        print(f"Error decrypting wallet {pubkey}: {failures[pubkey]}")
+                self._keyring = keyring
+                self.decrypt_failures = failures
+                self.keyring_loads += 1
+                self.last_load_ms = (time.perf_counter() - started) * 1000
+            keyring = self._keyring
+        self._last_access = time.monotonic()
+        if self.idle_timeout and not (self._wipe_thread and self._wipe_thread.is_alive()):
+            self._wipe_thread = threading.Thread(target=self._wipe_when_idle, name="keyring-wipe", daemon=True)
+            self._wipe_thread.start()
+        return keyring
+
+    def lock(self):
+        """丢弃内存中的密钥对，下次访问时重新解密"""
+        with self._keyring_lock:
+            if self._keyring is not None:
+                # 只替换引用，正在使用旧字典的调用方不受影响
+                self._keyring = None
+                self.keyring_wipes += 1
+
+    def _wipe_when_idle(self):
+        while self._keyring is not None and self.idle_timeout:
+            idle = time.monotonic() - self._last_access
+            if idle >= self.idle_timeout:
+                self.lock()
+                return
+            time.sleep(self.idle_timeout - idle)
 
     def remove_wallet(self, pubkey: str) -> bool:
         try:
-            wallets = self._load_wallets()
-            if pubkey in wallets:
-                del wallets[pubkey]
-                self._save_wallets(wallets)
-                return True
+            with self._keyring_lock:
+                wallets = self._load_wallets()
+                if pubkey in wallets:
+                    del wallets[pubkey]
+                    self._save_wallets(wallets)
+                    if self._keyring is not None:
+                        self._keyring.pop(pubkey, None)
+                    self.decrypt_failures.pop(pubkey, None)
+                    return True
             return False
         except:
             return False
 
     def get_all_pubkeys(self) -> List[str]:
+        """Every stored wallet, including ones that failed to decrypt (see decrypt_failures)"""
+        keyring = self._keyring
+        if keyring is not None:
+            return list(keyring) + [pubkey for pubkey in self.decrypt_failures if pubkey not in keyring]
         return list(self._load_wallets().keys())
 
     def clear_all_wallets(self):
-        self._save_wallets({})
+        with self._keyring_lock:
+            self._save_wallets({})
+            if self._keyring is not None:
+                self._keyring.clear()
+            self.decrypt_failures = {}
+
+    def get_keyring_stats(self) -> Dict:
+        keyring = self._keyring
+        return {
+            'unlocked': keyring is not None,
+            'wallets': len(keyring) if keyring is not None else None,
+            'decrypt_failures': dict(self.decrypt_failures),
+            'loads': self.keyring_loads,
+            'wipes': self.keyring_wipes,
+            'last_load_ms': round(self.last_load_ms, 3) if self.last_load_ms is not None else None,
+            'idle_timeout': self.idle_timeout,
+            'idle_s': round(time.monotonic() - self._last_access, 3) if keyring is not None else None
+        }
 
     def _load_wallets(self) -> Dict[str, str]:
         try:
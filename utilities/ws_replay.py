@@ -0,0 +1,267 @@
+# utilities/ws_replay.py
+"""
+Record raw Solana websocket notification frames and replay them from a local server
+
+    python -m utilities.ws_replay record --out data/frames.wsr --duration 60
+    python -m utilities.ws_replay serve --file data/frames.wsr --speed 10
+    python -m utilities.ws_replay info --file data/frames.wsr
+
+Point MonitorManager at ws://127.0.0.1:8765 (config wsEndpoints) to run the pipeline against a recording.
+Set backfillGaps to false when doing so: a resubscribe would otherwise backfill from the configured mainnet RPC.
+The server plays the recording once; a resubscribe continues from the next unsent frame.
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import struct
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import websockets
+
+from .stream_merger import endpoint_label
+
+PUMP_FUN_PROGRAM_ID = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+FILE_MAGIC = b"WSR1\n"
+# 每条记录: 相对首帧的接收时间(纳秒) + 帧长度
+_RECORD = struct.Struct('<qI')
+
+
+class FrameWriter:
+    def __init__(self, path: str, metadata: Dict):
+        """
+        Gzip file of raw websocket frames with receive timestamps
+        Args:
+            path: Output file
+            metadata: Stored as a JSON header line, must include the recorded subscription id
+        """
+        self._file = gzip.open(path, 'wb')
+        self._file.write(FILE_MAGIC)
+        self._file.write(json.dumps(metadata).encode() + b"\n")
+        self._start_ns = None
+        self.frames = 0
+
+    def write(self, frame: str, received_ns: Optional[int] = None):
+        received_ns = time.perf_counter_ns() if received_ns is None else received_ns
+        if self._start_ns is None:
+            self._start_ns = received_ns
+        data = frame.encode()
+        self._file.write(_RECORD.pack(received_ns - self._start_ns, len(data)))
+        self._file.write(data)
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+
+def read_frames(path: str) -> Tuple[Dict, Iterator[Tuple[int, str]]]:
+    """
+    Open a recording
+    Returns:
+        Tuple of (metadata, iterator of (offset_ns, frame))
+    """
+    f = gzip.open(path, 'rb')
+    if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+        f.close()
+        raise ValueError(f"{path} is not a websocket recording")
+    metadata = json.loads(f.readline())
+
+    def frames():
+        with f:
+            while True:
+                head = f.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                offset_ns, length = _RECORD.unpack(head)
+                yield offset_ns, f.read(length).decode()
+
+    return metadata, frames()
+
+
+async def record(endpoint: str, path: str, program_id: str = PUMP_FUN_PROGRAM_ID, duration: float = 60.0,
+                 max_frames: Optional[int] = None) -> int:
+    """
+    Subscribe to program logs and write every notification frame to path
+    Returns:
+        Number of frames recorded
+    """
+    request = {
+        "jsonrpc": "2.0", "id": 1, "method": "logsSubscribe",
+        "params": [{"mentions": [program_id]}, {"commitment": "processed"}]
+    }
+    async with websockets.connect(endpoint, max_size=None) as websocket:
+        await websocket.send(json.dumps(request))
+        subscription = json.loads(await websocket.recv())['result']
+        writer = FrameWriter(path, {
+            'version': 1,
+            'endpoint': endpoint_label(endpoint),
+            'program_id': program_id,
+            'subscription': subscription,
+            'recorded_at': time.time()
+        })
+        deadline = time.monotonic() + duration
+        try:
+            while time.monotonic() < deadline and (max_frames is None or writer.frames < max_frames):
+                try:
+                    frame = await asyncio.wait_for(websocket.recv(), timeout=deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+                writer.write(frame)
+        finally:
+            writer.close()
+    return writer.frames
+
+
+class ReplayServer:
+    def __init__(self, path: str, host: str = "127.0.0.1", port: int = 8765, speed: float = 1.0):
+        """
+        Local stand-in for a Solana websocket endpoint that replays a recording
+        Args:
+            path: Recording written by FrameWriter
+            host: Listen address
+            port: Listen port
+            speed: 1 for recorded pacing, N for N times faster, 0 for as fast as possible
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self._server = None
+        self._subscription_ids = itertools.count(1_000_000)
+        # 整个服务只回放一遍录制，重订阅（含新连接）从下一帧继续，不从头开始
+        self._metadata: Optional[Dict] = None
+        self._frames: Optional[Iterator[Tuple[int, str]]] = None
+        self._next_frame: Optional[Tuple[int, str]] = None
+        self._start: Optional[float] = None
+        self._replay_task = None
+        self.finished = asyncio.Event()
+
+        self.connections = 0
+        self.frames_sent = 0
+        self.replay_seconds = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port, max_size=None)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, websocket, path=None):
+        self.connections += 1
+        replay_task = None
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                method = request.get('method', '')
+                if method == 'logsSubscribe' and replay_task is None:
+                    if self._frames is None:
+                        self._metadata, self._frames = read_frames(self.path)
+                    # 回复录制时的订阅 ID，录制帧中的 subscription 字段保持一致
+                    await websocket.send(json.dumps({
+                        "jsonrpc": "2.0", "result": self._metadata['subscription'], "id": request['id']
+                    }))
+                    # 同一时间只有最新的订阅接收回放
+                    if self._replay_task is not None:
+                        self._replay_task.cancel()
+                    replay_task = self._replay_task = asyncio.create_task(self._replay(websocket))
+                elif method.endswith('Subscribe'):
+                    # 其余订阅只确认，不推送数据
+                    await websocket.send(json.dumps({
+                        "jsonrpc": "2.0", "result": next(self._subscription_ids), "id": request['id']
+                    }))
+                elif method.endswith('Unsubscribe'):
+                    await websocket.send(json.dumps({"jsonrpc": "2.0", "result": True, "id": request['id']}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if replay_task is not None:
+                replay_task.cancel()
+
+    async def _replay(self, websocket):
+        if self._start is None:
+            self._start = time.perf_counter()
+        while not self.finished.is_set():
+            # 发送前被取消（连接断开）的帧留给下一个订阅
+            if self._next_frame is None:
+                self._next_frame = next(self._frames, None)
+                if self._next_frame is None:
+                    self.replay_seconds = time.perf_counter() - self._start
+                    self.finished.set()
+                    return
+            offset_ns, frame = self._next_frame
+            if self.speed > 0:
+                delay = self._start + offset_ns / 1e9 / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await websocket.send(frame)
+            self._next_frame = None
+            self.frames_sent += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            'connections': self.connections,
+            'frames_sent': self.frames_sent,
+            'replay_seconds': round(self.replay_seconds, 3),
+            'frames_per_second': round(self.frames_sent / self.replay_seconds, 1) if self.replay_seconds else None
+        }
+
+
+def main():
+    from .monitor_manager import DEFAULT_WS_ENDPOINT
+
+    parser = argparse.ArgumentParser(description="Record and replay Solana websocket notifications")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_cmd = commands.add_parser('record', help="record program log notifications")
+    record_cmd.add_argument('--endpoint', default=DEFAULT_WS_ENDPOINT)
+    record_cmd.add_argument('--program', default=PUMP_FUN_PROGRAM_ID)
+    record_cmd.add_argument('--out', required=True)
+    record_cmd.add_argument('--duration', type=float, default=60.0)
+    record_cmd.add_argument('--max-frames', type=int)
+
+    serve_cmd = commands.add_parser('serve', help="replay a recording over a local websocket server")
+    serve_cmd.add_argument('--file', required=True)
+    serve_cmd.add_argument('--host', default="127.0.0.1")
+    serve_cmd.add_argument('--port', type=int, default=8765)
+    serve_cmd.add_argument('--speed', type=float, default=1.0, help="1 = recorded pace, N = N times faster, 0 = max")
+
+    info_cmd = commands.add_parser('info', help="summarise a recording")
+    info_cmd.add_argument('--file', required=True)
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        frames = asyncio.run(record(args.endpoint, args.out, args.program, args.duration, args.max_frames))
+        print(f"Recorded {frames} frames to {args.out}")
+
+    elif args.command == 'serve':
+        async def serve():
+            server = ReplayServer(args.file, args.host, args.port, args.speed)
+            await server.start()
+            print(f"Replaying {args.file} on {server.url} at speed {args.speed or 'max'}")
+            await asyncio.Future()
+
+        asyncio.run(serve())
+
+    elif args.command == 'info':
+        metadata, frames = read_frames(args.file)
+        count, last_ns, size = 0, 0, 0
+        for offset_ns, frame in frames:
+            count += 1
+            last_ns = offset_ns
+            size += len(frame)
+        print(json.dumps(metadata, indent=2))
+        print(f"{count} frames, {size} bytes, {last_ns / 1e9:.3f}s")
+
+
+if __name__ == '__main__':
+    main()